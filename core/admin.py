@@ -1,5 +1,16 @@
-from django.contrib import admin
-from .models import SiteSettings, Skill, Project, ContactInquiry
+import json
+
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseBadRequest
+from django.urls import path
+from . import archive, exports
+from .icons import uncovered_icons
+from .models import (
+    ArchivedInquiry, SiteSettings, Skill, Project, ContactInquiry, InquiryNotification, Technology,
+)
+from .search import FullTextSearchMixin
 
 
 @admin.register(SiteSettings)
@@ -19,17 +30,27 @@ class SkillAdmin(admin.ModelAdmin):
     list_display = ['name', 'category', 'proficiency', 'display_order']
     list_filter = ['category']
     list_editable = ['proficiency', 'display_order']
-    ordering = ['display_order', 'name']
+    ordering = ['display_order', 'name', 'pk']
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        missing = uncovered_icons(obj.icon)
+        if missing:
+            messages.warning(
+                request,
+                f"{', '.join(sorted(missing))} is not in the icon subset yet; "
+                f"run `manage.py build_icons` and redeploy.",
+            )
 
 
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ['title', 'category', 'is_featured', 'display_order', 'created_at']
     list_filter = ['category', 'is_featured']
     list_editable = ['is_featured', 'display_order']
     prepopulated_fields = {'slug': ('title',)}
     search_fields = ['title', 'description', 'tagline']
-    ordering = ['display_order', '-created_at']
+    ordering = ['display_order', '-created_at', 'pk']
 
     fieldsets = (
         ('Basic Info', {
@@ -50,14 +71,29 @@ class ProjectAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(Technology)
+class TechnologyAdmin(admin.ModelAdmin):
+    # Rows are maintained from Project.tech_stack
+    list_display = ['name', 'project_count']
+    search_fields = ['name']
+    ordering = ['-project_count', 'name', 'pk']
+    readonly_fields = ['name', 'key', 'project_count']
+
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(ContactInquiry)
-class ContactInquiryAdmin(admin.ModelAdmin):
+class ContactInquiryAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ['name', 'email', 'inquiry_type', 'is_read', 'created_at']
     list_filter = ['inquiry_type', 'is_read', 'created_at']
     list_editable = ['is_read']
     search_fields = ['name', 'email', 'message']
     readonly_fields = ['created_at']
     ordering = ['-created_at']
+    actions = ['export_csv', 'export_ndjson']
+    # Adds export links that carry the current filters and search
+    change_list_template = 'admin/core/contactinquiry/change_list.html'
 
     fieldsets = (
         ('Contact Info', {
@@ -74,3 +110,74 @@ class ContactInquiryAdmin(admin.ModelAdmin):
             'fields': ('is_read', 'created_at')
         }),
     )
+
+    def get_urls(self):
+        return [
+            path('export/', self.admin_site.admin_view(self.export_view), name='core_contactinquiry_export'),
+            *super().get_urls(),
+        ]
+
+    def export_view(self, request):
+        """Stream the changelist's filtered, searched inquiries; ?format=csv|ndjson&gzip=1."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        params = request.GET.copy()
+        export_format = params.pop('format', ['csv'])[-1]
+        compress = params.pop('gzip', [''])[-1] in ('1', 'true')
+        if export_format not in exports.FORMATS:
+            return HttpResponseBadRequest(f'format must be one of {", ".join(exports.FORMATS)}')
+        # What's left are the changelist's own filter, search and ordering parameters
+        request.GET = params
+        try:
+            changelist = self.get_changelist_instance(request)
+        except IncorrectLookupParameters:
+            return HttpResponseBadRequest('Invalid filter parameters')
+        return exports.export_response(changelist.queryset, export_format, compress)
+
+    @admin.action(description='Export selected inquiries as CSV', permissions=['view'])
+    def export_csv(self, request, queryset):
+        return exports.export_response(queryset, 'csv')
+
+    @admin.action(description='Export selected inquiries as NDJSON', permissions=['view'])
+    def export_ndjson(self, request, queryset):
+        return exports.export_response(queryset, 'ndjson')
+
+
+@admin.register(InquiryNotification)
+class InquiryNotificationAdmin(admin.ModelAdmin):
+    # Rows are written with their inquiry and updated by send_notifications
+    list_display = ['inquiry', 'created_at', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = [('sent_at', admin.EmptyFieldListFilter)]
+    readonly_fields = ['inquiry', 'created_at', 'attempts', 'next_attempt_at', 'sent_at', 'last_error']
+    list_select_related = ['inquiry']
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ArchivedInquiry)
+class ArchivedInquiryAdmin(admin.ModelAdmin):
+    # Rows are written by archive_inquiries; the record itself is in the archive file
+    list_display = ['name', 'email', 'inquiry_type', 'created_at', 'archive']
+    list_filter = ['inquiry_type']
+    search_fields = ['email', 'name']
+    ordering = ['-created_at', '-pk']
+    readonly_fields = ['record', 'inquiry_id', 'archive', 'offset', 'length', 'archived_at']
+    fields = readonly_fields
+    actions = ['restore_inquiries']
+
+    @admin.display(description='Archived record')
+    def record(self, obj):
+        data = archive.read([obj]).get(obj.inquiry_id)
+        return json.dumps(data, indent=2, ensure_ascii=False) if data else '(missing from the archive file)'
+
+    @admin.action(description='Restore selected inquiries', permissions=['delete'])
+    def restore_inquiries(self, request, queryset):
+        count = archive.restore(queryset)
+        messages.success(request, f'Restored {count} inquiries.')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,208 @@
+"""
+Admission control for expensive POST endpoints.
+
+Views marked with @admission_controlled are gated by
+AdmissionControlMiddleware before CSRF checking, form parsing or any
+database work:
+
+- a token bucket per client IP and one shared by everyone, so a single
+  client can't flood the endpoint and a distributed flood is shed before
+  it starves the workers serving pages
+- a fingerprint of the request body (ignoring the CSRF token and the
+  multipart boundary), so identical resubmissions within
+  ADMISSION_DEDUPE_WINDOW are answered without being processed again.
+  It is only taken once the buckets have admitted the request: the
+  decision to shed rests on headers and the client address, so a flood
+  is turned away without its bodies being read
+
+State lives in a small SQLite file under VAR_DIR (ADMISSION_DB_PATH) that
+every gunicorn worker opens, so limits hold across workers without an
+external service. Rejections are counted there too; see
+`manage.py admission_stats`.
+"""
+
+import hashlib
+import random
+import re
+import sqlite3
+import threading
+import time
+from functools import wraps
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+
+GLOBAL_BUCKET = 'global'
+
+# Outcomes, which double as counter names
+ADMITTED = 'admitted'
+REJECTED_IP = 'rejected_ip'
+REJECTED_GLOBAL = 'rejected_global'
+REJECTED_BUSY = 'rejected_busy'
+DUPLICATE = 'duplicate'
+COUNTERS = [ADMITTED, REJECTED_IP, REJECTED_GLOBAL, REJECTED_BUSY, DUPLICATE]
+
+CSRF_VALUE_RE = re.compile(rb'(csrfmiddlewaretoken(?:"\r\n\r\n|=))[^\r&]*')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bucket (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS fingerprint (digest TEXT PRIMARY KEY, expires REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS fingerprint_expires ON fingerprint (expires);
+CREATE TABLE IF NOT EXISTS counter (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+
+def admission_controlled(view_func):
+    """Mark a view as gated by AdmissionControlMiddleware."""
+    if iscoroutinefunction(view_func):
+        async def _wrapped_view(*args, **kwargs):
+            return await view_func(*args, **kwargs)
+    else:
+        def _wrapped_view(*args, **kwargs):
+            return view_func(*args, **kwargs)
+    _wrapped_view.admission_controlled = True
+    return wraps(view_func)(_wrapped_view)
+
+
+def client_ip(request):
+    """The client's address, as seen by the outermost of ADMISSION_TRUSTED_PROXIES."""
+    proxies = settings.ADMISSION_TRUSTED_PROXIES
+    forwarded = [entry.strip() for entry in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if entry.strip()]
+    if not proxies or not forwarded:
+        return request.META.get('REMOTE_ADDR', '')
+    # Each trusted proxy appended one entry. With fewer entries than
+    # proxies, every one of them was still added by a trusted proxy.
+    return forwarded[-proxies] if len(forwarded) >= proxies else forwarded[0]
+
+
+def request_fingerprint(request):
+    """Digest of the submitted payload, stable across retries of the same form."""
+    body = request.body
+    content_type = request.META.get('CONTENT_TYPE', '')
+    if 'boundary=' in content_type:
+        # Browsers pick a fresh multipart boundary for every submission
+        boundary = content_type.split('boundary=', 1)[1].split(';')[0].strip('"')
+        body = body.replace(boundary.encode(), b'')
+    body = CSRF_VALUE_RE.sub(rb'\1', body)
+    return hashlib.sha256(request.path.encode() + b'\0' + body).hexdigest()
+
+
+class AdmissionStore:
+    """Token buckets, recent fingerprints and counters in a shared SQLite file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=settings.ADMISSION_DB_TIMEOUT, isolation_level=None,
+            )
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def _available(self, cursor, key, rate, burst, now):
+        """Tokens left in bucket `key` after refilling; doesn't consume."""
+        row = cursor.execute('SELECT tokens, updated FROM bucket WHERE key = ?', [key]).fetchone()
+        if row is None:
+            return float(burst)
+        tokens, updated = row
+        return min(float(burst), tokens + (now - updated) * rate)
+
+    def _count(self, cursor, name):
+        cursor.execute(
+            'INSERT INTO counter (name, value) VALUES (?, 1) '
+            'ON CONFLICT (name) DO UPDATE SET value = value + 1',
+            [name],
+        )
+
+    def admit(self, ip):
+        """
+        Take a token from the client's and the shared bucket; returns
+        (outcome, seconds until a retry can succeed). Admitted requests are
+        counted by settle().
+        """
+        now = time.time()
+        ip_rate, ip_burst = settings.ADMISSION_IP_RATE
+        global_rate, global_burst = settings.ADMISSION_GLOBAL_RATE
+        cursor = self.connection.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            ip_key = f'ip:{ip}'
+            ip_tokens = self._available(cursor, ip_key, ip_rate, ip_burst, now)
+            global_tokens = self._available(cursor, GLOBAL_BUCKET, global_rate, global_burst, now)
+            if ip_tokens < 1:
+                outcome, retry_after = REJECTED_IP, (1 - ip_tokens) / ip_rate
+            elif global_tokens < 1:
+                outcome, retry_after = REJECTED_GLOBAL, (1 - global_tokens) / global_rate
+            else:
+                outcome, retry_after = ADMITTED, 0
+                cursor.executemany(
+                    'INSERT OR REPLACE INTO bucket (key, tokens, updated) VALUES (?, ?, ?)',
+                    [(ip_key, ip_tokens - 1, now), (GLOBAL_BUCKET, global_tokens - 1, now)],
+                )
+            if outcome != ADMITTED:
+                self._count(cursor, outcome)
+            cursor.execute('COMMIT')
+        except BaseException:
+            cursor.execute('ROLLBACK')
+            raise
+        if random.random() < 0.01:
+            self.prune(now)
+        return outcome, retry_after
+
+    def settle(self, fingerprint):
+        """DUPLICATE if an admitted request's payload was processed within the window, else ADMITTED."""
+        cursor = self.connection.cursor()
+        duplicate = cursor.execute(
+            'SELECT 1 FROM fingerprint WHERE digest = ? AND expires > ?', [fingerprint, time.time()],
+        ).fetchone()
+        outcome = DUPLICATE if duplicate else ADMITTED
+        self._count(cursor, outcome)
+        return outcome
+
+    def remember(self, fingerprint, window=None):
+        """Record a payload that was processed successfully."""
+        window = window if window is not None else settings.ADMISSION_DEDUPE_WINDOW
+        self.connection.execute(
+            'INSERT OR REPLACE INTO fingerprint (digest, expires) VALUES (?, ?)',
+            [fingerprint, time.time() + window],
+        )
+
+    def count_busy(self):
+        try:
+            self._count(self.connection.cursor(), REJECTED_BUSY)
+        except sqlite3.OperationalError:
+            pass
+
+    def prune(self, now=None):
+        """Forget expired fingerprints and buckets that have long since refilled."""
+        now = now or time.time()
+        self.connection.execute('DELETE FROM fingerprint WHERE expires <= ?', [now])
+        self.connection.execute('DELETE FROM bucket WHERE updated < ?', [now - 24 * 60 * 60])
+
+    def counters(self):
+        values = dict.fromkeys(COUNTERS, 0)
+        values.update(self.connection.execute('SELECT name, value FROM counter').fetchall())
+        return values
+
+    def reset_counters(self):
+        self.connection.execute('DELETE FROM counter')
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = AdmissionStore(settings.ADMISSION_DB_PATH)
+    return _store
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+
+    def ready(self):
+        # Connect content-change receivers and the SQLite profile hook
+        from . import db, signals  # noqa: F401
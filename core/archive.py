@@ -0,0 +1,189 @@
+"""
+Hot/cold retention for contact inquiries.
+
+ContactInquiry only grows, and the changelist, its filters and sorts and
+the database file all pay for the whole history. archive() moves read
+inquiries older than a cutoff into gzipped NDJSON files in
+INQUIRY_ARCHIVE_DIR, one per month of created_at:
+
+- records are compressed in gzip members of INQUIRY_ARCHIVE_MEMBER_SIZE,
+  appended to the month's file. Concatenated members are still one valid
+  gzip file, so `zcat 2025-01.ndjson.gz` reads a whole month.
+- every record gets an ArchivedInquiry row with the member's offset and
+  length. A lookup or restore decompresses that one member instead of
+  the file.
+
+Each batch is selected, written, fsynced, indexed and deleted in one
+transaction. A crash before the commit leaves the inquiries in the hot
+table, and at worst some unindexed bytes in an archive file. Restoring
+puts the record back under its original id and drops its index row; the
+bytes stay in the file.
+"""
+
+import fcntl
+import gzip
+import json
+import os
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ArchivedInquiry, ContactInquiry
+
+ARCHIVED_FIELDS = [field.attname for field in ContactInquiry._meta.concrete_fields]
+LOCK_NAME = '.lock'
+
+
+class ArchiveBusy(Exception):
+    """Another archive run holds the lock."""
+
+
+class ArchiveResult:
+    def __init__(self):
+        self.inquiries = 0
+        self.bytes = 0
+        self.files = set()
+
+    def __str__(self):
+        return f'{self.inquiries} inquiries, {self.bytes / 1024:.0f} KiB compressed, into {len(self.files)} files'
+
+
+def cutoff_for(days=None):
+    days = settings.INQUIRY_RETENTION_DAYS if days is None else days
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_name(created_at):
+    return f'{created_at.astimezone(dt_timezone.utc):%Y-%m}.ndjson.gz'
+
+
+def _directory():
+    directory = Path(settings.INQUIRY_ARCHIVE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+@contextmanager
+def _locked():
+    fd = os.open(_directory() / LOCK_NAME, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise ArchiveBusy('another archive run is in progress')
+        yield
+    finally:
+        os.close(fd)
+
+
+def eligible(cutoff):
+    """Inquiries archive() would move: read, and created before `cutoff`."""
+    return ContactInquiry.objects.filter(is_read=True, created_at__lt=cutoff)
+
+
+def _dumps(record):
+    # Full precision: DjangoJSONEncoder would cut created_at to milliseconds
+    return json.dumps({**record, 'created_at': record['created_at'].isoformat()}, ensure_ascii=False)
+
+
+def _member(records):
+    lines = ''.join(_dumps(record) + '\n' for record in records)
+    # mtime=0, so the same records always compress to the same bytes
+    return gzip.compress(lines.encode(), mtime=0)
+
+
+def _append(path, records, member_size):
+    """Append records as gzip members; returns (record, offset, length) per record."""
+    placed = []
+    with open(path, 'ab') as handle:
+        for start in range(0, len(records), member_size):
+            chunk = records[start:start + member_size]
+            data = _member(chunk)
+            offset = handle.tell()
+            handle.write(data)
+            placed += [(record, offset, len(data)) for record in chunk]
+        handle.flush()
+        os.fsync(handle.fileno())
+    return placed
+
+
+def _archive_batch(cutoff, batch_size, member_size, result):
+    with transaction.atomic():
+        records = list(eligible(cutoff).order_by('created_at', 'pk').values(*ARCHIVED_FIELDS)[:batch_size])
+        if not records:
+            return 0
+        by_file = defaultdict(list)
+        for record in records:
+            by_file[archive_name(record['created_at'])].append(record)
+
+        entries = []
+        for name, month in by_file.items():
+            for record, offset, length in _append(_directory() / name, month, member_size):
+                entries.append(ArchivedInquiry(
+                    inquiry_id=record['id'], inquiry_type=record['inquiry_type'], name=record['name'],
+                    email=record['email'], created_at=record['created_at'],
+                    archive=name, offset=offset, length=length,
+                ))
+            result.files.add(name)
+        result.bytes += sum({(entry.archive, entry.offset): entry.length for entry in entries}.values())
+
+        ArchivedInquiry.objects.bulk_create(entries)
+        # Their notifications go too, by cascade: they were sent long ago
+        ContactInquiry.objects.filter(pk__in=[record['id'] for record in records]).delete()
+    result.inquiries += len(records)
+    return len(records)
+
+
+def archive(cutoff, batch_size=1000, member_size=None):
+    """Move eligible inquiries into the archive; returns an ArchiveResult."""
+    member_size = member_size or settings.INQUIRY_ARCHIVE_MEMBER_SIZE
+    result = ArchiveResult()
+    with _locked():
+        while _archive_batch(cutoff, batch_size, member_size, result) == batch_size:
+            pass
+    return result
+
+
+def vacuum():
+    """Give the space freed by archiving back to the filesystem."""
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM')
+
+
+def _read_member(handle, offset, length):
+    handle.seek(offset)
+    return [json.loads(line) for line in gzip.decompress(handle.read(length)).splitlines()]
+
+
+def read(entries):
+    """{inquiry id: archived record} for ArchivedInquiry entries, one decompression per member."""
+    members = defaultdict(set)
+    for entry in entries:
+        members[entry.archive, entry.offset, entry.length].add(entry.inquiry_id)
+    records = {}
+    for (name, offset, length), ids in sorted(members.items()):
+        with open(_directory() / name, 'rb') as handle:
+            for record in _read_member(handle, offset, length):
+                if record['id'] in ids:
+                    records[record['id']] = record
+    return records
+
+
+def restore(entries):
+    """Move archived inquiries back into ContactInquiry; returns how many."""
+    entries = list(entries)
+    records = read(entries)
+    inquiries = []
+    for record in records.values():
+        record['created_at'] = parse_datetime(record['created_at'])
+        inquiries.append(ContactInquiry(**record))
+    with transaction.atomic():
+        ContactInquiry.objects.bulk_create(inquiries, batch_size=500)
+        ArchivedInquiry.objects.filter(inquiry_id__in=list(records)).delete()
+    return len(inquiries)
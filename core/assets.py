@@ -0,0 +1,243 @@
+"""
+Build-time CSS/JS pipeline.
+
+`manage.py build_assets` runs before collectstatic and writes to
+ASSET_BUILD_DIR:
+
+- critical/<page>.css: the rules of style.css that the above-the-fold part
+  of the home and project pages uses, inlined into <head> by
+  {% stylesheets %} while the full stylesheet loads without blocking render
+- site.css: the minified full stylesheet
+- bundle.js: the JS_BUNDLE files, minified by rjsmin when it is installed
+
+Output names are stable; CompressedManifestStaticFilesStorage adds the
+content hashes (and gzip/brotli variants) at collectstatic time. Until the
+build has run, the tags fall back to the source files.
+"""
+
+import gzip
+import json
+import re
+from functools import lru_cache
+from html.parser import HTMLParser
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.urls import reverse
+
+from .models import Project
+from .prerender import render
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+STYLESHEET = 'css/style.css'
+JS_BUNDLE = ['js/main.js', 'js/components.js']
+BUNDLE_NAME = 'bundle.js'
+SITE_CSS_NAME = 'site.css'
+MANIFEST_NAME = 'assets.json'
+
+# Always critical, whatever the page contains
+BASE_SELECTORS = {'*', 'html', 'body', ':root', '[x-cloak]'}
+
+IDENT_RE = re.compile(r'[#.]?-?[_a-zA-Z][\w-]*')
+PSEUDO_RE = re.compile(r'::?[a-z-]+(\([^)]*\))?')
+ATTRIBUTE_RE = re.compile(r'\[[^\]]*\]')
+QUOTED_CLASS_RE = re.compile(r"'([\w-]+)'")
+
+
+class AssetBuildError(Exception):
+    pass
+
+
+def _critical_pages():
+    """page name -> (URL path, number of leading <section>s above the fold)."""
+    pages = {'home': (reverse('core:home'), 1)}
+    slug = Project.objects.order_by('display_order', '-created_at', 'pk').values_list('slug', flat=True).first()
+    if slug:
+        pages['project_detail'] = (reverse('core:project_detail', args=[slug]), 2)
+    return pages
+
+
+# CSS
+
+def parse_css(css):
+    """Split a stylesheet into (prelude, body) rules; at-rule bodies are parsed recursively."""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    rules, position = [], 0
+    while True:
+        start = css.find('{', position)
+        if start == -1:
+            return rules
+        prelude = css[position:start].strip()
+        depth, end = 1, start + 1
+        while depth:
+            if end >= len(css):
+                raise AssetBuildError(f'Unbalanced braces after {prelude!r}')
+            depth += {'{': 1, '}': -1}.get(css[end], 0)
+            end += 1
+        body = css[start + 1:end - 1]
+        if prelude.startswith('@') and not prelude.startswith('@font-face'):
+            body = parse_css(body) if '{' in body else body.strip()
+        else:
+            body = body.strip()
+        rules.append((prelude, body))
+        position = end
+
+
+def minify_declarations(body):
+    declarations = [d.strip() for d in body.split(';') if d.strip()]
+    return ';'.join(re.sub(r'\s*:\s*', ':', d, count=1) for d in declarations)
+
+
+def serialize_css(rules):
+    out = []
+    for prelude, body in rules:
+        prelude = re.sub(r'\s*([,>+~])\s*', r'\1', re.sub(r'\s+', ' ', prelude))
+        if isinstance(body, list):
+            out.append(f'{prelude}{{{serialize_css(body)}}}')
+        else:
+            out.append(f'{prelude}{{{minify_declarations(body)}}}')
+    return ''.join(out)
+
+
+def _selector_matches(selector, used):
+    if selector in BASE_SELECTORS:
+        return True
+    selector = ATTRIBUTE_RE.sub('', PSEUDO_RE.sub('', selector))
+    for token in IDENT_RE.findall(selector):
+        if token not in used:
+            return False
+    return True
+
+
+def critical_rules(rules, used):
+    """The rules of `rules` whose selectors can match the `used` tags/.classes/#ids."""
+    kept = []
+    for prelude, body in rules:
+        if prelude.startswith('@keyframes') or prelude.startswith('@font-face'):
+            kept.append((prelude, body))
+        elif prelude.startswith('@media'):
+            nested = critical_rules(body, used)
+            if nested:
+                kept.append((prelude, nested))
+        elif any(_selector_matches(s.strip(), used) for s in prelude.split(',')):
+            kept.append((prelude, body))
+
+    # Drop keyframes no kept rule animates with
+    declarations = serialize_css([rule for rule in kept if not rule[0].startswith('@keyframes')])
+    return [
+        (prelude, body) for prelude, body in kept
+        if not prelude.startswith('@keyframes') or prelude.split()[1] in declarations
+    ]
+
+
+class FoldParser(HTMLParser):
+    """Collect the tags, classes and ids of a page up to its Nth </section>."""
+
+    def __init__(self, sections):
+        super().__init__()
+        self.sections = sections
+        self.used = set()
+
+    def handle_starttag(self, tag, attrs):
+        if self.sections <= 0:
+            return
+        self.used.add(tag)
+        for name, value in attrs:
+            if name == 'class' and value:
+                self.used.update(f'.{cls}' for cls in value.split())
+            elif name == 'id' and value:
+                self.used.add(f'#{value}')
+            elif name in (':class', 'x-bind:class') and value:
+                # Alpine toggles these, e.g. :class="{ 'nav-scrolled': scrolled }"
+                self.used.update(f'.{cls}' for cls in QUOTED_CLASS_RE.findall(value))
+
+    def handle_endtag(self, tag):
+        if tag == 'section':
+            self.sections -= 1
+
+
+def used_above_fold(html, sections):
+    parser = FoldParser(sections)
+    parser.feed(html)
+    return parser.used
+
+
+# JS
+
+def minify_js(source):
+    """
+    Drop comments and whitespace with rjsmin, which tokenizes strings,
+    template literals and regex literals instead of matching text across
+    them. Without it the source is bundled as is.
+    """
+    if rjsmin is None:
+        return source if source.endswith('\n') else source + '\n'
+    return rjsmin.jsmin(source) + '\n'
+
+
+# Build
+
+def _find(path):
+    found = finders.find(path)
+    if not found:
+        raise AssetBuildError(f'Static file not found: {path}')
+    return Path(found)
+
+
+def _sizes(content):
+    data = content.encode() if isinstance(content, str) else content
+    return {'bytes': len(data), 'gzip': len(gzip.compress(data, 9))}
+
+
+def build(output_dir=None):
+    """Write the critical CSS, minified stylesheet and JS bundle; returns a size report."""
+    output_dir = Path(output_dir or settings.ASSET_BUILD_DIR)
+    (output_dir / 'critical').mkdir(parents=True, exist_ok=True)
+
+    source_css = _find(STYLESHEET).read_text()
+    rules = parse_css(source_css)
+    site_css = serialize_css(rules)
+    (output_dir / SITE_CSS_NAME).write_text(site_css)
+
+    report = {'stylesheet': _sizes(source_css), 'site_css': _sizes(site_css), 'critical': {}}
+    for page, (url_path, sections) in _critical_pages().items():
+        status, body = render(url_path)
+        if status != 200:
+            raise AssetBuildError(f'{url_path} rendered with status {status}')
+        used = used_above_fold(body.decode(), sections)
+        critical = serialize_css(critical_rules(rules, used))
+        (output_dir / 'critical' / f'{page}.css').write_text(critical)
+        report['critical'][page] = _sizes(critical)
+
+    sources = [_find(path).read_text() for path in JS_BUNDLE]
+    bundle = ''.join(minify_js(source) for source in sources)
+    (output_dir / BUNDLE_NAME).write_text(bundle)
+    report['js'] = _sizes(''.join(sources))
+    report['bundle'] = _sizes(bundle)
+
+    (output_dir / MANIFEST_NAME).write_text(json.dumps(report, indent=1))
+    return report
+
+
+def _static_path(name):
+    return f'{settings.ASSET_STATIC_PREFIX}/{name}'
+
+
+@lru_cache(maxsize=1)
+def built_assets():
+    """The report of the last build, or None when build_assets hasn't run."""
+    manifest = finders.find(_static_path(MANIFEST_NAME))
+    if not manifest:
+        return None
+    return json.loads(Path(manifest).read_text())
+
+
+@lru_cache(maxsize=8)
+def critical_css(page):
+    path = finders.find(_static_path(f'critical/{page}.css'))
+    return Path(path).read_text() if path else None
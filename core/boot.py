@@ -0,0 +1,159 @@
+"""
+Container start-up: only do the work a start actually needs.
+
+`manage.py boot` replaces `migrate && build_assets && collectstatic &&
+gunicorn`. It:
+
+- asks the migration executor for a plan and runs migrate only if the
+  plan isn't empty
+- hashes the static sources, templates and icon names in use and reruns
+  build_icons, build_assets and collectstatic only if the hash differs
+  from the stamp the last build left in STATIC_ROOT
+- execs gunicorn with preload_app, so Django is set up once in the
+  master; gunicorn.conf.py calls warm_up() there before forking, which
+  compiles the templates, resolves the URLconf and fills the asset
+  caches and the read model every worker then inherits. Each forked
+  worker then starts its background threads (start_background_work())
+
+Each phase's duration, and the time from boot to the first fork, are
+written to BOOT_METRICS_PATH and served as gauges at /metrics.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+from . import assets, icons, notifications, read_model, spool
+from .cache import get_content_state
+
+STAMP_NAME = '.boot-stamp'
+# Exported by the boot command so gunicorn.conf.py can time the whole start
+STARTED_AT_ENV = 'BOOT_STARTED_AT'
+
+
+def pending_migrations(database='default'):
+    """Migrations not yet applied to `database`."""
+    executor = MigrationExecutor(connections[database])
+    return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+def static_sources_hash():
+    """Digest of every input of build_icons, build_assets and collectstatic."""
+    output_dirs = {Path(settings.ASSET_BUILD_DIR).resolve(), Path(settings.ICON_OUTPUT_DIR).resolve()}
+    files = []
+    for finder in finders.get_finders():
+        for path, storage in finder.list(['CVS', '.*', '*~']):
+            full = Path(storage.path(path)).resolve()
+            # build_assets and build_icons write these, so they can't be an input
+            if not output_dirs & set(full.parents):
+                files.append((path, full))
+    files += [
+        (str(path), path)
+        for directory in settings.TEMPLATES[0]['DIRS']
+        for path in Path(directory).rglob('*.html')
+    ]
+    digest = hashlib.sha256()
+    # The icon subset also covers the icons stored in the database
+    digest.update(' '.join(sorted(icons.collect_icons())).encode() + b'\0')
+    for name, path in sorted(files):
+        digest.update(name.encode() + b'\0')
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _stamp_path():
+    return Path(settings.STATIC_ROOT) / STAMP_NAME
+
+
+def static_is_current(source_hash):
+    """Whether build_assets' and collectstatic's output exist and were built from these sources."""
+    outputs = [
+        Path(settings.ASSET_BUILD_DIR) / assets.MANIFEST_NAME,
+        Path(settings.STATIC_ROOT) / 'staticfiles.json',
+    ]
+    if not all(path.exists() for path in outputs):
+        return False
+    try:
+        return _stamp_path().read_text().strip() == source_hash
+    except FileNotFoundError:
+        return False
+
+
+def write_static_stamp(source_hash):
+    _stamp_path().write_text(source_hash + '\n')
+
+
+def warm_up():
+    """Load everything a first request would otherwise pay for; returns seconds per step."""
+    timings = {}
+
+    started = time.perf_counter()
+    resolver = get_resolver()
+    resolver.url_patterns
+    # Populating the reverse dictionary walks every included URLconf
+    resolver.reverse_dict
+    timings['urls'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        for path in Path(directory).rglob('*.html'):
+            # The cached loader keeps the compiled template for the worker
+            get_template(path.relative_to(directory).as_posix())
+    timings['templates'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for page in (assets.built_assets() or {}).get('critical', {}):
+        assets.critical_css(page)
+    timings['assets'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    # Creates the content version on a fresh cache, so the first requests
+    # don't race to create it
+    get_content_state()
+    timings['cache'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    # Forked workers start with the decoded snapshot
+    read_model.current()
+    timings['read_model'] = time.perf_counter() - started
+
+    # Nothing opened here may be shared with the forked workers
+    connections.close_all()
+    return timings
+
+
+def start_background_work():
+    """Start this worker's background threads; gunicorn calls it in every worker."""
+    if settings.INQUIRY_SPOOL_ENABLED and settings.INQUIRY_SPOOL_AUTOFLUSH:
+        # Drains what was spooled before a restart without waiting for a new submission
+        spool.start_background_flusher()
+    if settings.NOTIFICATIONS_ENABLED and settings.NOTIFICATION_AUTODELIVER:
+        # Inquiries saved before a restart still wait in the outbox
+        notifications.start_background_delivery()
+
+
+def record(phases, reset=False):
+    """Merge boot phase durations (seconds) into BOOT_METRICS_PATH."""
+    path = Path(settings.BOOT_METRICS_PATH)
+    data = {} if reset else recorded()
+    data.update({name: round(seconds, 4) for name, seconds in phases.items()})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(data, indent=1, sort_keys=True))
+    os.replace(tmp, path)
+
+
+def recorded():
+    try:
+        return json.loads(Path(settings.BOOT_METRICS_PATH).read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
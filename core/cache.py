@@ -0,0 +1,140 @@
+"""
+Rendered-page cache for anonymous visitors.
+
+Pages are stored under the current content version, which is bumped
+whenever a Project, Skill or SiteSettings row changes (see signals.py),
+so stale entries are never served again and simply expire.
+
+The pages carry no per-visitor state (the contact forms fetch their CSRF
+token when used), so anonymous responses set no cookies and are sent
+with the public ANONYMOUS_CACHE_CONTROL for browsers and shared caches.
+"""
+
+import hashlib
+import time
+import uuid
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+CONTENT_STATE_KEY = 'core:content-state'
+PAGE_KEY_PREFIX = 'core:page'
+
+
+def get_content_state():
+    """Return the (version, last_modified_timestamp) of the public content."""
+    state = cache.get(CONTENT_STATE_KEY)
+    if state is None:
+        cache.add(CONTENT_STATE_KEY, (uuid.uuid4().hex, int(time.time())), None)
+        state = cache.get(CONTENT_STATE_KEY) or (uuid.uuid4().hex, int(time.time()))
+    return state
+
+
+def invalidate_pages():
+    """Start a new content version, orphaning every cached page."""
+    cache.set(CONTENT_STATE_KEY, (uuid.uuid4().hex, int(time.time())), None)
+
+
+def is_cacheable_request(request):
+    # Checking for the session cookie instead of request.user keeps
+    # cache hits from loading the session.
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+    )
+
+
+def _page_key(version, request):
+    path = hashlib.sha256(request.get_full_path().encode()).hexdigest()
+    return f'{PAGE_KEY_PREFIX}:{version}:{path}'
+
+
+def _set_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, **settings.ANONYMOUS_CACHE_CONTROL)
+    return response
+
+
+def _cached_response(request):
+    """
+    Return (response, store) for a cacheable request: a 304 or cached page
+    if there is one, otherwise None and a callable that stores the page
+    the view renders.
+    """
+    version, last_modified = get_content_state()
+    key = _page_key(version, request)
+    etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return _set_headers(not_modified, etag, last_modified), None
+
+    cached = cache.get(key)
+    if cached is not None:
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+        return _set_headers(response, etag, last_modified), None
+
+    def store(response):
+        if response.status_code != 200:
+            return response
+        if response.streaming:
+            _cache_when_streamed(response, key)
+        else:
+            _cache_page(key, response.content, response['Content-Type'])
+        return _set_headers(response, etag, last_modified)
+
+    return None, store
+
+
+def _cache_page(key, content, content_type):
+    cache.set(key, (content, content_type), settings.PAGE_CACHE_TIMEOUT)
+
+
+def _cache_when_streamed(response, key):
+    """Pass a streaming response's chunks through and cache the page once the last one is sent."""
+    chunks = []
+    content_type = response['Content-Type']
+    source = response.streaming_content
+    if response.is_async:
+        async def tee():
+            async for chunk in source:
+                chunks.append(chunk)
+                yield chunk
+            await sync_to_async(_cache_page)(key, b''.join(chunks), content_type)
+    else:
+        def tee():
+            for chunk in source:
+                chunks.append(chunk)
+                yield chunk
+            _cache_page(key, b''.join(chunks), content_type)
+    response.streaming_content = tee()
+
+
+def cache_anonymous_page(view_func):
+    """Serve anonymous GETs from the page cache, answering 304 when possible."""
+    if iscoroutinefunction(view_func):
+        async def _wrapped_view(request, *args, **kwargs):
+            if not is_cacheable_request(request):
+                return await view_func(request, *args, **kwargs)
+            # The file cache does blocking I/O, so it runs off the event loop
+            response, store = await sync_to_async(_cached_response)(request)
+            if response is not None:
+                return response
+            return await sync_to_async(store)(await view_func(request, *args, **kwargs))
+    else:
+        def _wrapped_view(request, *args, **kwargs):
+            if not is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+            response, store = _cached_response(request)
+            if response is not None:
+                return response
+            return store(view_func(request, *args, **kwargs))
+
+    return wraps(view_func)(_wrapped_view)
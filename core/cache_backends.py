@@ -0,0 +1,437 @@
+"""
+A Django cache backend in a shared SQLite file.
+
+Every gunicorn worker opens the same file (LOCATION), so they share one
+set of entries and invalidations, which survive restarts, without an
+external service. Compared with FileBasedCache:
+
+- it's bounded. Writes that take it past MAX_BYTES or MAX_ENTRIES drop
+  expired entries first, then the least recently used, down to 90% of
+  the bound. Triggers keep the entry count and byte total in a one-row
+  table, so checking the bound doesn't scan anything. A hit moves an
+  entry up at most every ACCESS_RESOLUTION seconds, so hot keys cost a
+  read, not a write, per request.
+- get_or_set() is single-flight. A miss takes a per-key lock, shared by
+  threads and processes: a byte-range lock on LOCATION + '.lock',
+  striped over LOCK_STRIPES. Concurrent misses for the same key wait
+  and reuse the first caller's value instead of all computing it.
+- it counts hits, misses, coalesced misses (answered by another
+  caller's get_or_set), sets, expirations and evictions. Reads count in
+  memory and are merged into the file at most every
+  STATS_FLUSH_INTERVAL seconds. stats() reports them for all workers,
+  and /metrics exports them.
+
+    CACHES = {'default': {
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': VAR_DIR / 'cache.sqlite3',
+        'OPTIONS': {'MAX_BYTES': 256 * 1024 * 1024, 'MAX_ENTRIES': 100_000},
+    }}
+"""
+
+import atexit
+import fcntl
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Eviction frees down to this share of the bound, so it doesn't run on every write
+LOW_WATER = 0.9
+ACCESS_RESOLUTION = 1.0
+LOCK_STRIPES = 1024
+STATS_FLUSH_INTERVAL = 5.0
+# Counters, in the order stats() reports them
+COUNTERS = ['hits', 'misses', 'coalesced', 'sets', 'expired', 'evictions']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entry (
+    key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, accessed REAL NOT NULL, size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entry_accessed ON entry (accessed);
+CREATE INDEX IF NOT EXISTS entry_expires ON entry (expires) WHERE expires IS NOT NULL;
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY CHECK (id = 1), entries INTEGER NOT NULL, bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO usage (id, entries, bytes) VALUES (1, 0, 0);
+CREATE TRIGGER IF NOT EXISTS entry_inserted AFTER INSERT ON entry BEGIN
+    UPDATE usage SET entries = entries + 1, bytes = bytes + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS entry_deleted AFTER DELETE ON entry BEGIN
+    UPDATE usage SET entries = entries - 1, bytes = bytes - old.size;
+END;
+CREATE TRIGGER IF NOT EXISTS entry_resized AFTER UPDATE OF size ON entry BEGIN
+    UPDATE usage SET bytes = bytes - old.size + new.size;
+END;
+CREATE TABLE IF NOT EXISTS counter (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+UPSERT = (
+    'INSERT INTO entry (key, value, expires, accessed, size) VALUES (?, ?, ?, ?, ?) '
+    'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires, '
+    'accessed = excluded.accessed, size = excluded.size'
+)
+
+
+def _add_counts(connection, counts):
+    connection.executemany(
+        'INSERT INTO counter (name, value) VALUES (?, ?) '
+        'ON CONFLICT (name) DO UPDATE SET value = value + excluded.value',
+        [(name, value) for name, value in counts.items() if value],
+    )
+
+
+class _ProcessState:
+    """What the cache instances of one process share for a file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self.thread_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self.held = threading.local()
+        self.lock_fd = None
+        self.counts = Counter()
+        self.counts_lock = threading.Lock()
+        self.last_flush = time.monotonic()
+
+    def count(self, name, value=1):
+        with self.counts_lock:
+            self.counts[name] += value
+
+    def take_counts(self):
+        with self.counts_lock:
+            counts, self.counts = self.counts, Counter()
+            self.last_flush = time.monotonic()
+        return counts
+
+    def restore_counts(self, counts):
+        with self.counts_lock:
+            self.counts.update(counts)
+
+    def flush_due(self):
+        return time.monotonic() - self.last_flush >= STATS_FLUSH_INTERVAL
+
+    def flush_at_exit(self):
+        if os.getpid() != self.pid or not self.counts:
+            return
+        try:
+            with sqlite3.connect(self.path, timeout=1.0) as connection:
+                _add_counts(connection, self.take_counts())
+        except sqlite3.Error:
+            pass
+
+
+_states = {}
+_states_lock = threading.Lock()
+
+
+def _process_state(path):
+    # Keyed by pid too: a forked worker starts with its own locks and counts
+    key = (os.getpid(), path)
+    with _states_lock:
+        state = _states.get(key)
+        if state is None:
+            state = _states[key] = _ProcessState(path)
+            atexit.register(state.flush_at_exit)
+    return state
+
+
+class SQLiteCache(BaseCache):
+    """Size-bounded LRU cache in a SQLite file shared by every worker."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.path = Path(location)
+        self.max_bytes = int(options.get('MAX_BYTES', DEFAULT_MAX_BYTES))
+        self.busy_timeout = float(options.get('BUSY_TIMEOUT', 5.0))
+        self._local = threading.local()
+
+    @property
+    def _state(self):
+        state = getattr(self._local, 'state', None)
+        if state is None or state.pid != os.getpid():
+            state = self._local.state = _process_state(str(self.path))
+        return state
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            # Never reuse a connection a forked worker inherited
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+            state = self._state
+            if state.flush_due():
+                # Writing anyway, so merge this worker's read counts too
+                _add_counts(connection, state.take_counts())
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def _count(self, name, value=1):
+        state = self._state
+        state.count(name, value)
+        if state.flush_due():
+            self.flush_stats()
+
+    def flush_stats(self):
+        """Merge this worker's read counts into the shared file."""
+        state = self._state
+        counts = state.take_counts()
+        if not counts:
+            return
+        try:
+            with self._transaction() as connection:
+                _add_counts(connection, counts)
+        except sqlite3.OperationalError:
+            # Keep them for the next flush rather than lose them
+            state.restore_counts(counts)
+
+    # Reads
+
+    def _fetch(self, key, now):
+        """The live value under a validated key, or self._missing_key."""
+        row = self.connection.execute(
+            'SELECT value, expires, accessed FROM entry WHERE key = ?', [key],
+        ).fetchone()
+        if row is None:
+            return self._missing_key
+        value, expires, accessed = row
+        if expires is not None and expires <= now:
+            return self._missing_key
+        if now - accessed >= ACCESS_RESOLUTION:
+            try:
+                self.connection.execute('UPDATE entry SET accessed = ? WHERE key = ?', [now, key])
+            except sqlite3.OperationalError:
+                # Only the eviction order suffers
+                pass
+        return pickle.loads(value)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value = self._fetch(key, time.time())
+        if value is self._missing_key:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        now = time.time()
+        found = {}
+        stale = []
+        names = list(keys)
+        for start in range(0, len(names), 500):
+            chunk = names[start:start + 500]
+            rows = self.connection.execute(
+                f'SELECT key, value, expires, accessed FROM entry WHERE key IN ({", ".join("?" * len(chunk))})',
+                chunk,
+            )
+            for key, value, expires, accessed in rows:
+                if expires is None or expires > now:
+                    found[keys[key]] = pickle.loads(value)
+                    if now - accessed >= ACCESS_RESOLUTION:
+                        stale.append(key)
+        if stale:
+            try:
+                self.connection.executemany('UPDATE entry SET accessed = ? WHERE key = ?', [(now, key) for key in stale])
+            except sqlite3.OperationalError:
+                pass
+        self._count('hits', len(found))
+        self._count('misses', len(keys) - len(found))
+        return found
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self.connection.execute(
+            'SELECT 1 FROM entry WHERE key = ? AND (expires IS NULL OR expires > ?)', [key, time.time()],
+        ).fetchone() is not None
+
+    # Writes
+
+    def _row(self, key, value, timeout, now):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        return key, data, self.get_backend_timeout(timeout), now, len(key) + len(data)
+
+    def _evict(self, connection, now):
+        entries, size = connection.execute('SELECT entries, bytes FROM usage').fetchone()
+        if entries <= self._max_entries and size <= self.max_bytes:
+            return
+        counts = Counter()
+        counts['expired'] = connection.execute(
+            'DELETE FROM entry WHERE expires <= ?', [now],
+        ).rowcount
+        entries, size = connection.execute('SELECT entries, bytes FROM usage').fetchone()
+        excess_entries = entries - int(self._max_entries * LOW_WATER)
+        excess_bytes = size - int(self.max_bytes * LOW_WATER)
+        victims, freed = [], 0
+        if entries > self._max_entries or size > self.max_bytes:
+            for key, entry_size in connection.execute('SELECT key, size FROM entry ORDER BY accessed'):
+                if len(victims) >= excess_entries and freed >= excess_bytes:
+                    break
+                victims.append((key,))
+                freed += entry_size
+            connection.executemany('DELETE FROM entry WHERE key = ?', victims)
+        counts['evictions'] = len(victims)
+        _add_counts(connection, counts)
+
+    def _store(self, rows, only_if_missing=False):
+        """Write (key, data, expires, accessed, size) rows; returns how many were stored."""
+        now = time.time()
+        stored = 0
+        with self._transaction() as connection:
+            for row in rows:
+                if row[4] > self.max_bytes:
+                    # Too big to ever fit; drop any older value instead
+                    connection.execute('DELETE FROM entry WHERE key = ?', [row[0]])
+                    continue
+                if only_if_missing:
+                    stored += connection.execute(
+                        UPSERT + ' WHERE entry.expires IS NOT NULL AND entry.expires <= ?', [*row, now],
+                    ).rowcount
+                else:
+                    stored += connection.execute(UPSERT, row).rowcount
+            if stored:
+                self._evict(connection, now)
+                _add_counts(connection, {'sets': stored})
+        return stored
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._store([self._row(key, value, timeout, time.time())], only_if_missing=True) == 1
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._store([self._row(key, value, timeout, time.time())])
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        self._store([
+            self._row(self.make_and_validate_key(key, version=version), value, timeout, now)
+            for key, value in data.items()
+        ])
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self.connection.execute(
+            'UPDATE entry SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            [self.get_backend_timeout(timeout), key, time.time()],
+        ).rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._transaction() as connection:
+            value = self._fetch(key, time.time())
+            if value is self._missing_key:
+                raise ValueError(f"Key '{key}' not found")
+            value += delta
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            connection.execute(
+                'UPDATE entry SET value = ?, size = ? WHERE key = ?', [data, len(key) + len(data), key],
+            )
+        return value
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self.connection.execute('DELETE FROM entry WHERE key = ?', [key]).rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        with self._transaction() as connection:
+            connection.executemany(
+                'DELETE FROM entry WHERE key = ?',
+                [(self.make_and_validate_key(key, version=version),) for key in keys],
+            )
+
+    def clear(self):
+        self.connection.execute('DELETE FROM entry')
+
+    # Single flight
+
+    @contextmanager
+    def lock(self, key, version=None):
+        """Hold `key`'s lock, shared by every thread and worker using this file."""
+        key = self.make_and_validate_key(key, version=version)
+        state = self._state
+        stripe = zlib.crc32(key.encode()) % LOCK_STRIPES
+        held = getattr(state.held, 'stripes', None)
+        if held is None:
+            held = state.held.stripes = set()
+        if stripe in held:
+            # A get_or_set() inside another one's callable, on the same stripe
+            yield
+            return
+        with state.thread_locks[stripe]:
+            if state.lock_fd is None:
+                state.lock_fd = os.open(f'{self.path}.lock', os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.lockf(state.lock_fd, fcntl.LOCK_EX, 1, stripe)
+            held.add(stripe)
+            try:
+                yield
+            finally:
+                held.discard(stripe)
+                fcntl.lockf(state.lock_fd, fcntl.LOCK_UN, 1, stripe)
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """get(), or on a miss compute `default` once for all concurrent callers and store it."""
+        value = self.get(key, self._missing_key, version=version)
+        if value is not self._missing_key:
+            return value
+        with self.lock(key, version=version):
+            # Whoever held the lock before us may have stored it
+            value = self._fetch(self.make_and_validate_key(key, version=version), time.time())
+            if value is not self._missing_key:
+                self._count('coalesced')
+                return value
+            value = default() if callable(default) else default
+            self.set(key, value, timeout=timeout, version=version)
+        return value
+
+    async def aget_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        # In a worker thread, so waiting for the lock doesn't block the event loop
+        return await sync_to_async(self.get_or_set, thread_sensitive=False)(key, default, timeout, version)
+
+    # Statistics
+
+    def stats(self):
+        """Counters for every worker, plus the current size and bounds."""
+        self.flush_stats()
+        connection = self.connection
+        counters = dict.fromkeys(COUNTERS, 0)
+        counters.update(connection.execute('SELECT name, value FROM counter'))
+        entries, size = connection.execute('SELECT entries, bytes FROM usage').fetchone()
+        return {
+            **counters,
+            'entries': entries,
+            'bytes': size,
+            'max_entries': self._max_entries,
+            'max_bytes': self.max_bytes,
+        }
+
+    def reset_stats(self):
+        self._state.take_counts()
+        self.connection.execute('DELETE FROM counter')
@@ -0,0 +1,191 @@
+"""
+Bulk import and export of the portfolio content: SiteSettings, Skill and
+Project.
+
+The format is NDJSON, one record per line in the shape of Django's
+serializers without the pk:
+
+    {"model": "core.project", "fields": {"slug": "egy360", "title": "Egy360", ...}}
+
+Records are matched to existing rows by a natural key (Project.slug,
+Skill.name, the SiteSettings singleton). Optional fields a record leaves
+out keep their current value on a match and their default on a new row.
+
+Exports stream each table through a chunked iterator. Imports parse the
+input line by line and write batches with bulk_create(update_conflicts),
+all in one transaction. Memory stays bounded by the batch size, and a
+bad record rolls the whole import back. bulk_create skips save() and the
+signals, so import_records() refreshes what those would have updated:
+the technology links per batch, then the technology counts, the
+related-projects index and the page caches. The search index is kept current by its triggers.
+"""
+
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.text import slugify
+
+from . import related, technologies
+from .models import Project, SiteSettings, Skill
+
+# label -> (model, natural key field)
+MODELS = {
+    'core.sitesettings': (SiteSettings, 'id'),
+    'core.skill': (Skill, 'name'),
+    'core.project': (Project, 'slug'),
+}
+BATCH_SIZE = 1000
+# What the seed_data view loads
+SEED_FIXTURE = Path(__file__).resolve().parent / 'fixtures' / 'seed.ndjson'
+
+
+class ContentError(ValueError):
+    """An input record that can't be imported."""
+
+    def __init__(self, line, message):
+        super().__init__(f'line {line}: {message}')
+        self.line = line
+
+
+class ImportResult:
+    def __init__(self):
+        self.counts = defaultdict(int)
+        # Technologies whose project_count changed
+        self.technologies = set()
+        self.related_entries = None
+
+    def __str__(self):
+        return ', '.join(f'{count} {label}' for label, count in self.counts.items()) or 'nothing'
+
+
+def content_fields(model):
+    """Names of the fields a record carries: editable, concrete and not the pk."""
+    return [
+        field.name for field in model._meta.concrete_fields
+        if field.editable and not field.primary_key
+    ]
+
+
+def _auto_now_fields(model):
+    return [field.name for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)]
+
+
+def export_records(labels=None, chunk_size=BATCH_SIZE):
+    """Yield (label, fields) for every row of the given models, in pk order."""
+    for label in labels or MODELS:
+        model, _ = MODELS[label]
+        rows = model.objects.order_by('pk').values(*content_fields(model)).iterator(chunk_size=chunk_size)
+        for fields in rows:
+            yield label, fields
+
+
+def dumps(label, fields):
+    return json.dumps({'model': label, 'fields': fields}, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def parse_lines(lines):
+    """Yield (line number, label, fields) from NDJSON lines; blank lines are skipped."""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            label, fields = record['model'].lower(), record['fields']
+        except (ValueError, KeyError, TypeError, AttributeError):
+            raise ContentError(number, 'not a {"model": ..., "fields": {...}} record')
+        if label not in MODELS:
+            raise ContentError(number, f'unknown model {record["model"]!r}; expected one of {", ".join(MODELS)}')
+        if not isinstance(fields, dict):
+            raise ContentError(number, '"fields" must be an object')
+        yield number, label, fields
+
+
+def _build(number, label, fields):
+    model, key = MODELS[label]
+    unknown = set(fields) - set(content_fields(model))
+    if unknown:
+        raise ContentError(number, f'unknown {label} fields: {", ".join(sorted(unknown))}')
+    instance = model(**fields)
+    if model is Project and not instance.slug:
+        # What Project.save() would do
+        instance.slug = slugify(instance.title)
+    # Left out with a default: a new row gets the default (features=[], say,
+    # which blank=False would refuse) and a matched row keeps its value
+    omitted = [
+        field.name for field in model._meta.concrete_fields
+        if field.name not in fields and field.has_default()
+    ]
+    try:
+        # Uniqueness is what the upsert resolves, so it isn't an error here
+        instance.clean_fields(exclude=[key, *omitted])
+    except ValidationError as exc:
+        raise ContentError(number, '; '.join(f'{name}: {" ".join(errors)}' for name, errors in exc.message_dict.items()))
+    return instance
+
+
+def _write(label, pending, result):
+    """Upsert one batch of {natural key: (fields given, instance)}."""
+    model, key = MODELS[label]
+    groups = defaultdict(list)
+    # One statement per set of fields given, so an update only overwrites those
+    for given, instance in pending.values():
+        groups[given].append(instance)
+    for given, instances in groups.items():
+        update_fields = [*sorted(set(given) - {key}), *_auto_now_fields(model)]
+        if update_fields:
+            model.objects.bulk_create(
+                instances, update_conflicts=True, unique_fields=[key], update_fields=update_fields,
+            )
+        else:
+            # Nothing but the key: create the row if it's missing
+            model.objects.bulk_create(instances, ignore_conflicts=True)
+    if model is Project:
+        result.technologies |= technologies.link_projects(
+            Project.objects.filter(slug__in=list(pending)).values_list('pk', 'tech_stack')
+        )
+
+
+def import_records(records, batch_size=BATCH_SIZE, rebuild_related=True):
+    """
+    Upsert (line number, label, fields) records; returns an ImportResult.
+
+    Raises ContentError (and rolls back) on the first invalid record.
+    """
+    from .signals import publish_content
+
+    result = ImportResult()
+    pending = defaultdict(dict)
+    singleton_pk = SiteSettings.objects.values_list('pk', flat=True).first() or 1
+
+    with transaction.atomic():
+        for number, label, fields in records:
+            instance = _build(number, label, fields)
+            model, key = MODELS[label]
+            if model is SiteSettings:
+                instance.pk = singleton_pk
+            # A later record for the same key replaces an earlier one in the
+            # batch: one INSERT can't update the same row twice everywhere
+            pending[label][getattr(instance, key)] = (frozenset(fields), instance)
+            result.counts[label] += 1
+            if len(pending[label]) >= batch_size:
+                _write(label, pending.pop(label), result)
+        # Settings and skills before projects, as in an export
+        for label in MODELS:
+            if pending.get(label):
+                _write(label, pending.pop(label), result)
+
+        # Once, rather than per batch: a popular technology's count reads all its links
+        technologies.recount(result.technologies)
+        if rebuild_related and result.counts['core.project']:
+            result.related_entries = related.rebuild_all()
+        transaction.on_commit(publish_content)
+    return result
+
+
+def import_file(path, **kwargs):
+    with open(path, encoding='utf-8') as handle:
+        return import_records(parse_lines(handle), **kwargs)
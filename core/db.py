@@ -0,0 +1,24 @@
+"""
+SQLite connection tuning.
+
+The pragmas of the active SQLITE_PROFILE (see settings.py) are applied to
+every new connection through the connection_created signal.
+"""
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def pragma_statements(pragmas):
+    return [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+
+@receiver(connection_created, dispatch_uid='apply_sqlite_profile')
+def apply_sqlite_profile(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = settings.SQLITE_PROFILES[settings.SQLITE_PROFILE]['PRAGMAS']
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(pragmas):
+            cursor.execute(statement)
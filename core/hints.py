@@ -0,0 +1,165 @@
+"""
+Resource hints for pages built on base.html.
+
+The <head> of base.html is rendered once per process and parsed for the
+stylesheets, scripts and third-party origins a browser needs first, with
+static URLs already resolved through the manifest. For HTML requests,
+EarlyHintsMiddleware:
+
+- sends them as a 103 Early Hints response where the server offers one
+  (gunicorn's wsgi.early_hints, or the ASGI http.response.early_hint
+  extension through EarlyHintsASGIMiddleware)
+- adds them as a Link header on the final response, which proxies such
+  as Cloudflare also turn into 103s
+
+With EARLY_FLUSH_ENABLED, render_page() also streams the context-free
+part of the <head> (partials/head_start.html) before the view's template
+renders, so the browser starts those fetches during the render.
+"""
+
+from functools import lru_cache
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.template.loader import render_to_string
+
+HEAD_START_TEMPLATE = 'partials/head_start.html'
+HTML_CONTENT_TYPE = 'text/html; charset=utf-8'
+
+
+class HeadParser(HTMLParser):
+    """Collects (url, rel, as, crossorigin) hints from a document's <head>."""
+
+    def __init__(self):
+        super().__init__()
+        self.hints = []
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        attrs = dict(attrs)
+        crossorigin = 'crossorigin' in attrs
+        if tag == 'link' and attrs.get('href'):
+            rel = attrs.get('rel', '')
+            if rel == 'preconnect':
+                self.hints.append((attrs['href'], 'preconnect', None, crossorigin))
+            elif rel == 'stylesheet' or (rel == 'preload' and attrs.get('as') == 'style'):
+                self.hints.append((attrs['href'], 'preload', 'style', crossorigin))
+        elif tag == 'script' and attrs.get('src'):
+            self.hints.append((attrs['src'], 'preload', 'script', crossorigin))
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.done = True
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f'{parts.scheme}://{parts.netloc}' if parts.netloc else None
+
+
+@lru_cache(maxsize=1)
+def resource_hints():
+    """base.html's head hints, plus a preconnect for every other origin they load from."""
+    parser = HeadParser()
+    parser.feed(render_to_string('base.html', {}))
+    hints = list(dict.fromkeys(parser.hints))
+    connected = {_origin(url) for url, rel, _, _ in hints if rel == 'preconnect'}
+    for url, rel, _, _ in list(hints):
+        origin = _origin(url)
+        if origin and origin not in connected:
+            connected.add(origin)
+            hints.insert(0, (origin, 'preconnect', None, False))
+    return hints
+
+
+def _link(url, rel, as_, crossorigin):
+    # Left as written: a preload only counts if its URL matches the
+    # element's exactly, and RFC 8288 allows ; and , inside <...>
+    value = f'<{url}>; rel={rel}'
+    if as_:
+        value += f'; as={as_}'
+    if crossorigin:
+        value += '; crossorigin'
+    return value
+
+
+@lru_cache(maxsize=1)
+def link_values():
+    return [_link(*hint) for hint in resource_hints()]
+
+
+def wants_hints(method, path, accept):
+    """Whether a request is a page navigation that renders base.html."""
+    return (
+        method == 'GET'
+        and 'text/html' in accept
+        and not path.startswith(settings.STATIC_URL)
+        and not any(path.startswith(prefix) for prefix in settings.EARLY_HINTS_EXCLUDED_PATHS)
+    )
+
+
+def add_link_header(response):
+    if (
+        response.status_code == 200
+        and response.get('Content-Type', '').startswith('text/html')
+        and not response.has_header('Link')
+    ):
+        response['Link'] = ', '.join(link_values())
+    return response
+
+
+class EarlyHintsASGIMiddleware:
+    """Sends the hints as 103 Early Hints to ASGI servers that support it."""
+
+    def __init__(self, app):
+        self.app = app
+        self.links = None
+
+    async def __call__(self, scope, receive, send):
+        if (
+            settings.EARLY_HINTS_ENABLED
+            and scope['type'] == 'http'
+            and 'http.response.early_hint' in scope.get('extensions', {})
+        ):
+            accept = next((value for name, value in scope['headers'] if name == b'accept'), b'').decode('latin-1')
+            if wants_hints(scope['method'], scope['path'], accept):
+                if self.links is None:
+                    # The first call renders base.html
+                    self.links = [value.encode() for value in await sync_to_async(link_values)()]
+                await send({'type': 'http.response.early_hint', 'links': self.links})
+        await self.app(scope, receive, send)
+
+
+def _head_start(request):
+    return render_to_string(HEAD_START_TEMPLATE, request=request)
+
+
+def render_page(request, template_name, context):
+    """render(), or with EARLY_FLUSH_ENABLED a response that streams the <head> first."""
+    if not settings.EARLY_FLUSH_ENABLED:
+        return render(request, template_name, context)
+
+    def chunks():
+        yield _head_start(request)
+        yield render_to_string(template_name, {**context, 'head_flushed': True}, request=request)
+
+    return StreamingHttpResponse(chunks(), content_type=HTML_CONTENT_TYPE)
+
+
+async def arender_page(request, template_name, context):
+    """Async version of render_page()."""
+    if not settings.EARLY_FLUSH_ENABLED:
+        # Template tags may do blocking I/O (image dimensions), so render in a thread
+        return await sync_to_async(render)(request, template_name, context)
+
+    async def chunks():
+        yield await sync_to_async(_head_start)(request)
+        yield await sync_to_async(render_to_string)(template_name, {**context, 'head_flushed': True}, request=request)
+
+    return StreamingHttpResponse(chunks(), content_type=HTML_CONTENT_TYPE)
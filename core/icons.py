@@ -0,0 +1,170 @@
+"""
+Font Awesome subsetting.
+
+The site uses a few dozen icons out of several thousand. `manage.py
+build_icons`, which boot runs with the other static builds, collects the
+fa-* classes used by the templates and the database (Skill.icon), looks
+their codepoints up in Font Awesome Free (the fontawesomefree package,
+or FONT_AWESOME_SOURCE_DIR) and writes subset webfonts plus a minimal
+stylesheet to ICON_OUTPUT_DIR.
+"""
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+try:
+    from fontTools import subset as font_subset
+except ImportError:
+    font_subset = None
+
+try:
+    import fontawesomefree
+except ImportError:
+    fontawesomefree = None
+
+ICON_CLASS_RE = re.compile(r'\bfa-[a-z0-9]+(?:-[a-z0-9]+)*\b')
+
+# Classes that style an icon rather than name one
+STYLE_CLASSES = {
+    'fa-solid', 'fa-regular', 'fa-brands', 'fa-spin', 'fa-pulse', 'fa-fw',
+    'fa-xs', 'fa-sm', 'fa-lg', 'fa-xl', 'fa-2x', 'fa-3x',
+}
+
+# Icon rules in all.css: ".fa-x::before { content: "\f00d"; }" in 6.0-6.5,
+# ".fa-x { --fa: "\f00d"; }" from 6.6 on
+GLYPH_RULE_RE = re.compile(
+    r'((?:\.fa-[a-z0-9-]+(?:::?before)?\s*,\s*)*\.fa-[a-z0-9-]+(?:::?before)?)\s*'
+    r'\{\s*(?:content|--fa)\s*:\s*"\\?([0-9a-fA-F]+)"'
+)
+
+# (webfont name, font family, font weight, classes that select it)
+FONTS = [
+    ('fa-solid-900', 'Font Awesome 6 Free', 900, ['.fa', '.fas', '.fa-solid']),
+    ('fa-regular-400', 'Font Awesome 6 Free', 400, ['.far', '.fa-regular']),
+    ('fa-brands-400', 'Font Awesome 6 Brands', 400, ['.fab', '.fa-brands']),
+]
+
+BASE_CSS = """\
+.fa,.fas,.fa-solid,.far,.fa-regular,.fab,.fa-brands{-moz-osx-font-smoothing:grayscale;\
+-webkit-font-smoothing:antialiased;display:inline-block;font-style:normal;font-variant:normal;\
+line-height:1;text-rendering:auto}
+.fa-fw{text-align:center;width:1.25em}
+.fa-spin{animation:fa-spin 2s infinite linear}
+@keyframes fa-spin{0%{transform:rotate(0deg)}to{transform:rotate(360deg)}}
+"""
+
+MANIFEST_NAME = 'icons.json'
+STYLESHEET_NAME = 'icons.css'
+
+
+class IconBuildError(Exception):
+    pass
+
+
+def collect_icons():
+    """Every fa-* icon name used by the templates or stored in the database."""
+    from .models import SiteSettings, Skill
+
+    found = set()
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        for path in Path(directory).rglob('*.html'):
+            found.update(ICON_CLASS_RE.findall(path.read_text()))
+    for icon in Skill.objects.values_list('icon', flat=True):
+        found.update(ICON_CLASS_RE.findall(icon))
+    for values in SiteSettings.objects.values_list():
+        for value in values:
+            if isinstance(value, str):
+                found.update(ICON_CLASS_RE.findall(value))
+    return found - STYLE_CLASSES
+
+
+def parse_codepoints(css):
+    """Map icon names to codepoints from Font Awesome's all.css."""
+    codepoints = {}
+    for selectors, codepoint in GLYPH_RULE_RE.findall(css):
+        for selector in selectors.split(','):
+            name = selector.strip().lstrip('.').split(':')[0]
+            codepoints.setdefault(name, int(codepoint, 16))
+    return codepoints
+
+
+def source_dir():
+    """FONT_AWESOME_SOURCE_DIR, or else the web sources in the fontawesomefree package."""
+    if settings.FONT_AWESOME_SOURCE_DIR:
+        return Path(settings.FONT_AWESOME_SOURCE_DIR)
+    if fontawesomefree is not None:
+        return Path(fontawesomefree.__file__).resolve().parent / 'static' / 'fontawesomefree'
+    return None
+
+
+def build(source_dir, output_dir):
+    """Write the subset fonts and stylesheet; returns (icons, missing)."""
+    if font_subset is None:
+        raise IconBuildError('fontTools is required: pip install fonttools brotli')
+    if source_dir is None:
+        raise IconBuildError('No Font Awesome sources: pip install fontawesomefree, or set FONT_AWESOME_SOURCE_DIR')
+    source_dir, output_dir = Path(source_dir), Path(output_dir)
+    css_path = source_dir / 'css' / 'all.css'
+    if not css_path.exists():
+        raise IconBuildError(
+            f'No Font Awesome sources in {source_dir}; extract fontawesome-free-*-web there'
+        )
+
+    codepoints = parse_codepoints(css_path.read_text())
+    wanted = collect_icons()
+    icons = {name: codepoints[name] for name in sorted(wanted) if name in codepoints}
+    missing = sorted(wanted - icons.keys())
+
+    try:
+        import brotli  # noqa: F401
+        flavor, extension = 'woff2', 'woff2'
+    except ImportError:
+        flavor, extension = 'woff', 'woff'
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    css = [BASE_CSS]
+    for font_name, family, weight, classes in FONTS:
+        font_path = source_dir / 'webfonts' / f'{font_name}.ttf'
+        if not font_path.exists():
+            continue
+        options = font_subset.Options()
+        options.flavor = flavor
+        options.layout_features = []
+        font = font_subset.load_font(str(font_path), options)
+        subsetter = font_subset.Subsetter(options)
+        subsetter.populate(unicodes=list(icons.values()))
+        subsetter.subset(font)
+        font_subset.save_font(font, str(output_dir / f'{font_name}.{extension}'), options)
+        css.append(
+            f'@font-face{{font-family:"{family}";font-style:normal;font-weight:{weight};'
+            f'font-display:block;src:url({font_name}.{extension}) format("{flavor}")}}\n'
+            f'{",".join(classes)}{{font-family:"{family}";font-weight:{weight}}}\n'
+        )
+    for name, codepoint in icons.items():
+        css.append(f'.{name}::before{{content:"\\{codepoint:x}"}}\n')
+
+    (output_dir / STYLESHEET_NAME).write_text(''.join(css))
+    (output_dir / MANIFEST_NAME).write_text(json.dumps(sorted(icons), indent=1))
+    return icons, missing
+
+
+@lru_cache(maxsize=1)
+def subset_icons():
+    """Icons covered by the built subset, or None when it hasn't been built."""
+    manifest = finders.find(f'{settings.ICON_STATIC_PREFIX}/{MANIFEST_NAME}')
+    if not manifest:
+        return None
+    return frozenset(json.loads(Path(manifest).read_text()))
+
+
+def uncovered_icons(classes):
+    """fa-* names in `classes` that the built subset doesn't contain."""
+    covered = subset_icons()
+    if covered is None:
+        return set()
+    return set(ICON_CLASS_RE.findall(classes)) - STYLE_CLASSES - covered
@@ -0,0 +1,256 @@
+"""
+Responsive image derivatives for project thumbnails and screenshots.
+
+Source images are fetched once through IMAGE_FETCHER, then resized to each
+of IMAGE_WIDTHS and encoded as AVIF/WebP/JPEG on first request. Sources are
+never upscaled, so once a source's width is known srcsets stop at it.
+Everything lives in IMAGE_CACHE_DIR, which is trimmed back under
+IMAGE_CACHE_MAX_BYTES by evicting the least recently served files. A
+running total in IMAGE_CACHE_DIR/.size saves listing the whole directory
+on every new file; only going over the limit triggers a full pass.
+
+Derivative URLs carry the signed source URL, so the endpoint only ever
+fetches images the site itself linked to.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import urllib.request
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from .cache import invalidate_pages
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+SIGNING_SALT = 'core.images'
+SIZE_FILE = '.size'
+
+# format -> (file extension, MIME type, Pillow save options)
+FORMATS = {
+    'avif': ('avif', 'image/avif', {'quality': 60}),
+    'webp': ('webp', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+class ImageFetchError(Exception):
+    pass
+
+
+class HttpFetcher:
+    """Download source images over HTTP(S)."""
+
+    def __init__(self, timeout=10, max_bytes=20 * 1024 * 1024):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+
+    def fetch(self, url):
+        if urlparse(url).scheme not in ('http', 'https'):
+            raise ImageFetchError(f'Unsupported image URL: {url}')
+        request = urllib.request.Request(url, headers={'User-Agent': 'portfolio-image-pipeline'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                data = response.read(self.max_bytes + 1)
+        except OSError as exc:
+            raise ImageFetchError(f'Could not fetch {url}: {exc}') from exc
+        if len(data) > self.max_bytes:
+            raise ImageFetchError(f'{url} is larger than {self.max_bytes} bytes')
+        return data
+
+
+class LocalFileFetcher:
+    """Read source images from a directory by URL path, for tests and fixtures."""
+
+    def __init__(self, root):
+        self.root = Path(root).resolve()
+
+    def fetch(self, url):
+        path = (self.root / urlparse(url).path.lstrip('/')).resolve()
+        if self.root not in path.parents or not path.is_file():
+            raise ImageFetchError(f'No local image for {url}')
+        return path.read_bytes()
+
+
+def get_fetcher():
+    return import_string(settings.IMAGE_FETCHER)(**settings.IMAGE_FETCHER_OPTIONS)
+
+
+def pipeline_enabled():
+    return Image is not None and settings.IMAGE_PIPELINE_ENABLED
+
+
+def available_formats():
+    formats = ['jpeg']
+    if Image is not None:
+        if features.check('webp'):
+            formats.insert(0, 'webp')
+        if features.check('avif'):
+            formats.insert(0, 'avif')
+    return formats
+
+
+def _key(url):
+    return hashlib.sha256(url.encode()).hexdigest()[:32]
+
+
+@lru_cache(maxsize=1024)
+def _token(url):
+    # Plain Signer, not signing.dumps(): derivative URLs must stay stable
+    return signing.Signer(salt=SIGNING_SALT).sign_object(url, compress=True)
+
+
+def derivative_url(url, width, fmt):
+    return reverse('core:responsive_image', args=[_token(url), width, FORMATS[fmt][0]])
+
+
+def _widths(url):
+    """(requested, actual) widths of the derivatives worth offering for url."""
+    dimensions = source_dimensions(url)
+    widths = []
+    for width in settings.IMAGE_WIDTHS:
+        if dimensions and width >= dimensions[0]:
+            # Every wider derivative is this same, unscaled image
+            widths.append((width, dimensions[0]))
+            break
+        widths.append((width, width))
+    return widths
+
+
+def srcset(url, fmt):
+    return ', '.join(f'{derivative_url(url, width, fmt)} {actual}w' for width, actual in _widths(url))
+
+
+def source_dimensions(url):
+    """(width, height) of the source image if it has been processed already."""
+    try:
+        meta = json.loads((Path(settings.IMAGE_CACHE_DIR) / _key(url) / 'meta.json').read_text())
+        return meta['width'], meta['height']
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def unsign(token):
+    """The source URL behind a derivative token, or None if it was tampered with."""
+    try:
+        return signing.Signer(salt=SIGNING_SALT).unsign_object(token)
+    except signing.BadSignature:
+        return None
+
+
+@contextmanager
+def _locked(directory):
+    directory.mkdir(parents=True, exist_ok=True)
+    fd = os.open(directory / '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(path, write):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _source(url, directory):
+    """The source file for url, and how many bytes fetching it just added."""
+    source = directory / 'source'
+    if source.exists():
+        return source, 0
+    data = get_fetcher().fetch(url)
+    _write_atomic(source, lambda tmp: Path(tmp).write_bytes(data))
+    with Image.open(source) as image:
+        width, height = ImageOps.exif_transpose(image).size
+    (directory / 'meta.json').write_text(json.dumps({'url': url, 'width': width, 'height': height}))
+    if width < max(settings.IMAGE_WIDTHS):
+        # Pages rendered until now offer widths this source can't fill
+        invalidate_pages()
+    return source, len(data)
+
+
+def _grow(added):
+    """Count added bytes towards the cache size, evicting once it's over the limit."""
+    root = Path(settings.IMAGE_CACHE_DIR)
+    with _locked(root):
+        try:
+            total = int((root / SIZE_FILE).read_text()) + added
+        except (FileNotFoundError, ValueError):
+            # Never counted (or a pre-.size cache): evict() will
+            total = None
+        if total is not None and total <= settings.IMAGE_CACHE_MAX_BYTES:
+            (root / SIZE_FILE).write_text(str(total))
+            return
+    evict()
+
+
+def derivative(url, width, fmt):
+    """Path of `url` resized to `width` in `fmt`, generating it if needed."""
+    extension, _, options = FORMATS[fmt]
+    directory = Path(settings.IMAGE_CACHE_DIR) / _key(url)
+    target = directory / f'{width}.{extension}'
+    if target.exists():
+        os.utime(target)
+        return target
+
+    added = 0
+    with _locked(directory):
+        if not target.exists():
+            source, added = _source(url, directory)
+            with Image.open(source) as image:
+                image = ImageOps.exif_transpose(image)
+                if image.width > width:
+                    image.thumbnail((width, image.height), Image.LANCZOS)
+                if fmt == 'jpeg' and image.mode not in ('RGB', 'L'):
+                    image = image.convert('RGB')
+                _write_atomic(target, lambda tmp: image.save(tmp, format=fmt.upper(), **options))
+            added += target.stat().st_size
+    if added:
+        _grow(added)
+    return target
+
+
+def evict(max_bytes=None):
+    """Delete least recently served derivatives until the cache fits; returns its size."""
+    max_bytes = max_bytes if max_bytes is not None else settings.IMAGE_CACHE_MAX_BYTES
+    root = Path(settings.IMAGE_CACHE_DIR)
+    files = []
+    total = 0
+    for path in root.glob('*/*'):
+        if path.name in ('.lock', 'meta.json') or path.name.startswith('.tmp-'):
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+    files.sort()
+    for _, size, path in files:
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+    with _locked(root):
+        (root / SIZE_FILE).write_text(str(total))
+    return total
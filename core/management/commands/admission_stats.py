@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.admission import ADMITTED, get_store
+
+
+class Command(BaseCommand):
+    help = 'Show how many requests admission control admitted, shed or deduplicated.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters afterwards')
+
+    def handle(self, *args, **options):
+        store = get_store()
+        counters = store.counters()
+        total = sum(counters.values())
+        for name, value in counters.items():
+            share = f' ({value / total:.1%})' if total else ''
+            self.stdout.write(f'{name:<16} {value}{share}')
+        shed = total - counters[ADMITTED]
+        self.stdout.write(f'Shed or deduplicated {shed} of {total} requests')
+        if options['reset']:
+            store.reset_counters()
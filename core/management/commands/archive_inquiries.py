@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.archive import ArchiveBusy, archive, cutoff_for, eligible, vacuum
+
+
+class Command(BaseCommand):
+    help = (
+        'Move read inquiries older than the retention period out of the database '
+        'into gzipped monthly archive files (see core/archive.py).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=settings.INQUIRY_RETENTION_DAYS, metavar='DAYS',
+            help='Archive read inquiries created more than DAYS days ago',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived')
+        parser.add_argument(
+            '--vacuum', action='store_true',
+            help='VACUUM afterwards, so the database file shrinks (rewrites the whole file)',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = cutoff_for(options['older_than'])
+        if options['dry_run']:
+            self.stdout.write(f'{eligible(cutoff).count()} read inquiries created before {cutoff:%Y-%m-%d %H:%M}')
+            return
+        try:
+            result = archive(cutoff, batch_size=options['batch_size'])
+        except ArchiveBusy as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(f'Archived {result}')
+        if options['vacuum'] and result.inquiries:
+            vacuum()
+            self.stdout.write('Vacuumed the database')
@@ -0,0 +1,284 @@
+import io
+import json
+import statistics
+import tempfile
+import threading
+import time
+from http.cookies import SimpleCookie
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core import read_model
+from core.models import Project, SiteSettings, Skill
+from core.seeding import seed
+
+DEFAULT_BASELINE = settings.BASE_DIR / 'bench_baseline.json'
+
+
+class WSGIClient:
+    """Minimal WSGI caller: no test-client machinery between the bench and the app."""
+
+    def __init__(self, app, cookies=None, remote_addr='127.0.0.1'):
+        self.app = app
+        self.cookies = dict(cookies or {})
+        self.remote_addr = remote_addr
+
+    def request(self, method, path, data=None, headers=None):
+        body = urlencode(data or {}).encode() if method == 'POST' else b''
+        path, _, query = path.partition('?')
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SCRIPT_NAME': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': self.remote_addr,
+            'HTTP_HOST': 'localhost',
+            'HTTP_ACCEPT_ENCODING': 'identity',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': io.StringIO(),
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        if body:
+            environ['CONTENT_TYPE'] = 'application/x-www-form-urlencoded'
+            environ['CONTENT_LENGTH'] = str(len(body))
+        if self.cookies:
+            environ['HTTP_COOKIE'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        environ.update(headers or {})
+
+        status = {}
+
+        def start_response(status_line, response_headers, exc_info=None):
+            status['code'] = int(status_line.split()[0])
+            status['headers'] = response_headers
+
+        result = self.app(environ, start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        for name, value in status['headers']:
+            if name.lower() == 'set-cookie':
+                for key, morsel in SimpleCookie(value).items():
+                    self.cookies[key] = morsel.value
+        return status['code'], content
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(app, make_request, requests, concurrency, cached):
+    """Drive one endpoint from `concurrency` threads; returns its stats."""
+    latencies, queries, errors = [], [], []
+    lock = threading.Lock()
+    per_thread = max(1, requests // concurrency)
+
+    def worker(index):
+        # A session cookie keeps the page cache and prerendered files out
+        # of the way, so the view itself is measured
+        client = WSGIClient(app, None if cached else {settings.SESSION_COOKIE_NAME: 'bench'},
+                            remote_addr=f'10.0.{index // 250}.{index % 250 + 1}')
+        thread_latencies, thread_queries, thread_errors = [], [], 0
+        for _ in range(per_thread):
+            counter = QueryCounter()
+            started = time.perf_counter()
+            with connection.execute_wrapper(counter):
+                status, _ = make_request(client)
+            thread_latencies.append(time.perf_counter() - started)
+            thread_queries.append(counter.count)
+            if status >= 400:
+                thread_errors += 1
+        connection.close()
+        with lock:
+            latencies.extend(thread_latencies)
+            queries.extend(thread_queries)
+            errors.append(thread_errors)
+
+    threads = [threading.Thread(target=worker, args=[i]) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'throughput': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(_percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(_percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(_percentile(latencies, 0.99) * 1000, 2),
+        'queries_per_request': round(statistics.mean(queries), 2),
+    }
+
+
+def _scenarios():
+    slug = Project.objects.order_by('display_order', '-created_at', 'pk').values_list('slug', flat=True)[
+        Project.objects.count() // 2
+    ]
+    detail_path = reverse('core:project_detail', args=[slug])
+    home_path = reverse('core:home')
+    contact_path = reverse('core:contact_submit')
+    csrf_path = reverse('core:csrf_token')
+    sequence = iter(range(10 ** 9))
+
+    def contact(client):
+        if 'token' not in client.cookies:
+            _, content = client.request('GET', csrf_path)
+            client.cookies['token'] = json.loads(content)['token']
+        return client.request(
+            'POST', contact_path,
+            data={
+                'form_type': 'general', 'name': 'Bench', 'email': 'bench@example.com',
+                # Unique payloads, so admission dedupe (if enabled) stays out of it
+                'message': f'Benchmark message {next(sequence)}',
+            },
+            headers={'HTTP_X_CSRFTOKEN': client.cookies['token']},
+        )
+
+    return {
+        'home': lambda client: client.request('GET', home_path),
+        'project_detail': lambda client: client.request('GET', detail_path),
+        'contact_submit': contact,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark home, project_detail and contact_submit through the WSGI app against '
+        'temporary databases of several sizes, and compare with a stored baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,1000', help='Comma-separated row counts, e.g. 10,1000,50000')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint and size')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--cached', action='store_true', help='Let anonymous requests hit the page cache')
+        parser.add_argument('--admission', action='store_true', help='Keep admission control enabled')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Allowed p95 slowdown (fraction) before a result counts as a regression',
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        with tempfile.TemporaryDirectory(prefix='bench-') as tmp:
+            tmp = Path(tmp)
+            with override_settings(
+                CACHES={'default': {
+                    'BACKEND': 'core.cache_backends.SQLiteCache',
+                    'LOCATION': tmp / 'cache.sqlite3',
+                }},
+                INQUIRY_SPOOL_DIR=tmp / 'spool',
+                # Spooled inquiries are flushed after the response; keep that
+                # background work out of the latencies being measured
+                INQUIRY_SPOOL_AUTOFLUSH=False,
+                METRICS_DB_PATH=tmp / 'metrics.sqlite3',
+                ADMISSION_DB_PATH=tmp / 'admission.sqlite3',
+                ADMISSION_CONTROL_ENABLED=options['admission'],
+                PRERENDER_ENABLED=False,
+            ):
+                results = {size: self._bench_size(size, tmp, options) for size in sizes}
+        self._report(results, options)
+
+    def _bench_size(self, size, tmp, options):
+        settings.DATABASES['default']['TEST']['NAME'] = str(tmp / f'bench-{size}.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            seed(projects=size, inquiries=size, skills=min(size, 200), prefix='bench')
+            SiteSettings.get_settings()
+            # The cache file and this process's read model outlive the
+            # previous size's database; start from this one's content
+            cache.clear()
+            read_model.reset()
+            read_model.rebuild()
+            snapshot_skills = len(read_model.current().skills)
+            if snapshot_skills != Skill.objects.count():
+                raise CommandError(
+                    f'Read model has {snapshot_skills} skills, the {size}-row database {Skill.objects.count()}'
+                )
+            app = WSGIHandler()
+            results = {}
+            for name, make_request in _scenarios().items():
+                # One untimed pass warms templates, URL resolvers and connections
+                run_scenario(app, make_request, options['concurrency'], options['concurrency'], options['cached'])
+                results[name] = run_scenario(
+                    app, make_request, options['requests'], options['concurrency'], options['cached'],
+                )
+                self.stdout.write(f'{size:>7} {name:<15} ' + self._format(results[name]))
+            return results
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    @staticmethod
+    def _format(stats):
+        return (
+            f"{stats['throughput']:>8.1f} req/s  p50 {stats['p50_ms']:>7.2f}  p95 {stats['p95_ms']:>7.2f}  "
+            f"p99 {stats['p99_ms']:>7.2f} ms  {stats['queries_per_request']:>5.1f} queries  "
+            f"{stats['errors']} errors"
+        )
+
+    def _report(self, results, options):
+        current = {str(size): scenarios for size, scenarios in results.items()}
+        path = Path(options['baseline'])
+        if options['save_baseline']:
+            path.write_text(json.dumps(current, indent=1, sort_keys=True) + '\n')
+            self.stdout.write(f'Saved baseline to {path}')
+            return
+        if not path.exists():
+            self.stdout.write(f'No baseline at {path}; run with --save-baseline to create one')
+            return
+
+        baseline = json.loads(path.read_text())
+        regressions = []
+        for size, scenarios in current.items():
+            for name, stats in scenarios.items():
+                before = baseline.get(size, {}).get(name)
+                if before is None:
+                    continue
+                if stats['errors'] > before['errors']:
+                    regressions.append(f"{size} {name}: {stats['errors']} errors (was {before['errors']})")
+                # Occasional cache refills move the mean a little; a new query on every request doesn't
+                if stats['queries_per_request'] > before['queries_per_request'] + 0.5:
+                    regressions.append(
+                        f"{size} {name}: {stats['queries_per_request']} queries/request "
+                        f"(was {before['queries_per_request']})"
+                    )
+                if stats['p95_ms'] > before['p95_ms'] * (1 + options['tolerance']):
+                    regressions.append(f"{size} {name}: p95 {stats['p95_ms']} ms (was {before['p95_ms']} ms)")
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(f'Regression: {regression}')
+            raise CommandError(f'{len(regressions)} regressions against {path}')
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {path}'))
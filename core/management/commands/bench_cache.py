@@ -0,0 +1,149 @@
+import multiprocessing
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.cache_backends import SQLiteCache
+
+BACKENDS = ['locmem', 'filebased', 'sqlite']
+
+
+def _backend(name, directory, max_entries, location='bench'):
+    params = {'TIMEOUT': None, 'OPTIONS': {'MAX_ENTRIES': max_entries}}
+    if name == 'locmem':
+        return LocMemCache(location, params)
+    if name == 'filebased':
+        return FileBasedCache(str(Path(directory) / location), params)
+    return SQLiteCache(Path(directory) / f'{location}.sqlite3', params)
+
+
+def _compute(value, compute_ms):
+    """What a miss costs: rendering the page, say."""
+    time.sleep(compute_ms / 1000)
+    return value
+
+
+def _workload(name, directory, options, seed, results):
+    """get_or_set() on keys skewed towards a few hot ones, like page views."""
+    cache = _backend(name, directory, options['max_entries'], 'shared')
+    value = b'x' * options['value_size']
+    rng = random.Random(seed)
+    lookups = misses = 0
+    deadline = time.monotonic() + options['duration']
+    while time.monotonic() < deadline:
+        key = f"page:{int(options['keys'] * rng.random() ** 3)}"
+        lookups += 1
+
+        def compute():
+            nonlocal misses
+            misses += 1
+            return _compute(value, options['compute_ms'])
+
+        cache.get_or_set(key, compute)
+    results.put((lookups, misses))
+
+
+def _stampede(name, directory, options, barrier, results):
+    """Every worker misses the same key at the same moment."""
+    cache = _backend(name, directory, options['max_entries'], 'stampede')
+    computed = []
+
+    def compute():
+        computed.append(1)
+        return _compute(b'x' * options['value_size'], options['compute_ms'])
+
+    barrier.wait()
+    cache.get_or_set('page:hot', compute)
+    results.put(len(computed))
+
+
+class Command(BaseCommand):
+    help = 'Compare the shared SQLite cache backend with LocMemCache and FileBasedCache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=BACKENDS)
+        parser.add_argument('--ops', type=int, default=5000, help='Operations per single-process test')
+        parser.add_argument('--value-size', type=int, default=16 * 1024, help='Bytes per value, about a page')
+        parser.add_argument('--keys', type=int, default=2000, help='Distinct keys in the shared workload')
+        parser.add_argument('--max-entries', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds of shared workload per backend')
+        parser.add_argument('--compute-ms', type=float, default=20.0, help='Cost of computing a missed value')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{options['value_size'] // 1024} KiB values; {options['workers']} workers, "
+            f"{options['keys']} keys, {options['max_entries']} max entries, "
+            f"{options['compute_ms']:g} ms per miss\n"
+        )
+        self.stdout.write(
+            f"{'backend':<10} {'set/s':>9} {'hit/s':>9} {'miss/s':>9} "
+            f"{'shared/s':>9} {'hit rate':>9} {'stampede':>9}"
+        )
+        for name in options['backends']:
+            with tempfile.TemporaryDirectory() as directory:
+                sets, hits, misses = self._single(name, directory, options)
+                shared, hit_rate = self._shared(name, directory, options)
+                computed = self._stampede(name, directory, options)
+            self.stdout.write(
+                f'{name:<10} {sets:>9.0f} {hits:>9.0f} {misses:>9.0f} '
+                f'{shared:>9.0f} {hit_rate:>9.1%} {computed:>9}'
+            )
+        self.stdout.write(
+            '\nshared/s: get_or_set calls per second across the workers; hit rate: '
+            'the share answered without computing.\nstampede: how many of the workers '
+            'computed one key they all missed at once.'
+        )
+
+    def _single(self, name, directory, options):
+        """set, hit and miss rates in this process, in operations per second."""
+        cache = _backend(name, directory, options['ops'] + 1)
+        value = b'x' * options['value_size']
+        keys = [f'page:{i}' for i in range(options['ops'])]
+        rates = []
+        for operation in (
+            lambda key: cache.set(key, value),
+            lambda key: cache.get(key),
+            lambda key: cache.get(key + ':missing'),
+        ):
+            started = time.perf_counter()
+            for key in keys:
+                operation(key)
+            rates.append(len(keys) / (time.perf_counter() - started))
+        return rates
+
+    def _shared(self, name, directory, options):
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=_workload, args=(name, directory, options, seed, results))
+            for seed in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        lookups = misses = 0
+        for _ in processes:
+            worker_lookups, worker_misses = results.get()
+            lookups += worker_lookups
+            misses += worker_misses
+        for process in processes:
+            process.join()
+        return lookups / options['duration'], 1 - misses / max(lookups, 1)
+
+    def _stampede(self, name, directory, options):
+        barrier = multiprocessing.Barrier(options['workers'])
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=_stampede, args=(name, directory, options, barrier, results))
+            for _ in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        computed = sum(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+        return computed
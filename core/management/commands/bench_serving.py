@@ -0,0 +1,179 @@
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _rss_kib(pid):
+    try:
+        for line in Path(f'/proc/{pid}/status').read_text().splitlines():
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _children(pid):
+    children = []
+    for stat in Path('/proc').glob('[0-9]*/stat'):
+        try:
+            # The command name is parenthesised and may contain spaces
+            fields = stat.read_text().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(stat.parent.name))
+    return children
+
+
+def server_rss_kib(pid):
+    """Resident memory of a gunicorn master and its workers, in KiB (Linux only)."""
+    return _rss_kib(pid) + sum(_rss_kib(child) for child in _children(pid))
+
+
+def _request(path, cookie):
+    return (
+        f'GET {path} HTTP/1.1\r\nHost: localhost\r\nCookie: {cookie}\r\n'
+        'Accept-Encoding: identity\r\nConnection: close\r\n\r\n'
+    ).encode()
+
+
+async def _exchange(port, request, trickle_seconds=0.0, pieces=1):
+    """Send `request` over `trickle_seconds` in `pieces`, then read the status code."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        step = -(-len(request) // pieces)
+        for start in range(0, len(request), step):
+            writer.write(request[start:start + step])
+            await writer.drain()
+            if trickle_seconds and start + step < len(request):
+                await asyncio.sleep(trickle_seconds / (pieces - 1))
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def measure(port, pid, connections, trickle_seconds, path, cookie):
+    """
+    Hold `connections` slow clients open against the server, each sending
+    its request over `trickle_seconds`, and probe it with one fast request
+    while they are in flight.
+    """
+    request = _request(path, cookie)
+    deadline = trickle_seconds * 3 + 10
+    slow = [
+        asyncio.create_task(_exchange(port, request, trickle_seconds, pieces=10))
+        for _ in range(connections)
+    ]
+    await asyncio.sleep(trickle_seconds / 2)
+    rss = server_rss_kib(pid)
+    started = time.perf_counter()
+    try:
+        probe_status = await asyncio.wait_for(_exchange(port, request), deadline)
+        probe_seconds = time.perf_counter() - started
+    except (asyncio.TimeoutError, OSError):
+        probe_status, probe_seconds = None, None
+
+    done, pending = await asyncio.wait(slow, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    completed = sum(1 for task in done if not task.exception() and task.result() == 200)
+    return {
+        'connections': connections,
+        'completed': completed,
+        'probe_status': probe_status,
+        'probe_seconds': probe_seconds,
+        'rss_kib': rss,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Start gunicorn in each SERVING_MODE, hold many slow client connections '
+        'open and report completed requests, probe latency and memory per connection.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='wsgi,asgi')
+        parser.add_argument('--connections', default='10,100,500', help='Comma-separated slow client counts')
+        parser.add_argument('--trickle', type=float, default=2.0, help='Seconds each slow client takes to send')
+        parser.add_argument('--workers', type=int, default=1, help='Gunicorn workers per server')
+        parser.add_argument('--path', default='/')
+        parser.add_argument('--startup-timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        modes = options['modes'].split(',')
+        levels = [int(level) for level in options['connections'].split(',')]
+        # A session cookie keeps the page cache and prerendered files out of
+        # the way, so every request reaches the view
+        cookie = f'{settings.SESSION_COOKIE_NAME}=bench'
+
+        self.stdout.write(
+            f'{"mode":<5} {"slow conns":>10} {"completed":>10} {"probe":>10} {"RSS MiB":>8} {"KiB/conn":>9}'
+        )
+        for mode in modes:
+            port = _free_port()
+            server = self._start(mode, port, options)
+            try:
+                idle = server_rss_kib(server.pid)
+                self.stdout.write(f'{mode:<5} {0:>10} {"":>10} {"":>10} {idle / 1024:>8.1f} {"":>9}')
+                for level in levels:
+                    result = asyncio.run(
+                        measure(port, server.pid, level, options['trickle'], options['path'], cookie)
+                    )
+                    probe = (
+                        f"{result['probe_seconds'] * 1000:.0f} ms" if result['probe_seconds'] is not None
+                        else 'timeout'
+                    )
+                    per_connection = (result['rss_kib'] - idle) / level if idle else 0
+                    self.stdout.write(
+                        f"{mode:<5} {level:>10} {result['completed']:>10} {probe:>10} "
+                        f"{result['rss_kib'] / 1024:>8.1f} {per_connection:>9.1f}"
+                    )
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait(timeout=30)
+
+    def _start(self, mode, port, options):
+        env = {
+            **os.environ,
+            'SERVING_MODE': mode,
+            'PORT': str(port),
+            'WEB_CONCURRENCY': str(options['workers']),
+        }
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}'],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+        deadline = time.monotonic() + options['startup_timeout']
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'gunicorn ({mode}) exited:\n{server.stderr.read().decode()[-2000:]}')
+            try:
+                status = asyncio.run(_exchange(port, _request(options['path'], 'warmup=1')))
+            except OSError:
+                time.sleep(0.2)
+                continue
+            if status == 200:
+                # Drain stderr so a chatty server can't block on a full pipe
+                server.stderr.close()
+                return server
+            time.sleep(0.2)
+        server.kill()
+        raise CommandError(f'gunicorn ({mode}) did not answer {options["path"]} in time')
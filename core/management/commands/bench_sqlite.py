@@ -0,0 +1,114 @@
+import multiprocessing
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.db import pragma_statements
+
+SCHEMA = """
+CREATE TABLE project (
+    id INTEGER PRIMARY KEY, title TEXT, tagline TEXT, display_order INTEGER, created_at TEXT
+);
+CREATE TABLE inquiry (
+    id INTEGER PRIMARY KEY, name TEXT, email TEXT, message TEXT, created_at TEXT
+);
+"""
+
+
+def _connect(path, profile):
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+    for statement in pragma_statements(profile['PRAGMAS']):
+        conn.execute(statement)
+    return conn
+
+
+def _worker(path, profile, role, duration, results):
+    """Run requests like a gunicorn worker would until the time is up."""
+    persistent = profile['CONN_MAX_AGE'] != 0
+    begin = 'BEGIN ' + (profile['TRANSACTION_MODE'] or '')
+    conn = _connect(path, profile) if persistent else None
+    ops = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        if not persistent:
+            conn = _connect(path, profile)
+        try:
+            if role == 'read':
+                conn.execute(
+                    'SELECT * FROM project ORDER BY display_order, created_at DESC LIMIT 50'
+                ).fetchall()
+            else:
+                conn.execute(begin)
+                conn.execute('SELECT COUNT(*) FROM inquiry').fetchone()
+                conn.execute(
+                    "INSERT INTO inquiry (name, email, message, created_at) "
+                    "VALUES ('bench', 'bench@example.com', 'hello', datetime('now'))"
+                )
+                conn.execute('COMMIT')
+            ops += 1
+        except sqlite3.OperationalError:
+            errors += 1
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+        if not persistent:
+            conn.close()
+    results.put((role, ops, errors))
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrent read/write throughput of the SQLite connection profiles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds per profile')
+        parser.add_argument('--rows', type=int, default=1000, help='Projects to seed')
+        parser.add_argument('--profiles', nargs='+', default=list(settings.SQLITE_PROFILES))
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{options['readers']} readers, {options['writers']} writers, "
+            f"{options['duration']}s per profile\n"
+        )
+        self.stdout.write(f"{'profile':<10} {'reads/s':>10} {'writes/s':>10} {'errors':>8}")
+        for name in options['profiles']:
+            reads, writes, errors = self._run(settings.SQLITE_PROFILES[name], options)
+            self.stdout.write(
+                f"{name:<10} {reads / options['duration']:>10.0f} "
+                f"{writes / options['duration']:>10.0f} {errors:>8}"
+            )
+
+    def _run(self, profile, options):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / 'bench.sqlite3')
+            conn = _connect(path, profile)
+            conn.executescript(SCHEMA)
+            conn.executemany(
+                "INSERT INTO project (title, tagline, display_order, created_at) "
+                "VALUES (?, 'tagline', ?, datetime('now'))",
+                [(f'Project {i}', i % 10) for i in range(options['rows'])],
+            )
+            conn.close()
+
+            results = multiprocessing.Queue()
+            roles = ['read'] * options['readers'] + ['write'] * options['writers']
+            processes = [
+                multiprocessing.Process(
+                    target=_worker, args=(path, profile, role, options['duration'], results)
+                )
+                for role in roles
+            ]
+            for process in processes:
+                process.start()
+            totals = {'read': 0, 'write': 0, 'errors': 0}
+            for _ in processes:
+                role, ops, errors = results.get()
+                totals[role] += ops
+                totals['errors'] += errors
+            for process in processes:
+                process.join()
+        return totals['read'], totals['write'], totals['errors']
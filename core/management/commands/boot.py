@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import boot
+
+
+class Command(BaseCommand):
+    help = (
+        'Start the web server: migrate and rebuild static files only when needed, '
+        'then exec gunicorn with the app preloaded and warmed up.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Migrate and rebuild static files regardless')
+        parser.add_argument('--no-exec', action='store_true', help='Prepare, but don\'t start gunicorn')
+
+    def handle(self, *args, **options):
+        started_at = time.time()
+        phases = {}
+
+        @contextmanager
+        def phase(name):
+            phase_started = time.perf_counter()
+            yield
+            phases[name] = time.perf_counter() - phase_started
+
+        with phase('migration_check'):
+            plan = boot.pending_migrations()
+        if plan or options['force']:
+            with phase('migrate'):
+                call_command('migrate', interactive=False, verbosity=1)
+        else:
+            self.stdout.write('Migrations: up to date, skipped')
+
+        with phase('static_check'):
+            source_hash = boot.static_sources_hash()
+            current = boot.static_is_current(source_hash)
+        if not current or options['force']:
+            with phase('build_icons'):
+                try:
+                    call_command('build_icons')
+                except CommandError as exc:
+                    # Pages fall back to the full CDN stylesheet
+                    self.stderr.write(f'Icon subset not built: {exc}')
+            with phase('build_assets'):
+                call_command('build_assets')
+            with phase('collectstatic'):
+                call_command('collectstatic', interactive=False, verbosity=0)
+            boot.write_static_stamp(source_hash)
+        else:
+            self.stdout.write('Static files: unchanged since the last build, skipped')
+
+        phases['prepare'] = time.time() - started_at
+        boot.record(phases, reset=True)
+        self.stdout.write('Boot: ' + ', '.join(f'{name} {seconds:.3f}s' for name, seconds in phases.items()))
+        if options['no_exec']:
+            return
+
+        # gunicorn replaces this process; don't hand it open connections
+        connections.close_all()
+        os.environ[boot.STARTED_AT_ENV] = str(started_at)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        config = str(settings.BASE_DIR / 'gunicorn.conf.py')
+        os.execv(sys.executable, [sys.executable, '-m', 'gunicorn', '--config', config])
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.assets import AssetBuildError, build
+from core.cache import invalidate_pages
+
+
+def _kb(size):
+    return f"{size['bytes'] / 1024:.1f} KB ({size['gzip'] / 1024:.1f} KB gzipped)"
+
+
+class Command(BaseCommand):
+    help = 'Extract critical CSS and minify/bundle the static CSS and JS; run before collectstatic.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Defaults to ASSET_BUILD_DIR')
+
+    def handle(self, *args, **options):
+        try:
+            report = build(options['output'])
+        except AssetBuildError as exc:
+            raise CommandError(exc)
+        # Cached pages embed the previous critical CSS and asset URLs
+        invalidate_pages()
+        self.stdout.write(f"Render-blocking CSS before: {_kb(report['stylesheet'])}")
+        for page, size in report['critical'].items():
+            self.stdout.write(f'  {page}: 0 KB blocking, {_kb(size)} inlined')
+        self.stdout.write(f"Full stylesheet, loaded async: {_kb(report['site_css'])}")
+        self.stdout.write(f"JS: {_kb(report['js'])} -> bundle {_kb(report['bundle'])}")
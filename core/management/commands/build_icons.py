@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.icons import IconBuildError, STYLESHEET_NAME, build, source_dir
+
+
+class Command(BaseCommand):
+    help = 'Build a Font Awesome subset with only the icons the site uses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', help='Font Awesome Free web sources (default: see icons.source_dir())')
+        parser.add_argument('--output', default=settings.ICON_OUTPUT_DIR)
+
+    def handle(self, *args, **options):
+        try:
+            icons, missing = build(options['source'] or source_dir(), options['output'])
+        except IconBuildError as exc:
+            raise CommandError(exc)
+        for name in missing:
+            self.stderr.write(f'Unknown icon: {name}')
+        self.stdout.write(f"Wrote {len(icons)} icons to {options['output']}/{STYLESHEET_NAME}")
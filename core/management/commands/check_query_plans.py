@@ -0,0 +1,150 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+
+from core.models import Project
+from core.pagination import keyset_page
+from core.seeding import seed
+
+# The singleton settings row, and the schema lookups made by introspection
+ALLOWED_SCANS = {'core_sitesettings', 'sqlite_master'}
+
+# "SCAN core_project" reads the whole table; "SCAN core_project USING INDEX x"
+# walks an index in order and stops at the LIMIT. Virtual table scans are
+# FTS MATCH lookups.
+SCAN_RE = re.compile(r'^SCAN (\w+)\b(?! VIRTUAL TABLE)')
+TABLE_SCAN_RE = re.compile(r'^SCAN (\w+)$')
+TEMP_SORT_RE = re.compile(r'USE TEMP B-TREE FOR (?:RIGHT PART OF |LAST TERM OF )?ORDER BY')
+FTS_RE = re.compile(r'^SCAN \w+ VIRTUAL TABLE')
+PK_LOOKUP_RE = re.compile(r'^SEARCH \w+ USING INTEGER PRIMARY KEY \(rowid=\?\)$')
+
+
+def _unorderable(plan):
+    """
+    Whether the plan sorts rows no B-tree index could have returned in
+    order: full-text matches, a list of ids fetched by primary key, or
+    SQLite's own schema.
+    """
+    steps = [step for step in plan if not TEMP_SORT_RE.search(step)]
+    return (
+        any(FTS_RE.match(step) for step in steps)
+        or all(PK_LOOKUP_RE.match(step) for step in steps)
+        or all(SCAN_RE.match(step) and SCAN_RE.match(step)[1] in ALLOWED_SCANS for step in steps)
+    )
+
+
+def plan_problems(plan):
+    """Steps of an EXPLAIN QUERY PLAN that read or sort a whole table."""
+    scans = [step for step in plan if SCAN_RE.match(step) and SCAN_RE.match(step)[1] not in ALLOWED_SCANS]
+    problems = [step for step in scans if TABLE_SCAN_RE.match(step)]
+    # A temp B-tree sorts every row the filter matches before the LIMIT
+    # applies, so a filter matching most of the table sorts most of it
+    if not _unorderable(plan):
+        problems += [step for step in plan if TEMP_SORT_RE.search(step)]
+    return problems
+
+
+class Rollback(Exception):
+    pass
+
+
+def _requests():
+    """Every page and changelist view whose queries are checked, as URLs."""
+    project = Project.objects.order_by('-pk').first()
+    _, cursor = keyset_page(Project.objects.all(), None, 6)
+    admin = '/admin/core/'
+    return [
+        reverse('core:home'),
+        reverse('core:project_cards') + f'?cursor={cursor}',
+        reverse('core:project_cards') + f'?category=django_app&cursor={cursor}',
+        reverse('core:project_api') + f'?cursor={cursor}',
+        reverse('core:project_detail', args=[project.slug]),
+        reverse('core:project_list'),
+        reverse('core:project_list') + '?category=django_app&page=3',
+        reverse('core:project_list') + '?tech=Tech+7',
+        reverse('core:project_search') + '?q=plan+proj',
+        f'{admin}project/',
+        f'{admin}project/?category__exact=website',
+        f'{admin}project/?is_featured__exact=1',
+        f'{admin}project/?q=plan',
+        f'{admin}skill/',
+        f'{admin}skill/?category__exact=backend',
+        f'{admin}technology/',
+        f'{admin}contactinquiry/',
+        f'{admin}contactinquiry/?is_read__exact=0',
+        f'{admin}contactinquiry/?is_read__exact=1',
+        f'{admin}contactinquiry/?inquiry_type__exact=project',
+        f'{admin}contactinquiry/?created_at__gte=2020-01-01+00:00:00%2B00:00&created_at__lt=2100-01-01+00:00:00%2B00:00',
+        f'{admin}contactinquiry/?is_read__exact=0&inquiry_type__exact=general&p=2',
+        f'{admin}contactinquiry/?q=sender',
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large dataset in a rolled-back transaction, run the public views and '
+        'admin changelists, and fail if any query plan scans a table or sorts in a temp B-tree.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=5000)
+        parser.add_argument('--inquiries', type=int, default=20000)
+        parser.add_argument('--skills', type=int, default=200)
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Query plans are checked against SQLite')
+        try:
+            with transaction.atomic():
+                failures = self._check(options)
+                raise Rollback
+        except Rollback:
+            pass
+        if failures:
+            raise CommandError(f'{failures} queries with full scans or temp sorts')
+        self.stdout.write(self.style.SUCCESS('Every query uses an index'))
+
+    def _check(self, options):
+        seed(options['projects'], options['inquiries'], options['skills'], prefix='plan')
+        user = get_user_model().objects.create_superuser('plan-check', 'plan@example.com', 'unused')
+        client = Client(HTTP_HOST='localhost')
+        # A session cookie also keeps the page cache and prerendered files out of the way
+        client.force_login(user)
+
+        captured = []
+
+        def capture(execute, sql, params, many, context):
+            captured.append((sql, params))
+            return execute(sql, params, many, context)
+
+        checked = set()
+        failures = 0
+        for url in _requests():
+            captured.clear()
+            with connection.execute_wrapper(capture):
+                response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{url} answered {response.status_code}')
+            for sql, params in captured:
+                if not sql.lstrip().upper().startswith('SELECT') or sql in checked:
+                    continue
+                checked.add(sql)
+                with connection.cursor() as cursor:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                    plan = [row[-1] for row in cursor.fetchall()]
+                problems = plan_problems(plan)
+                if problems:
+                    failures += 1
+                    self.stdout.write(self.style.ERROR(f'{url}\n  {sql}'))
+                elif options['verbose_plans']:
+                    self.stdout.write(f'{url}\n  {sql}')
+                if problems or options['verbose_plans']:
+                    for step in plan:
+                        self.stdout.write(f'    {step}')
+        self.stdout.write(f'Checked {len(checked)} distinct queries')
+        return failures
@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.content import BATCH_SIZE, MODELS, dumps, export_records
+
+
+def model_labels(value):
+    """'project,skill' or 'core.project,...' -> model labels, in MODELS order."""
+    wanted = {name if '.' in name else f'core.{name}' for name in value.lower().split(',') if name}
+    unknown = wanted - set(MODELS)
+    if unknown:
+        raise CommandError(f'Unknown models: {", ".join(sorted(unknown))}')
+    return [label for label in MODELS if label in wanted]
+
+
+class Command(BaseCommand):
+    help = 'Stream site settings, skills and projects out as NDJSON (or a JSON array) for import_content.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', default='-', help='File to write; - for stdout')
+        parser.add_argument('--models', default=','.join(MODELS), help='Comma-separated, e.g. project,skill')
+        parser.add_argument('--format', choices=['ndjson', 'json'], default='ndjson')
+        parser.add_argument('--chunk-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        labels = model_labels(options['models'])
+        output = sys.stdout if options['output'] == '-' else open(options['output'], 'w', encoding='utf-8')
+        count = 0
+        try:
+            if options['format'] == 'json':
+                output.write('[')
+            for label, fields in export_records(labels, options['chunk_size']):
+                if options['format'] == 'json':
+                    output.write(',\n' if count else '\n')
+                    output.write(dumps(label, fields))
+                else:
+                    output.write(dumps(label, fields) + '\n')
+                count += 1
+            if options['format'] == 'json':
+                output.write('\n]\n')
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        self.stderr.write(f'Exported {count} records')
@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.spool import get_spool
+
+
+class Command(BaseCommand):
+    help = 'Drain the contact inquiry spool into the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.INQUIRY_SPOOL_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Keep flushing until interrupted')
+        parser.add_argument('--interval', type=float, default=settings.INQUIRY_SPOOL_FLUSH_INTERVAL)
+
+    def handle(self, *args, **options):
+        spool = get_spool()
+        while True:
+            result = spool.drain(options['batch_size'])
+            if result.rows or result.skipped or not options['loop']:
+                self.stdout.write(f'Flushed {result}')
+            if result.skipped:
+                self.stderr.write(f'Rejected {result.skipped} records into {spool.directory / spool.rejected_name}')
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
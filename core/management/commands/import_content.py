@@ -0,0 +1,67 @@
+import itertools
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.content import BATCH_SIZE, ContentError, import_records, parse_lines
+
+
+def _detect_format(handle):
+    """('json' or 'ndjson', every line of handle) judged by the first non-blank character."""
+    read = []
+    for line in handle:
+        read.append(line)
+        if line.strip():
+            return ('json' if line.lstrip().startswith('[') else 'ndjson'), itertools.chain(read, handle)
+    return 'ndjson', iter(read)
+
+
+def _json_array_records(lines):
+    # A JSON array has to be parsed whole; NDJSON is read a line at a time
+    try:
+        records = json.loads(''.join(lines))
+    except ValueError as exc:
+        raise CommandError(f'Invalid JSON: {exc}')
+    if not isinstance(records, list):
+        raise CommandError('A JSON input must be an array of records')
+    # Numbered by position in the array
+    return parse_lines(json.dumps(record) for record in records)
+
+
+class Command(BaseCommand):
+    help = (
+        'Upsert site settings, skills and projects from NDJSON (or a JSON array), '
+        'as written by export_content, in batched bulk inserts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to read; - for stdin')
+        parser.add_argument('--format', choices=['auto', 'ndjson', 'json'], default='auto')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--skip-related', action='store_true',
+            help="Don't rebuild the related-projects index (run rebuild_related_projects later)",
+        )
+
+    def handle(self, *args, **options):
+        handle = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        started = time.perf_counter()
+        try:
+            input_format, lines = options['format'], handle
+            if input_format == 'auto':
+                input_format, lines = _detect_format(handle)
+            records = _json_array_records(lines) if input_format == 'json' else parse_lines(lines)
+            result = import_records(
+                records, batch_size=options['batch_size'], rebuild_related=not options['skip_related'],
+            )
+        except ContentError as exc:
+            raise CommandError(f'Nothing imported: {exc}')
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+
+        self.stdout.write(f'Imported {result} in {time.perf_counter() - started:.2f}s')
+        if result.related_entries is not None:
+            self.stdout.write(f'Rebuilt the related-projects index: {result.related_entries} entries')
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core.prerender import build
+
+
+class Command(BaseCommand):
+    help = 'Prerender the public pages to PRERENDER_ROOT, re-rendering only what changed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Re-render every page')
+
+    def handle(self, *args, **options):
+        result = build(full=options['full'])
+        for url_path in result.rendered:
+            self.stdout.write(f'Rendered {url_path}')
+        for url_path in result.removed:
+            self.stdout.write(f'Removed {url_path}')
+        self.stdout.write(f'Prerender: {result}')
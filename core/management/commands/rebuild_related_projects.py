@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.related import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Recompute the related-projects index from scratch.'
+
+    def handle(self, *args, **options):
+        count = rebuild_all()
+        self.stdout.write(f'Wrote {count} related-project entries')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.search import INDEXES, create_statements, drop_statements, is_indexed
+
+
+class Command(BaseCommand):
+    help = 'Recreate the FTS5 search tables and their sync triggers from scratch.'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Full-text search needs SQLite with FTS5')
+        with transaction.atomic(), connection.cursor() as cursor:
+            for table in INDEXES:
+                for statement in [*drop_statements(table), *create_statements(table)]:
+                    cursor.execute(statement)
+        is_indexed.cache_clear()
+        for table, (fts_table, _, _) in INDEXES.items():
+            self.stdout.write(f'Rebuilt {fts_table} from {table}')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.archive import restore
+from core.models import ArchivedInquiry
+
+
+class Command(BaseCommand):
+    help = 'Move archived inquiries back into the database, by original id or sender email.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help='Original inquiry ids')
+        parser.add_argument('--email', help='Restore every archived inquiry from this address')
+
+    def handle(self, *args, **options):
+        if not options['ids'] and not options['email']:
+            raise CommandError('Give inquiry ids or --email')
+        entries = ArchivedInquiry.objects.all()
+        if options['ids']:
+            entries = entries.filter(inquiry_id__in=options['ids'])
+        if options['email']:
+            entries = entries.filter(email__iexact=options['email'])
+        count = restore(entries)
+        self.stdout.write(f'Restored {count} inquiries')
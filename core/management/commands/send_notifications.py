@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.notifications import Notifier, deliver
+
+
+class Command(BaseCommand):
+    help = 'Email the site owner about new inquiries from the notification outbox.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.NOTIFICATION_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Keep delivering until interrupted')
+        parser.add_argument('--interval', type=float, default=settings.NOTIFICATION_POLL_INTERVAL)
+
+    def handle(self, *args, **options):
+        notifier = Notifier()
+        try:
+            while True:
+                result = deliver(notifier, options['batch_size'])
+                if result.messages or result.failed or result.gave_up or not options['loop']:
+                    self.stdout.write(f'Delivered {result}')
+                if not options['loop']:
+                    break
+                if not (result.messages or result.failed or result.gave_up):
+                    # Idle: don't hold the SMTP connection open between polls
+                    notifier.close()
+                close_old_connections()
+                time.sleep(options['interval'])
+        finally:
+            notifier.close()
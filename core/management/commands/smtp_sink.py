@@ -0,0 +1,116 @@
+import asyncio
+import random
+from email import message_from_bytes, policy
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+
+class SMTPSink:
+    """
+    Just enough of an SMTP server to accept what Django's SMTP backend
+    sends, print a line per message and optionally store it. With a
+    fail rate, DATA is answered with a temporary failure at random.
+    """
+
+    def __init__(self, stdout, outdir=None, fail_rate=0.0):
+        self.stdout = stdout
+        self.outdir = Path(outdir) if outdir else None
+        self.fail_rate = fail_rate
+        self.connections = 0
+        self.messages = 0
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        connection_id = self.connections
+        sent_here = 0
+
+        def reply(line):
+            writer.write(f'{line}\r\n'.encode())
+
+        reply('220 localhost smtp_sink ready')
+        sender, recipients = None, []
+        try:
+            while line := await reader.readline():
+                command = line.decode(errors='replace').strip()
+                verb = command[:4].upper()
+                if verb == 'EHLO':
+                    reply('250-localhost')
+                    reply('250 8BITMIME')
+                elif verb == 'HELO':
+                    reply('250 localhost')
+                elif verb == 'MAIL':
+                    sender, recipients = command[10:].strip(' <>'), []
+                    reply('250 OK')
+                elif verb == 'RCPT':
+                    recipients.append(command[8:].strip(' <>'))
+                    reply('250 OK')
+                elif verb == 'DATA':
+                    reply('354 End data with <CR><LF>.<CR><LF>')
+                    await writer.drain()
+                    data = await self.read_data(reader)
+                    if random.random() < self.fail_rate:
+                        reply('451 4.3.0 Temporary failure, try again later')
+                    else:
+                        sent_here += 1
+                        self.store(connection_id, sender, recipients, data)
+                        reply('250 OK queued')
+                elif verb == 'RSET':
+                    sender, recipients = None, []
+                    reply('250 OK')
+                elif verb == 'NOOP':
+                    reply('250 OK')
+                elif verb == 'QUIT':
+                    reply('221 Bye')
+                    break
+                else:
+                    reply('502 Command not implemented')
+                await writer.drain()
+        finally:
+            writer.close()
+            self.stdout.write(f'connection {connection_id} closed after {sent_here} messages')
+
+    @staticmethod
+    async def read_data(reader):
+        lines = []
+        while (line := await reader.readline()) not in (b'.\r\n', b'.\n', b''):
+            # Undo dot-stuffing
+            lines.append(line[1:] if line.startswith(b'..') else line)
+        return b''.join(lines)
+
+    def store(self, connection_id, sender, recipients, data):
+        self.messages += 1
+        message = message_from_bytes(data, policy=policy.default)
+        self.stdout.write(
+            f'#{self.messages} on connection {connection_id}: {sender} -> {", ".join(recipients)}: '
+            f'{message["Subject"]}'
+        )
+        if self.outdir:
+            self.outdir.mkdir(parents=True, exist_ok=True)
+            (self.outdir / f'{self.messages:06d}.eml').write_bytes(data)
+
+
+class Command(BaseCommand):
+    help = 'Run a local SMTP stand-in that prints (and optionally stores) every message it receives.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=1025)
+        parser.add_argument('--outdir', help='Write each message to this directory as an .eml file')
+        parser.add_argument(
+            '--fail-rate', type=float, default=0.0, help='Fraction of messages to answer with a 451',
+        )
+
+    def handle(self, *args, **options):
+        sink = SMTPSink(self.stdout, options['outdir'], options['fail_rate'])
+
+        async def serve():
+            server = await asyncio.start_server(sink.handle, options['host'], options['port'])
+            self.stdout.write(f'Listening on {options["host"]}:{options["port"]}')
+            async with server:
+                await server.serve_forever()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
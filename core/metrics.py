@@ -0,0 +1,291 @@
+"""
+Request metrics in the Prometheus text exposition format.
+
+MetricsMiddleware times every request and, for the resolved URL name,
+counts database queries and their time (through an execute wrapper),
+template render time (by wrapping the Django template backend) and
+response bytes. Each worker adds these into an in-memory batch and merges
+it into a shared SQLite file (METRICS_DB_PATH) at most every
+METRICS_FLUSH_INTERVAL seconds, so the per-request cost is a few dict
+updates and /metrics sees every gunicorn worker.
+"""
+
+import atexit
+import contextvars
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends import django as django_backend
+
+from . import admission, boot, cache_backends
+from .spool import get_spool
+
+# name -> (type, help)
+METRICS = {
+    'portfolio_requests_total': ('counter', 'Requests by URL name, method and status class.'),
+    'portfolio_request_duration_seconds': ('histogram', 'Time spent answering requests.'),
+    'portfolio_db_queries_total': ('counter', 'Database queries run while answering requests.'),
+    'portfolio_db_query_seconds_total': ('counter', 'Time spent in database queries.'),
+    'portfolio_template_render_seconds_total': ('counter', 'Time spent rendering templates.'),
+    'portfolio_response_bytes_total': ('counter', 'Response body bytes sent.'),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sample (
+    name TEXT NOT NULL, labels TEXT NOT NULL, value REAL NOT NULL, PRIMARY KEY (name, labels)
+);
+"""
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """What one request spent its time on."""
+
+    __slots__ = ('queries', 'query_seconds', 'template_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.template_seconds = 0.0
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def count_query(execute, sql, params, many, context):
+    """Execute wrapper charging queries to the current request, if any."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.query_seconds += time.perf_counter() - started
+
+
+def _add_query_counter(sender, connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def instrument_queries():
+    """
+    Install count_query on every database connection.
+
+    It stays installed and finds the request through a context variable,
+    which asgiref copies into the threads async views run their queries
+    in, so queries are counted under both WSGI and ASGI.
+    """
+    connection_created.connect(_add_query_counter, dispatch_uid='metrics_count_query')
+    for connection in connections.all(initialized_only=True):
+        _add_query_counter(None, connection)
+
+
+_instrumented = False
+
+
+def instrument_templates():
+    """Wrap the Django template backend so renders are charged to the current request."""
+    global _instrumented
+    if _instrumented:
+        return
+    render = django_backend.Template.render
+
+    def timed_render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return render(self, context, request)
+        started = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            metrics.template_seconds += time.perf_counter() - started
+
+    django_backend.Template.render = timed_render
+    _instrumented = True
+
+
+def _labels(**labels):
+    return ','.join(f'{key}="{value}"' for key, value in labels.items())
+
+
+class MetricsStore:
+    """Additive samples from every worker in a shared SQLite file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def add(self, samples):
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'INSERT INTO sample (name, labels, value) VALUES (?, ?, ?) '
+                'ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value',
+                [(name, labels, value) for (name, labels), value in samples.items()],
+            )
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def samples(self):
+        return self.connection.execute('SELECT name, labels, value FROM sample').fetchall()
+
+    def reset(self):
+        self.connection.execute('DELETE FROM sample')
+
+
+class Recorder:
+    """This worker's samples since the last flush."""
+
+    def __init__(self, store):
+        self.store = store
+        self.pending = defaultdict(float)
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+
+    def observe(self, view, method, status, seconds, metrics, size, flush=True):
+        labels = _labels(view=view, method=method)
+        with self.lock:
+            pending = self.pending
+            pending['portfolio_requests_total', _labels(view=view, method=method, status=f'{status // 100}xx')] += 1
+            for le in settings.METRICS_LATENCY_BUCKETS:
+                pending['portfolio_request_duration_seconds_bucket', f'{labels},le="{le}"'] += seconds <= le
+            pending['portfolio_request_duration_seconds_bucket', f'{labels},le="+Inf"'] += 1
+            pending['portfolio_request_duration_seconds_sum', labels] += seconds
+            pending['portfolio_request_duration_seconds_count', labels] += 1
+            pending['portfolio_db_queries_total', labels] += metrics.queries
+            pending['portfolio_db_query_seconds_total', labels] += metrics.query_seconds
+            pending['portfolio_template_render_seconds_total', labels] += metrics.template_seconds
+            pending['portfolio_response_bytes_total', labels] += size
+        if flush and self.flush_due():
+            self.flush()
+
+    def flush_due(self):
+        return time.monotonic() - self.last_flush >= settings.METRICS_FLUSH_INTERVAL
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(float)
+            self.last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            self.store.add(pending)
+        except sqlite3.OperationalError:
+            # Keep the batch for the next flush rather than lose it
+            with self.lock:
+                for key, value in pending.items():
+                    self.pending[key] += value
+
+
+_recorder = None
+
+
+def get_recorder():
+    global _recorder
+    if _recorder is None:
+        _recorder = Recorder(MetricsStore(settings.METRICS_DB_PATH))
+        atexit.register(_recorder.flush)
+    return _recorder
+
+
+def _gauges():
+    """Point-in-time values read from their own stores at scrape time."""
+    lines = [
+        '# HELP portfolio_inquiry_spool_depth Contact inquiries waiting to be flushed.',
+        '# TYPE portfolio_inquiry_spool_depth gauge',
+        f'portfolio_inquiry_spool_depth {get_spool().depth()}',
+    ]
+    phases = boot.recorded()
+    if phases:
+        lines += [
+            '# HELP portfolio_boot_phase_seconds Time spent in each phase of the last start (see core/boot.py).',
+            '# TYPE portfolio_boot_phase_seconds gauge',
+        ]
+        lines += [f'portfolio_boot_phase_seconds{{phase="{name}"}} {seconds}' for name, seconds in sorted(phases.items())]
+    if settings.ADMISSION_CONTROL_ENABLED:
+        lines += [
+            '# HELP portfolio_admission_decisions_total Admission control decisions by outcome.',
+            '# TYPE portfolio_admission_decisions_total counter',
+        ]
+        lines += [
+            f'portfolio_admission_decisions_total{{outcome="{outcome}"}} {value}'
+            for outcome, value in admission.get_store().counters().items()
+        ]
+    if hasattr(cache, 'stats'):
+        stats = cache.stats()
+        lines += [
+            '# HELP portfolio_cache_operations_total Shared cache lookups and writes by outcome (see core/cache_backends.py).',
+            '# TYPE portfolio_cache_operations_total counter',
+        ]
+        lines += [f'portfolio_cache_operations_total{{outcome="{name}"}} {stats[name]}' for name in cache_backends.COUNTERS]
+        lines += [
+            '# HELP portfolio_cache_entries Entries in the shared cache.',
+            '# TYPE portfolio_cache_entries gauge',
+            f'portfolio_cache_entries {stats["entries"]}',
+            '# HELP portfolio_cache_bytes Size of the shared cache\'s keys and values.',
+            '# TYPE portfolio_cache_bytes gauge',
+            f'portfolio_cache_bytes {stats["bytes"]}',
+        ]
+    return lines
+
+
+def _format_value(value):
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+def _sort_key(sample):
+    name, labels, _ = sample
+    if name.endswith('_bucket'):
+        # Buckets in ascending le order, +Inf last
+        labels, le = labels.rsplit(',le=', 1)
+        return name, labels, float(le.strip('"').replace('+Inf', 'inf'))
+    return name, labels, 0.0
+
+
+def exposition():
+    """Every worker's metrics in the Prometheus text format."""
+    recorder = get_recorder()
+    recorder.flush()
+    by_family = defaultdict(list)
+    for name, labels, value in sorted(recorder.store.samples(), key=_sort_key):
+        family = next((f for f in METRICS if name == f or name.startswith(f'{f}_')), name)
+        by_family[family].append(f'{name}{{{labels}}} {_format_value(value)}')
+
+    lines = []
+    for family, (kind, help_text) in METRICS.items():
+        if family in by_family:
+            lines += [f'# HELP {family} {help_text}', f'# TYPE {family} {kind}', *by_family[family]]
+    lines += _gauges()
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,332 @@
+import logging
+import math
+import os
+import sqlite3
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, JsonResponse
+from django.urls import Resolver404, resolve
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import admission, hints, metrics
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def stream_file_async(response):
+    """
+    Make a FileResponse read its file in a thread, chunk by chunk, when
+    served under ASGI (Django would otherwise read it whole into memory).
+    """
+    filelike = getattr(response, 'file_to_stream', None)
+    if filelike is None:
+        return response
+    read = sync_to_async(filelike.read, thread_sensitive=False)
+
+    async def chunks():
+        while chunk := await read(STREAM_CHUNK_SIZE):
+            yield chunk
+
+    # The file stays registered for closing when the response is closed
+    response.streaming_content = chunks()
+    return response
+
+
+class SyncAndAsyncMiddleware:
+    """
+    Base for middleware that runs natively under both WSGI and ASGI.
+
+    Django wraps sync-only middleware in a thread under ASGI, which also
+    forces everything inside it (including async views) back to sync, so
+    each middleware here has an async path in __acall__.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.call(request)
+
+    def call(self, request):
+        raise NotImplementedError
+
+    async def __acall__(self, request):
+        raise NotImplementedError
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise with an async path, so it doesn't force the stack to sync under ASGI."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        # A dict lookup; files are indexed at startup unless autorefresh is on
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return stream_file_async(self.serve(static_file, request))
+        return await self.get_response(request)
+
+
+class EarlyHintsMiddleware(SyncAndAsyncMiddleware):
+    """
+    Announce base.html's critical assets for page navigations: as a 103
+    Early Hints response where the WSGI server offers one, and as a Link
+    header on the final response. See core.hints.
+    """
+
+    def __init__(self, get_response):
+        if not settings.EARLY_HINTS_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def call(self, request):
+        wanted = self.wants_hints(request)
+        send_early_hints = request.META.get('wsgi.early_hints')
+        if wanted and send_early_hints is not None:
+            try:
+                send_early_hints([('Link', value) for value in hints.link_values()])
+            except Exception:
+                # A hint is an optimisation; never fail the request over it
+                logger.exception('Sending 103 Early Hints failed')
+        response = self.get_response(request)
+        return hints.add_link_header(response) if wanted else response
+
+    async def __acall__(self, request):
+        # The 103 itself is sent by hints.EarlyHintsASGIMiddleware, which
+        # sits in front of Django
+        response = await self.get_response(request)
+        return hints.add_link_header(response) if self.wants_hints(request) else response
+
+    def wants_hints(self, request):
+        return hints.wants_hints(request.method, request.path, request.META.get('HTTP_ACCEPT', ''))
+
+
+class PrerenderedPageMiddleware(SyncAndAsyncMiddleware):
+    """
+    Serve pages written by `manage.py prerender` to anonymous visitors.
+
+    Files are looked up on every request rather than indexed at startup
+    (as WhiteNoise does), so incremental rebuilds take effect immediately.
+    """
+
+    # (Accept-Encoding token, file suffix, Content-Encoding) by preference
+    encodings = [('br', '.br', 'br'), ('gzip', '.gz', 'gzip'), (None, '', None)]
+
+    def __init__(self, get_response):
+        if not settings.PRERENDER_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.root = str(settings.PRERENDER_ROOT)
+
+    def call(self, request):
+        return self.serve_if_prerendered(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        # A stat() and an open() are cheap enough to do on the event loop
+        response = self.serve_if_prerendered(request)
+        if response is not None:
+            return stream_file_async(response)
+        return await self.get_response(request)
+
+    def serve_if_prerendered(self, request):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.path.endswith('/')
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        ):
+            return self.serve(request)
+        return None
+
+    def serve(self, request):
+        try:
+            index = safe_join(self.root, request.path.lstrip('/'), 'index.html')
+        except ValueError:
+            return None
+        accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        for token, suffix, content_encoding in self.encodings:
+            if token and token not in accepted:
+                continue
+            try:
+                stat = os.stat(index + suffix)
+            except FileNotFoundError:
+                continue
+            etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+            response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+            if response is None:
+                response = FileResponse(open(index + suffix, 'rb'), content_type='text/html; charset=utf-8')
+                if content_encoding:
+                    response['Content-Encoding'] = content_encoding
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(stat.st_mtime)
+            patch_cache_control(response, **settings.ANONYMOUS_CACHE_CONTROL)
+            patch_vary_headers(response, ['Accept-Encoding'])
+            return response
+        return None
+
+
+class AdmissionControlMiddleware(SyncAndAsyncMiddleware):
+    """
+    Shed or deduplicate requests to @admission_controlled views.
+
+    Runs in process_view, ahead of CsrfViewMiddleware, so a rejected
+    request never has its body read or touches the database.
+    """
+
+    def __init__(self, get_response):
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def call(self, request):
+        response = self.get_response(request)
+        self.remember(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if getattr(request, '_admission_fingerprint', None) is not None:
+            await sync_to_async(self.remember)(request, response)
+        return response
+
+    @staticmethod
+    def remember(request, response):
+        fingerprint = getattr(request, '_admission_fingerprint', None)
+        if fingerprint is not None and response.status_code == 200:
+            try:
+                admission.get_store().remember(fingerprint)
+            except sqlite3.OperationalError:
+                logger.warning('Could not record admission fingerprint', exc_info=True)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Under ASGI Django runs this in a thread, off the event loop
+        if not getattr(view_func, 'admission_controlled', False) or request.method != 'POST':
+            return None
+        store = admission.get_store()
+        fingerprint = None
+        try:
+            outcome, retry_after = store.admit(admission.client_ip(request))
+            if outcome == admission.ADMITTED:
+                # Only now is the body worth reading
+                fingerprint = admission.request_fingerprint(request)
+                outcome = store.settle(fingerprint)
+        except sqlite3.OperationalError:
+            # The store is saturated, which means so are we
+            logger.warning('Admission store unavailable, shedding request', exc_info=True)
+            store.count_busy()
+            outcome, retry_after = admission.REJECTED_BUSY, 1
+
+        if outcome == admission.ADMITTED:
+            request._admission_fingerprint = fingerprint
+            return None
+        if outcome == admission.DUPLICATE:
+            return JsonResponse({
+                'success': True,
+                'duplicate': True,
+                'message': 'Thanks, this message has already been received.',
+            })
+        response = JsonResponse(
+            {'success': False, 'message': 'Too many requests. Please try again shortly.'},
+            status=429 if outcome == admission.REJECTED_IP else 503,
+        )
+        response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+
+
+class MetricsMiddleware(SyncAndAsyncMiddleware):
+    """
+    Record latency, query count/time, template time and response size per
+    URL name (see core/metrics.py). Listed first so the timings include
+    every other middleware, and responses it short-circuits still count.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.recorder = metrics.get_recorder()
+        metrics.instrument_queries()
+        metrics.instrument_templates()
+
+    def call(self, request):
+        started = time.perf_counter()
+        request_metrics, token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        self.observe(request, response, started, request_metrics)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        request_metrics, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        self.observe(request, response, started, request_metrics, flush=False)
+        if self.recorder.flush_due():
+            # Merging into the shared SQLite file can wait on a lock
+            await sync_to_async(self.recorder.flush, thread_sensitive=False)()
+        return response
+
+    def observe(self, request, response, started, request_metrics, flush=True):
+        self.recorder.observe(
+            self.view_name(request),
+            request.method,
+            response.status_code,
+            time.perf_counter() - started,
+            request_metrics,
+            self.response_size(response),
+            flush=flush,
+        )
+
+    @staticmethod
+    def view_name(request):
+        match = request.resolver_match
+        if match is None:
+            if request.path.startswith(settings.STATIC_URL):
+                return 'static'
+            # Answered by middleware (e.g. a prerendered page) before URL resolution
+            try:
+                match = resolve(request.path_info)
+            except Resolver404:
+                return 'unresolved'
+        if match.namespaces and match.namespaces[0] == 'admin':
+            return 'admin'
+        return match.view_name
+
+    @staticmethod
+    def response_size(response):
+        if response.has_header('Content-Length'):
+            return int(response['Content-Length'])
+        return 0 if response.streaming else len(response.content)
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:49
+
+import heapq
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The scoring of core/related.py as it was when this migration was written;
+# inlined so later edits there can't change it.
+INDEX_SIZE = 6
+CATEGORY_WEIGHT = 0.5
+
+
+def signature(category, tech_stack):
+    technologies = {str(tech).strip().lower() for tech in tech_stack or []}
+    return category, frozenset(technologies - {''})
+
+
+def similarity(a, b):
+    (category_a, tech_a), (category_b, tech_b) = a, b
+    score = CATEGORY_WEIGHT if category_a == category_b else 0.0
+    union = tech_a | tech_b
+    if union:
+        score += len(tech_a & tech_b) / len(union)
+    return score
+
+
+def neighbours(pk, signatures):
+    own = signatures[pk]
+    scored = []
+    for other, other_signature in signatures.items():
+        if other != pk:
+            score = similarity(own, other_signature)
+            if score > 0:
+                scored.append((score, other))
+    return heapq.nlargest(INDEX_SIZE, scored, key=lambda entry: (entry[0], -entry[1]))
+
+
+def build_index(apps, schema_editor):
+    Project = apps.get_model('core', 'Project')
+    RelatedProject = apps.get_model('core', 'RelatedProject')
+    signatures = {
+        pk: signature(category, tech_stack)
+        for pk, category, tech_stack in Project.objects.values_list('pk', 'category', 'tech_stack')
+    }
+    RelatedProject.objects.bulk_create([
+        RelatedProject(project_id=pk, related_id=other, rank=rank, score=score)
+        for pk in signatures
+        for rank, (score, other) in enumerate(neighbours(pk, signatures))
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_contactinquiry_created_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedProject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('project', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='core.project')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.project')),
+            ],
+            options={
+                'ordering': ['project', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('project', 'rank'), name='unique_related_project_rank')],
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:51
+
+from django.db import migrations, models
+
+
+# core.technologies.technology_key() as it was when this migration was
+# written; inlined so later edits there can't change it.
+def technology_key(name):
+    return ' '.join(str(name).split()).casefold()
+
+
+def build_index(apps, schema_editor):
+    Project = apps.get_model('core', 'Project')
+    Technology = apps.get_model('core', 'Technology')
+    technologies = {}
+    for project in Project.objects.all():
+        for name in project.tech_stack or []:
+            key = technology_key(name)
+            if not key:
+                continue
+            if key not in technologies:
+                technologies[key] = Technology.objects.create(name=' '.join(str(name).split()), key=key)
+            project.technologies.add(technologies[key])
+    for technology in technologies.values():
+        technology.project_count = technology.projects.count()
+        technology.save(update_fields=['project_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_relatedproject'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Technology',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(help_text='Case-folded name used for lookups', max_length=100, unique=True)),
+                ('project_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Technologies',
+                'ordering': ['-project_count', 'name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='technologies',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='projects', to='core.technology'),
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
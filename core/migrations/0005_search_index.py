@@ -0,0 +1,79 @@
+from django.db import migrations
+
+# The FTS5 tables and sync triggers of core/search.py as they were when this
+# migration was written; inlined so later edits there can't change it.
+CREATE_STATEMENTS = [
+    "CREATE VIRTUAL TABLE core_project_fts USING fts5("
+    "title, tagline, description, tech_stack, content='core_project', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    'CREATE TRIGGER core_project_fts_ai AFTER INSERT ON core_project BEGIN '
+    'INSERT INTO core_project_fts (rowid, title, tagline, description, tech_stack) '
+    'VALUES (new.id, new.title, new.tagline, new.description, new.tech_stack); END',
+    'CREATE TRIGGER core_project_fts_ad AFTER DELETE ON core_project BEGIN '
+    'INSERT INTO core_project_fts (core_project_fts, rowid, title, tagline, description, tech_stack) '
+    "VALUES ('delete', old.id, old.title, old.tagline, old.description, old.tech_stack); END",
+    'CREATE TRIGGER core_project_fts_au AFTER UPDATE ON core_project BEGIN '
+    'INSERT INTO core_project_fts (core_project_fts, rowid, title, tagline, description, tech_stack) '
+    "VALUES ('delete', old.id, old.title, old.tagline, old.description, old.tech_stack); "
+    'INSERT INTO core_project_fts (rowid, title, tagline, description, tech_stack) '
+    'VALUES (new.id, new.title, new.tagline, new.description, new.tech_stack); END',
+    "INSERT INTO core_project_fts (core_project_fts) VALUES ('rebuild')",
+
+    "CREATE VIRTUAL TABLE core_contactinquiry_fts USING fts5("
+    "name, email, message, project_description, content='core_contactinquiry', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    'CREATE TRIGGER core_contactinquiry_fts_ai AFTER INSERT ON core_contactinquiry BEGIN '
+    'INSERT INTO core_contactinquiry_fts (rowid, name, email, message, project_description) '
+    'VALUES (new.id, new.name, new.email, new.message, new.project_description); END',
+    'CREATE TRIGGER core_contactinquiry_fts_ad AFTER DELETE ON core_contactinquiry BEGIN '
+    'INSERT INTO core_contactinquiry_fts (core_contactinquiry_fts, rowid, name, email, message, project_description) '
+    "VALUES ('delete', old.id, old.name, old.email, old.message, old.project_description); END",
+    'CREATE TRIGGER core_contactinquiry_fts_au AFTER UPDATE ON core_contactinquiry BEGIN '
+    'INSERT INTO core_contactinquiry_fts (core_contactinquiry_fts, rowid, name, email, message, project_description) '
+    "VALUES ('delete', old.id, old.name, old.email, old.message, old.project_description); "
+    'INSERT INTO core_contactinquiry_fts (rowid, name, email, message, project_description) '
+    'VALUES (new.id, new.name, new.email, new.message, new.project_description); END',
+    "INSERT INTO core_contactinquiry_fts (core_contactinquiry_fts) VALUES ('rebuild')",
+]
+
+DROP_STATEMENTS = [
+    f'DROP TRIGGER IF EXISTS {fts_table}_{suffix}'
+    for fts_table in ('core_project_fts', 'core_contactinquiry_fts')
+    for suffix in ('ai', 'ad', 'au')
+] + [
+    'DROP TABLE IF EXISTS core_project_fts',
+    'DROP TABLE IF EXISTS core_contactinquiry_fts',
+]
+
+
+def fts5_available(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def create_indexes(apps, schema_editor):
+    if not fts5_available(schema_editor):
+        return
+    for statement in CREATE_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_technology'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
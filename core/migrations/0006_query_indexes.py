@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contactinquiry',
+            index=models.Index(fields=['created_at'], name='inquiry_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactinquiry',
+            index=models.Index(fields=['inquiry_type', 'created_at'], name='inquiry_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactinquiry',
+            index=models.Index(fields=['is_read', 'created_at'], name='inquiry_read_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['display_order', '-created_at', 'id'], name='project_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['category', 'display_order', '-created_at', 'id'], name='project_category_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_featured', True)), fields=['display_order', '-created_at', 'id'], name='project_featured_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['display_order', 'name'], name='skill_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['category', 'display_order', 'name'], name='skill_category_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='technology',
+            index=models.Index(fields=['-project_count', 'name'], name='technology_count_idx'),
+        ),
+    ]
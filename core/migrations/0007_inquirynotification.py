@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InquiryNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('inquiry', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='notification', to='core.contactinquiry')),
+            ],
+            options={
+                'ordering': ['pk'],
+                'indexes': [models.Index(condition=models.Q(('sent_at__isnull', True)), fields=['next_attempt_at', 'id'], name='notification_due_idx')],
+            },
+        ),
+    ]
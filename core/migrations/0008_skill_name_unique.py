@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:24
+
+from django.db import migrations, models
+
+
+SKILL_FIELDS = ['icon', 'category', 'proficiency', 'display_order']
+
+
+def merge_duplicate_skills(apps, schema_editor):
+    """
+    Merge skills that repeat a name and are otherwise identical, so the
+    unique index can be added. Copies that differ can't be merged without
+    losing something; the migration stops and lists them instead.
+    """
+    Skill = apps.get_model('core', 'Skill')
+    names = (
+        Skill.objects.values('name').annotate(count=models.Count('pk')).filter(count__gt=1).values_list('name', flat=True)
+    )
+    conflicts = []
+    for name in names:
+        rows = list(Skill.objects.filter(name=name).order_by('pk').values('pk', *SKILL_FIELDS))
+        if any({field: row[field] for field in SKILL_FIELDS} != {field: rows[0][field] for field in SKILL_FIELDS} for row in rows):
+            conflicts.append(f"{name!r} (ids {', '.join(str(row['pk']) for row in rows)})")
+            continue
+        # The copies carry nothing the first one doesn't
+        Skill.objects.filter(pk__in=[row['pk'] for row in rows[1:]]).delete()
+    if conflicts:
+        raise RuntimeError(
+            'Skill names must be unique, but these differ in more than their id: '
+            + '; '.join(conflicts) + '. Rename or delete the extra skills in the admin, then migrate again.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_inquirynotification'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_skills, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='skill',
+            name='name',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+    ]
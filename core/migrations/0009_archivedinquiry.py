@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:32
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_skill_name_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedInquiry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('inquiry_id', models.PositiveBigIntegerField(help_text="The inquiry's original id", unique=True)),
+                ('inquiry_type', models.CharField(choices=[('general', 'General Inquiry'), ('project', 'Project Inquiry')], max_length=20)),
+                ('name', models.CharField(max_length=100)),
+                ('email', models.EmailField(db_index=True, max_length=254)),
+                ('created_at', models.DateTimeField()),
+                ('archive', models.CharField(help_text='File in INQUIRY_ARCHIVE_DIR', max_length=50)),
+                ('offset', models.PositiveBigIntegerField(help_text='Byte offset of the gzip member holding the record')),
+                ('length', models.PositiveIntegerField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+            ],
+            options={
+                'verbose_name': 'Archived Inquiry',
+                'verbose_name_plural': 'Archived Inquiries',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='archived_inquiry_created_idx')],
+            },
+        ),
+    ]
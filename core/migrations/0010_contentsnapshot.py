@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:35
+
+import uuid
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_archivedinquiry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentSnapshot',
+            fields=[
+                ('key', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=1)),
+                ('build', models.UUIDField(default=uuid.uuid4)),
+                ('data', models.JSONField()),
+                ('built_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -1,4 +1,7 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 
 
@@ -27,18 +30,17 @@ class SiteSettings(models.Model):
             self.pk = existing.pk
         super().save(*args, **kwargs)
 
+    DEFAULTS = {
+        'name': 'Mohamed Ali Hussien',
+        'title': 'Full Stack Developer',
+        'bio': 'Passionate developer creating modern web applications.',
+        'email': 'contact@example.com',
+    }
+
     @classmethod
     def get_settings(cls):
         """Get or create the singleton settings instance."""
-        settings, created = cls.objects.get_or_create(
-            pk=1,
-            defaults={
-                'name': 'Mohamed Ali Hussien',
-                'title': 'Full Stack Developer',
-                'bio': 'Passionate developer creating modern web applications.',
-                'email': 'contact@example.com',
-            }
-        )
+        settings, created = cls.objects.get_or_create(pk=1, defaults=cls.DEFAULTS)
         return settings
 
 
@@ -51,7 +53,8 @@ class Skill(models.Model):
         ('database', 'Database'),
     ]
 
-    name = models.CharField(max_length=50)
+    # Unique, as the key content imports match skills on
+    name = models.CharField(max_length=50, unique=True)
     icon = models.CharField(max_length=50, help_text="Font Awesome class, e.g., 'fa-python'")
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
     proficiency = models.IntegerField(default=80, help_text="1-100 proficiency level")
@@ -59,6 +62,27 @@ class Skill(models.Model):
 
     class Meta:
         ordering = ['display_order', 'name']
+        indexes = [
+            models.Index(fields=['display_order', 'name'], name='skill_order_idx'),
+            models.Index(fields=['category', 'display_order', 'name'], name='skill_category_order_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class Technology(models.Model):
+    """A normalized Project.tech_stack entry (see technologies.py)."""
+    name = models.CharField(max_length=100)
+    key = models.CharField(max_length=100, unique=True, help_text="Case-folded name used for lookups")
+    project_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-project_count', 'name']
+        verbose_name_plural = "Technologies"
+        indexes = [
+            models.Index(fields=['-project_count', 'name'], name='technology_count_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -93,6 +117,8 @@ class Project(models.Model):
         default=list,
         help_text="List of key features"
     )
+    # Indexed mirror of tech_stack, maintained on save
+    technologies = models.ManyToManyField(Technology, blank=True, editable=False, related_name='projects')
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='website')
     is_featured = models.BooleanField(default=False, help_text="Show prominently on homepage")
     display_order = models.IntegerField(default=0, help_text="Lower numbers appear first")
@@ -101,6 +127,18 @@ class Project(models.Model):
 
     class Meta:
         ordering = ['display_order', '-created_at']
+        # Each matches the ordering, after the column a view or changelist
+        # filters on; id is the keyset pagination tiebreaker
+        indexes = [
+            models.Index(fields=['display_order', '-created_at', 'id'], name='project_order_idx'),
+            models.Index(
+                fields=['category', 'display_order', '-created_at', 'id'], name='project_category_order_idx',
+            ),
+            models.Index(
+                fields=['display_order', '-created_at', 'id'], condition=models.Q(is_featured=True),
+                name='project_featured_order_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -111,6 +149,24 @@ class Project(models.Model):
         super().save(*args, **kwargs)
 
 
+class RelatedProject(models.Model):
+    """Precomputed neighbours of a project, best match first (see related.py)."""
+    # unique_related_project_rank leads with project, so it serves the FK lookups
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='related_entries', db_index=False)
+    related = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['project', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'rank'], name='unique_related_project_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.project} -> {self.related} ({self.score:.2f})"
+
+
 class ContactInquiry(models.Model):
     """Contact form submissions."""
     INQUIRY_CHOICES = [
@@ -144,13 +200,95 @@ class ContactInquiry(models.Model):
     timeline = models.CharField(max_length=20, choices=TIMELINE_CHOICES, blank=True)
     project_description = models.TextField(blank=True, help_text="Detailed project requirements")
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: spooled inquiries keep their submission time
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     is_read = models.BooleanField(default=False)
 
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Contact Inquiry"
         verbose_name_plural = "Contact Inquiries"
+        # Ascending, so a backwards walk gives the admin's (-created_at, -pk)
+        indexes = [
+            models.Index(fields=['created_at'], name='inquiry_created_idx'),
+            models.Index(fields=['inquiry_type', 'created_at'], name='inquiry_type_created_idx'),
+            models.Index(fields=['is_read', 'created_at'], name='inquiry_read_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.inquiry_type.title()} from {self.name}"
+
+
+class InquiryNotification(models.Model):
+    """
+    Outbox row for telling the site owner about an inquiry.
+
+    Written in the same transaction as the inquiry and delivered by
+    `manage.py send_notifications` (see core/notifications.py), so the
+    request never waits on SMTP and no committed inquiry goes unnoticed.
+    """
+    inquiry = models.OneToOneField(ContactInquiry, on_delete=models.CASCADE, related_name='notification')
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['pk']
+        indexes = [
+            # The worker's "what is due" lookup only ever reads unsent rows
+            models.Index(
+                fields=['next_attempt_at', 'id'], condition=models.Q(sent_at__isnull=True),
+                name='notification_due_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Notification for {self.inquiry}"
+
+
+class ArchivedInquiry(models.Model):
+    """
+    Index entry for an inquiry moved out of ContactInquiry by
+    `manage.py archive_inquiries` (see archive.py): where its record sits
+    in the monthly archive files, plus the fields it is looked up by.
+    """
+    inquiry_id = models.PositiveBigIntegerField(unique=True, help_text="The inquiry's original id")
+    inquiry_type = models.CharField(max_length=20, choices=ContactInquiry.INQUIRY_CHOICES)
+    name = models.CharField(max_length=100)
+    email = models.EmailField(db_index=True)
+    created_at = models.DateTimeField()
+    archive = models.CharField(max_length=50, help_text="File in INQUIRY_ARCHIVE_DIR")
+    offset = models.PositiveBigIntegerField(help_text="Byte offset of the gzip member holding the record")
+    length = models.PositiveIntegerField()
+    archived_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Archived Inquiry"
+        verbose_name_plural = "Archived Inquiries"
+        indexes = [
+            models.Index(fields=['created_at'], name='archived_inquiry_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.inquiry_type.title()} from {self.name} (archived)"
+
+
+class ContentSnapshot(models.Model):
+    """
+    Materialized read model of the public pages (see read_model.py),
+    rebuilt whenever their content changes. Workers keep the decoded
+    snapshot in memory and only compare `build` per request: unlike
+    `version`, it is unique across rows and databases, so a recreated
+    row or a swapped database never looks like the snapshot they hold.
+    """
+    key = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=1)
+    build = models.UUIDField(default=uuid.uuid4)
+    data = models.JSONField()
+    built_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
@@ -0,0 +1,252 @@
+"""
+Inquiry notifications through a transactional outbox.
+
+Every inquiry is saved together with an InquiryNotification row, by
+save_inquiry() on the inline path and by the spool's batch commits. A
+notification therefore exists exactly when its inquiry does, and the
+request never waits on SMTP. A background thread in each web worker
+(or `manage.py send_notifications --loop`) delivers them:
+
+- due rows are claimed with a lease, so two workers never send the same one
+- a pass sends all its messages over one SMTP connection, which the
+  worker keeps open while there is work
+- when more than NOTIFICATION_DIGEST_THRESHOLD are due at once they are
+  collapsed into digests of up to NOTIFICATION_DIGEST_SIZE inquiries
+- failed sends are retried with exponential backoff and jitter, up to
+  NOTIFICATION_MAX_ATTEMPTS times
+"""
+
+import logging
+import random
+import smtplib
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import InquiryNotification, SiteSettings
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the connection, not the message, is the problem
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+def queue_notifications(inquiries):
+    """Add outbox rows for saved inquiries; call inside the transaction that saved them."""
+    if settings.NOTIFICATIONS_ENABLED:
+        InquiryNotification.objects.bulk_create([InquiryNotification(inquiry=inquiry) for inquiry in inquiries])
+        if settings.NOTIFICATION_AUTODELIVER:
+            start_background_delivery()
+
+
+def save_inquiry(inquiry):
+    """Save an inquiry and its notification atomically."""
+    with transaction.atomic():
+        inquiry.save()
+        queue_notifications([inquiry])
+
+
+class DeliveryResult:
+    """Outcome of one delivery pass."""
+
+    def __init__(self, notified=0, messages=0, failed=0, gave_up=0):
+        self.notified = notified
+        self.messages = messages
+        self.failed = failed
+        self.gave_up = gave_up
+
+    def __str__(self):
+        return (
+            f'{self.notified} inquiries in {self.messages} messages, '
+            f'{self.failed} to retry, {self.gave_up} given up'
+        )
+
+
+def backoff(attempts):
+    """Seconds to wait after the `attempts`-th failure, with jitter."""
+    delay = min(settings.NOTIFICATION_RETRY_BASE * 2 ** (attempts - 1), settings.NOTIFICATION_RETRY_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim_due(limit):
+    """Lease up to `limit` due notifications to this worker and return them."""
+    now = timezone.now()
+    due = InquiryNotification.objects.filter(
+        sent_at__isnull=True, next_attempt_at__lte=now, attempts__lt=settings.NOTIFICATION_MAX_ATTEMPTS,
+    )
+    # Polled by every worker; only take the write lock when there is work
+    if not due.exists():
+        return []
+    with transaction.atomic():
+        ids = list(due.order_by('next_attempt_at', 'id').values_list('id', flat=True)[:limit])
+        # Another worker skips them until the lease runs out
+        InquiryNotification.objects.filter(pk__in=ids).update(
+            next_attempt_at=now + timedelta(seconds=settings.NOTIFICATION_LEASE),
+        )
+    return list(InquiryNotification.objects.filter(pk__in=ids).select_related('inquiry').order_by('pk'))
+
+
+def _recipient():
+    # Read only: get_settings() would write the row if it's missing
+    return (
+        settings.NOTIFICATION_RECIPIENT
+        or SiteSettings.objects.filter(pk=1).values_list('email', flat=True).first()
+        or SiteSettings.DEFAULTS['email']
+    )
+
+
+def _describe(inquiry):
+    lines = [
+        f'From: {inquiry.name} <{inquiry.email}>',
+        f'Type: {inquiry.get_inquiry_type_display()}',
+        f'Received: {inquiry.created_at:%Y-%m-%d %H:%M %Z}',
+    ]
+    if inquiry.inquiry_type == 'project':
+        lines += [
+            f'Budget: {inquiry.get_budget_display() or "-"}',
+            f'Timeline: {inquiry.get_timeline_display() or "-"}',
+            '',
+            inquiry.project_description,
+        ]
+    lines += ['', inquiry.message]
+    return '\n'.join(lines)
+
+
+def build_messages(notifications, recipient):
+    """Pair groups of notifications with the email that covers them."""
+    if len(notifications) <= settings.NOTIFICATION_DIGEST_THRESHOLD:
+        return [
+            ([notification], EmailMessage(
+                subject=f'New {inquiry.get_inquiry_type_display().lower()} from {inquiry.name}',
+                body=_describe(inquiry),
+                to=[recipient],
+                reply_to=[inquiry.email],
+            ))
+            for notification in notifications
+            for inquiry in [notification.inquiry]
+        ]
+
+    size = settings.NOTIFICATION_DIGEST_SIZE
+    messages = []
+    for start in range(0, len(notifications), size):
+        chunk = notifications[start:start + size]
+        body = f'\n\n{"-" * 60}\n\n'.join(_describe(notification.inquiry) for notification in chunk)
+        messages.append((chunk, EmailMessage(
+            subject=f'{len(chunk)} new inquiries',
+            body=body,
+            to=[recipient],
+        )))
+    return messages
+
+
+class Notifier:
+    """Sends messages over one SMTP connection, opened on first use and reused."""
+
+    def __init__(self, connection=None):
+        self.connection = connection or get_connection(fail_silently=False)
+        self.is_open = False
+
+    def send(self, message):
+        if not self.is_open:
+            self.connection.open()
+            self.is_open = True
+        try:
+            self.connection.send_messages([message])
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped the connection while it sat idle; one fresh try
+            self.close()
+            self.connection.open()
+            self.is_open = True
+            self.connection.send_messages([message])
+
+    def close(self):
+        if self.is_open:
+            try:
+                self.connection.close()
+            finally:
+                self.is_open = False
+
+
+def _mark_sent(notifications):
+    InquiryNotification.objects.filter(pk__in=[n.pk for n in notifications]).update(
+        sent_at=timezone.now(), last_error='',
+    )
+
+
+def _mark_failed(notifications, error, result):
+    now = timezone.now()
+    for notification in notifications:
+        notification.attempts += 1
+        notification.last_error = f'{type(error).__name__}: {error}'[:1000]
+        notification.next_attempt_at = now + timedelta(seconds=backoff(notification.attempts))
+        if notification.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+            result.gave_up += 1
+        else:
+            result.failed += 1
+    InquiryNotification.objects.bulk_update(notifications, ['attempts', 'last_error', 'next_attempt_at'])
+
+
+def deliver(notifier, batch_size=None):
+    """Send every due notification once; returns a DeliveryResult."""
+    result = DeliveryResult()
+    notifications = claim_due(batch_size or settings.NOTIFICATION_BATCH_SIZE)
+    if not notifications:
+        return result
+
+    groups = build_messages(notifications, _recipient())
+    for index, (group, message) in enumerate(groups):
+        try:
+            notifier.send(message)
+        except CONNECTION_ERRORS as exc:
+            # No point trying the rest over a dead connection
+            remaining = [notification for pending, _ in groups[index:] for notification in pending]
+            logger.warning('SMTP connection failed, retrying %d notifications later: %s', len(remaining), exc)
+            notifier.close()
+            _mark_failed(remaining, exc, result)
+            break
+        except (smtplib.SMTPException, OSError) as exc:
+            logger.warning('Notification email rejected: %s', exc)
+            _mark_failed(group, exc, result)
+        else:
+            _mark_sent(group)
+            result.notified += len(group)
+            result.messages += 1
+    return result
+
+
+_delivery_lock = threading.Lock()
+_delivery_started = False
+
+
+def start_background_delivery():
+    """Deliver due notifications from a thread in this worker."""
+    global _delivery_started
+    with _delivery_lock:
+        if _delivery_started:
+            return
+        _delivery_started = True
+    thread = threading.Thread(target=_deliver_forever, name='inquiry-notifier', daemon=True)
+    thread.start()
+
+
+def _deliver_forever():
+    notifier = Notifier()
+    while True:
+        time.sleep(settings.NOTIFICATION_POLL_INTERVAL)
+        try:
+            result = deliver(notifier)
+            if result.messages or result.failed or result.gave_up:
+                logger.info('Delivered %s', result)
+            else:
+                # Idle: don't hold the SMTP connection open between polls
+                notifier.close()
+        except Exception:
+            logger.exception('Inquiry notification delivery failed')
+            notifier.close()
+        finally:
+            close_old_connections()
@@ -0,0 +1,71 @@
+"""
+Keyset pagination over the project ordering.
+
+Projects are ordered by (display_order, -created_at, pk); a cursor is the
+sort key of the last row on a page, so fetching the next page is an
+indexed range scan no matter how deep the visitor goes.
+"""
+
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+PROJECT_ORDERING = ['display_order', '-created_at', 'pk']
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(display_order, created_at, pk):
+    raw = json.dumps([display_order, created_at.isoformat(), pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        display_order, created_at, pk = json.loads(raw)
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            raise ValueError(token)
+        return int(display_order), created_at, int(pk)
+    except (ValueError, TypeError):
+        raise InvalidCursor(token)
+
+
+def _page_queryset(queryset, cursor, limit):
+    queryset = queryset.order_by(*PROJECT_ORDERING)
+    if cursor:
+        display_order, created_at, pk = decode_cursor(cursor)
+        # The redundant lower bound lets SQLite seek into the index instead
+        # of walking it from the first row
+        queryset = queryset.filter(display_order__gte=display_order).filter(
+            Q(display_order__gt=display_order)
+            | Q(display_order=display_order, created_at__lt=created_at)
+            | Q(display_order=display_order, created_at=created_at, pk__gt=pk)
+        )
+    # One extra row tells whether there is a next page
+    return queryset[:limit + 1]
+
+
+def _page(rows, limit):
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    if isinstance(last, dict):
+        return rows, encode_cursor(last['display_order'], last['created_at'], last['id'])
+    return rows, encode_cursor(last.display_order, last.created_at, last.pk)
+
+
+def keyset_page(queryset, cursor, limit):
+    """
+    Return (rows, next_cursor) for the page after `cursor`.
+
+    Works on model querysets and on .values() querysets, as long as the
+    sort fields are selected.
+    """
+    return _page(list(_page_queryset(queryset, cursor, limit)), limit)
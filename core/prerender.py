@@ -0,0 +1,193 @@
+"""
+Static prerendering of the public pages.
+
+`manage.py prerender` renders the home page and every project page to
+PRERENDER_ROOT as index.html files with gzip (and, when the brotli package
+is installed, brotli) variants next to them, the layout WhiteNoise serves.
+Each page is recorded in manifest.json with a fingerprint of the rows,
+templates and hashed static file names it depends on, so a rebuild only re-renders pages whose inputs
+changed and removes pages of deleted projects.
+
+PrerenderedPageMiddleware serves the files to anonymous visitors; with
+PRERENDER_ENABLED the build also runs after every content change.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.test.client import RequestFactory
+from django.urls import resolve, reverse
+
+from .models import Project, RelatedProject, SiteSettings, Skill
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+
+
+class BuildResult:
+
+    def __init__(self):
+        self.rendered = []
+        self.unchanged = 0
+        self.removed = []
+
+    def __str__(self):
+        return (
+            f'{len(self.rendered)} rendered, {self.unchanged} unchanged, '
+            f'{len(self.removed)} removed'
+        )
+
+
+def _digest(*parts):
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def _templates_fingerprint():
+    digest = hashlib.sha256()
+    paths = [
+        path
+        for directory in settings.TEMPLATES[0]['DIRS']
+        for path in sorted(Path(directory).rglob('*.html'))
+    ]
+    # Critical CSS from build_assets is inlined into the pages
+    paths += sorted(Path(settings.ASSET_BUILD_DIR).glob('critical/*.css'))
+    # and collectstatic's manifest names the hashed asset URLs they link to
+    manifest_name = getattr(staticfiles_storage, 'manifest_name', None)
+    if manifest_name and staticfiles_storage.exists(manifest_name):
+        paths.append(Path(staticfiles_storage.path(manifest_name)))
+    for path in paths:
+        digest.update(str(path).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def page_fingerprints():
+    """Map every prerenderable URL path to a fingerprint of its inputs."""
+    shared = _digest(
+        _templates_fingerprint(),
+        list(SiteSettings.objects.values_list()),
+    )
+    projects = list(
+        Project.objects.order_by('display_order', '-created_at', 'pk')
+        .values_list('pk', 'slug', 'updated_at')
+    )
+    related = {}
+    for project_id, related_id, updated_at in (
+        RelatedProject.objects.filter(rank__lt=3)
+        .order_by('project_id', 'rank')
+        .values_list('project_id', 'related_id', 'related__updated_at')
+    ):
+        related.setdefault(project_id, []).append((related_id, updated_at))
+
+    pages = {
+        reverse('core:home'): _digest(
+            shared,
+            list(Skill.objects.values_list()),
+            projects[:settings.HOME_PROJECTS_PAGE_SIZE + 1],
+        ),
+    }
+    for pk, slug, updated_at in projects:
+        pages[reverse('core:project_detail', args=[slug])] = _digest(
+            shared, pk, updated_at, related.get(pk, []),
+        )
+    return pages
+
+
+def _page_dir(root, url_path):
+    return root.joinpath(*[part for part in url_path.split('/') if part])
+
+
+def _write_atomic(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def _write_page(root, url_path, content):
+    index = _page_dir(root, url_path) / 'index.html'
+    _write_atomic(index, content)
+    _write_atomic(index.with_name('index.html.gz'), gzip.compress(content, 9, mtime=0))
+    if brotli is not None:
+        _write_atomic(index.with_name('index.html.br'), brotli.compress(content))
+
+
+def _remove_page(root, url_path):
+    directory = _page_dir(root, url_path)
+    for name in ('index.html', 'index.html.gz', 'index.html.br'):
+        (directory / name).unlink(missing_ok=True)
+    try:
+        directory.rmdir()
+    except OSError:
+        pass
+
+
+def render(url_path):
+    """
+    Return (status code, body) of an anonymous GET of url_path, rendered by
+    calling its view directly, past the middleware and the prerendered
+    files it would serve.
+    """
+    request = RequestFactory(HTTP_HOST=settings.ALLOWED_HOSTS[0]).get(url_path)
+    request.user = AnonymousUser()
+    match = resolve(request.path_info)
+    view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+    response = view(request, *match.args, **match.kwargs)
+    if response.streaming and response.is_async:
+        async def consume():
+            return b''.join([chunk async for chunk in response.streaming_content])
+        return response.status_code, async_to_sync(consume)()
+    return response.status_code, b''.join(response)
+
+
+def _render(url_path):
+    status, body = render(url_path)
+    if status != 200:
+        raise RuntimeError(f'{url_path} rendered with status {status}')
+    return body
+
+
+def _read_manifest(root):
+    try:
+        return json.loads((root / MANIFEST_NAME).read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def build(full=False, root=None):
+    """Bring PRERENDER_ROOT up to date; returns a BuildResult."""
+    root = Path(root or settings.PRERENDER_ROOT)
+    previous = _read_manifest(root)
+    current = page_fingerprints()
+    result = BuildResult()
+
+    for url_path, fingerprint in current.items():
+        if (
+            not full
+            and previous.get(url_path) == fingerprint
+            and (_page_dir(root, url_path) / 'index.html').exists()
+        ):
+            result.unchanged += 1
+            continue
+        _write_page(root, url_path, _render(url_path))
+        result.rendered.append(url_path)
+
+    for url_path in previous.keys() - current.keys():
+        _remove_page(root, url_path)
+        result.removed.append(url_path)
+
+    _write_atomic(root / MANIFEST_NAME, json.dumps(current, indent=1).encode())
+    return result
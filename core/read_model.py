@@ -0,0 +1,133 @@
+"""
+Materialized read model for the public pages.
+
+home, project_detail and project_list used to call
+SiteSettings.get_settings() (a get_or_create, so a potential write) on
+every request, and home regrouped every Skill by category each time.
+Instead, rebuild() stores one precomputed snapshot in ContentSnapshot:
+
+- the site settings, or their defaults if none were saved yet
+- the skills, in display order and grouped by category
+- the summaries and next cursor of the home page's first page of projects
+
+It runs from publish_content() after every content change, bumping the
+snapshot's version and giving it a new random build id. Each worker
+keeps the decoded snapshot in memory. current() only reads the build
+id, one primary key lookup, and reloads the data when it differs. The
+version alone isn't enough: it restarts at 1 whenever the row is
+recreated, for instance in a fresh database.
+"""
+
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ContentSnapshot, Project, SiteSettings, Skill
+from .pagination import keyset_page
+
+SNAPSHOT_KEY = 'public'
+SETTINGS_FIELDS = [field.attname for field in SiteSettings._meta.concrete_fields]
+SKILL_FIELDS = [field.attname for field in Skill._meta.concrete_fields]
+# What partials/project_card.html shows, plus the keyset sort fields
+PROJECT_FIELDS = [
+    'id', 'slug', 'title', 'tagline', 'thumbnail', 'live_url', 'github_url', 'tech_stack',
+    'category', 'is_featured', 'display_order', 'created_at',
+]
+
+
+class Snapshot:
+    """A decoded ContentSnapshot: unsaved model instances the templates use as usual."""
+
+    def __init__(self, version, build, data):
+        self.version = version
+        self.build = build
+        self.settings = SiteSettings(**data['settings'])
+        self.skills = [Skill(**fields) for fields in data['skills']]
+        self.skills_by_category = {}
+        for skill in self.skills:
+            self.skills_by_category.setdefault(skill.get_category_display(), []).append(skill)
+        self.projects = [
+            Project(**{**fields, 'created_at': parse_datetime(fields['created_at'])})
+            for fields in data['projects']
+        ]
+        self.next_cursor = data['next_cursor']
+
+
+def build_data():
+    """The snapshot's contents, as JSON-ready data."""
+    # The row get_settings() would create; read only, so page views never write
+    site_settings = SiteSettings.objects.filter(pk=1).values(*SETTINGS_FIELDS).first()
+    if site_settings is None:
+        site_settings = {
+            **{field.attname: field.get_default() for field in SiteSettings._meta.concrete_fields},
+            **SiteSettings.DEFAULTS,
+            'id': 1,
+        }
+    projects, next_cursor = keyset_page(
+        Project.objects.values(*PROJECT_FIELDS), None, settings.HOME_PROJECTS_PAGE_SIZE,
+    )
+    return {
+        'settings': site_settings,
+        'skills': list(Skill.objects.values(*SKILL_FIELDS)),
+        'projects': [{**fields, 'created_at': fields['created_at'].isoformat()} for fields in projects],
+        'next_cursor': next_cursor,
+    }
+
+
+def rebuild():
+    """Store a fresh snapshot under a new version."""
+    try:
+        with transaction.atomic():
+            # Bump the version first: the write lock it takes keeps a
+            # concurrent rebuild from storing older data under a newer version
+            if ContentSnapshot.objects.filter(key=SNAPSHOT_KEY).update(version=F('version') + 1):
+                ContentSnapshot.objects.filter(key=SNAPSHOT_KEY).update(
+                    data=build_data(), build=uuid.uuid4(), built_at=timezone.now(),
+                )
+            else:
+                ContentSnapshot.objects.create(key=SNAPSHOT_KEY, data=build_data())
+    except IntegrityError:
+        # Another worker created the first snapshot at the same moment
+        pass
+
+
+_current = None
+
+
+def _load(build):
+    global _current
+    snapshot = _current
+    if snapshot is None or snapshot.build != build:
+        version, build, data = ContentSnapshot.objects.values_list('version', 'build', 'data').get(key=SNAPSHOT_KEY)
+        snapshot = _current = Snapshot(version, build, data)
+    return snapshot
+
+
+def reset():
+    """Forget this worker's snapshot, so the next current() loads it again."""
+    global _current
+    _current = None
+
+
+def current():
+    """This worker's snapshot, reloaded if another one was built."""
+    build = ContentSnapshot.objects.filter(key=SNAPSHOT_KEY).values_list('build', flat=True).first()
+    if build is None:
+        rebuild()
+        return current()
+    return _load(build)
+
+
+async def acurrent():
+    """Async version of current()."""
+    build = await ContentSnapshot.objects.filter(key=SNAPSHOT_KEY).values_list('build', flat=True).afirst()
+    snapshot = _current
+    if snapshot is not None and snapshot.build == build:
+        return snapshot
+    # Building or decoding a new version is the rare path
+    return await sync_to_async(current)()
@@ -0,0 +1,162 @@
+"""
+Precomputed related-projects index.
+
+Every project keeps its RELATED_PROJECTS_INDEX_SIZE best neighbours in
+RelatedProject, scored by a category match plus the Jaccard overlap of
+tech_stack, so project_detail reads them with one indexed lookup. Saving or
+deleting a project only touches the lists it can affect: a project can
+only score against the ones sharing its category or a technology (found
+through the Project.technologies index), so those, plus the lists that
+held it before the change, are all an update loads.
+"""
+
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Project, RelatedProject
+
+CATEGORY_WEIGHT = 0.5
+
+
+def signature(category, tech_stack):
+    """What similarity() compares: the category and normalized technologies."""
+    technologies = {str(tech).strip().lower() for tech in tech_stack or []}
+    return category, frozenset(technologies - {''})
+
+
+def similarity(a, b):
+    (category_a, tech_a), (category_b, tech_b) = a, b
+    score = CATEGORY_WEIGHT if category_a == category_b else 0.0
+    union = tech_a | tech_b
+    if union:
+        score += len(tech_a & tech_b) / len(union)
+    return score
+
+
+def _rank_key(entry):
+    # Best score first, older project (lower pk) breaks ties
+    score, pk = entry
+    return score, -pk
+
+
+def neighbours(pk, signatures, size):
+    """The `size` best (score, pk) matches for project pk."""
+    own = signatures[pk]
+    scored = []
+    for other, other_signature in signatures.items():
+        if other != pk:
+            score = similarity(own, other_signature)
+            if score > 0:
+                scored.append((score, other))
+    return heapq.nlargest(size, scored, key=_rank_key)
+
+
+def _merge(current, pk, score, size):
+    """
+    Fold project pk's new score into an existing neighbour list.
+
+    Returns None when the list has to be recomputed: pk was in a full list
+    and its score dropped, so a project outside the list may now beat it.
+    """
+    old = next((s for s, other in current if other == pk), None)
+    if old is not None and len(current) >= size and score < old:
+        return None
+    entries = [entry for entry in current if entry[1] != pk]
+    if score > 0:
+        entries.append((score, pk))
+    return heapq.nlargest(size, entries, key=_rank_key)
+
+
+def _load_signatures(pks=None):
+    projects = Project.objects.all() if pks is None else Project.objects.filter(pk__in=pks)
+    return {
+        pk: signature(category, tech_stack)
+        for pk, category, tech_stack in projects.values_list('pk', 'category', 'tech_stack')
+    }
+
+
+def _scorable(pk):
+    """pk and the projects that can score above zero against it."""
+    links = Project.technologies.through.objects
+    shared = links.filter(technology_id__in=links.filter(project_id=pk).values('technology_id'))
+    return set(
+        Project.objects.filter(
+            Q(pk=pk)
+            | Q(category__in=Project.objects.filter(pk=pk).values('category'))
+            | Q(pk__in=shared.values('project_id'))
+        ).values_list('pk', flat=True)
+    )
+
+
+def _neighbours(pk, size):
+    return neighbours(pk, _load_signatures(_scorable(pk)), size)
+
+
+def _load_lists(pks):
+    lists = defaultdict(list)
+    rows = (
+        RelatedProject.objects.filter(project_id__in=pks)
+        .order_by('project_id', 'rank')
+        .values_list('project_id', 'score', 'related_id')
+    )
+    for project_id, score, related_id in rows:
+        lists[project_id].append((score, related_id))
+    return lists
+
+
+def _save(pk, entries):
+    RelatedProject.objects.filter(project_id=pk).delete()
+    RelatedProject.objects.bulk_create([
+        RelatedProject(project_id=pk, related_id=other, rank=rank, score=score)
+        for rank, (score, other) in enumerate(entries)
+    ])
+
+
+def update_project(pk):
+    """Refresh the index after project pk was created or changed."""
+    size = settings.RELATED_PROJECTS_INDEX_SIZE
+    # Lists that held pk may have to drop it, whatever it scores now
+    holders = set(RelatedProject.objects.filter(related_id=pk).values_list('project_id', flat=True))
+    signatures = _load_signatures(_scorable(pk) | holders)
+    if pk not in signatures:
+        return
+    others = signatures.keys() - {pk}
+    lists = _load_lists(others)
+    with transaction.atomic():
+        _save(pk, neighbours(pk, signatures, size))
+        for other in others:
+            current = lists.get(other, [])
+            updated = _merge(current, pk, similarity(signatures[other], signatures[pk]), size)
+            if updated is None:
+                updated = _neighbours(other, size)
+            if updated != current:
+                _save(other, updated)
+
+
+def refill_projects(pks):
+    """Recompute the lists that pointed at a deleted project."""
+    size = settings.RELATED_PROJECTS_INDEX_SIZE
+    with transaction.atomic():
+        for pk in pks:
+            signatures = _load_signatures(_scorable(pk))
+            if pk in signatures:
+                _save(pk, neighbours(pk, signatures, size))
+
+
+def rebuild_all():
+    """Recompute the whole index; returns the number of entries written."""
+    size = settings.RELATED_PROJECTS_INDEX_SIZE
+    signatures = _load_signatures()
+    entries = [
+        RelatedProject(project_id=pk, related_id=other, rank=rank, score=score)
+        for pk in signatures
+        for rank, (score, other) in enumerate(neighbours(pk, signatures, size))
+    ]
+    with transaction.atomic():
+        RelatedProject.objects.all().delete()
+        RelatedProject.objects.bulk_create(entries, batch_size=1000)
+    return len(entries)
@@ -0,0 +1,105 @@
+"""
+SQLite FTS5 full-text search over projects and contact inquiries.
+
+Each indexed table has an external-content FTS5 table next to it, kept in
+sync by triggers created in migration 0005, so bulk_create from the
+inquiry spool, admin edits and raw SQL all reach the index. Searches are
+MATCH lookups ranked by bm25 instead of LIKE '%term%' scans.
+
+SQLite drops a table's triggers when Django rebuilds the table for an
+ALTER it can't do in place, so run `manage.py rebuild_search_index` after
+such a migration. On databases without FTS5 (or not SQLite at all) the
+migration creates nothing and callers fall back to their LIKE search.
+"""
+
+import re
+from functools import lru_cache
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+# content table -> (FTS table, indexed columns, bm25 column weights)
+INDEXES = {
+    'core_project': ('core_project_fts', ['title', 'tagline', 'description', 'tech_stack'], [10.0, 5.0, 1.0, 3.0]),
+    'core_contactinquiry': (
+        'core_contactinquiry_fts', ['name', 'email', 'message', 'project_description'], [5.0, 5.0, 1.0, 1.0],
+    ),
+}
+
+TERM_RE = re.compile(r'\w+')
+MAX_TERMS = 8
+
+
+def create_statements(table):
+    """SQL creating the FTS table for `table`, its sync triggers and its initial contents."""
+    fts_table, columns, _ = INDEXES[table]
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    delete = (
+        f"INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    insert = f'INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.id, {new_values});'
+    return [
+        f"CREATE VIRTUAL TABLE {fts_table} USING fts5({column_list}, content='{table}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f'CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {table} BEGIN {insert} END',
+        f'CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {table} BEGIN {delete} END',
+        f'CREATE TRIGGER {fts_table}_au AFTER UPDATE ON {table} BEGIN {delete} {insert} END',
+        f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')",
+    ]
+
+
+def drop_statements(table):
+    fts_table = INDEXES[table][0]
+    return [
+        *[f'DROP TRIGGER IF EXISTS {fts_table}_{suffix}' for suffix in ('ai', 'ad', 'au')],
+        f'DROP TABLE IF EXISTS {fts_table}',
+    ]
+
+
+@lru_cache(maxsize=None)
+def is_indexed(table):
+    """Whether the FTS table for `table` exists in the default database."""
+    if connection.vendor != 'sqlite':
+        return False
+    return INDEXES[table][0] in connection.introspection.table_names()
+
+
+def match_expression(text):
+    """An FTS5 query matching rows that contain every word of `text` as a prefix."""
+    terms = TERM_RE.findall(text)[:MAX_TERMS]
+    # Quoting makes FTS5 operators in user input plain words
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def matching_ids(table, text):
+    """A subquery of the ids of `table` rows matching `text`, for pk__in lookups."""
+    fts_table = INDEXES[table][0]
+    return RawSQL(f'SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH %s', [match_expression(text)])
+
+
+def ranked_ids(table, text, limit):
+    """Ids of the best `limit` matches for `text`, best first."""
+    expression = match_expression(text)
+    if not expression:
+        return []
+    fts_table, _, weights = INDEXES[table]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH %s '
+            f'ORDER BY bm25({fts_table}, {", ".join(map(str, weights))}) LIMIT %s',
+            [expression, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class FullTextSearchMixin:
+    """ModelAdmin mixin answering the changelist search box from the FTS index."""
+
+    def get_search_results(self, request, queryset, search_term):
+        table = queryset.model._meta.db_table
+        if not match_expression(search_term) or not is_indexed(table):
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=matching_ids(table, search_term)), False
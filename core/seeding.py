@@ -0,0 +1,64 @@
+"""
+Bulk synthetic data for the performance tooling (check_query_plans, bench).
+
+Rows go in through bulk_create, so the related-projects index is not
+built; the technology M2M rows are written directly.
+"""
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import ContactInquiry, Project, Skill, Technology
+
+TECHNOLOGY_COUNT = 40
+
+
+def seed(projects=0, inquiries=0, skills=0, prefix='seed'):
+    now = timezone.now()
+    technologies = Technology.objects.bulk_create(
+        Technology(name=f'Tech {i}', key=f'tech {i}', project_count=projects // TECHNOLOGY_COUNT)
+        for i in range(TECHNOLOGY_COUNT)
+    ) if projects else []
+    created = Project.objects.bulk_create(
+        (
+            Project(
+                title=f'{prefix.title()} project {i}', slug=f'{prefix}-project-{i}',
+                tagline='Synthetic project', description='Synthetic project ' * 20,
+                thumbnail='https://example.com/t.png', live_url='https://example.com',
+                tech_stack=[f'Tech {i % TECHNOLOGY_COUNT}'], features=['One', 'Two'],
+                category='website' if i % 3 else 'django_app', is_featured=i % 50 == 0,
+                display_order=i % 20, created_at=now - timedelta(minutes=i),
+            )
+            for i in range(projects)
+        ),
+        batch_size=1000,
+    )
+    if projects:
+        # Linked by the same index that picked each tech_stack
+        through = Project.technologies.through
+        through.objects.bulk_create(
+            (
+                through(project_id=project.pk, technology_id=technologies[i % TECHNOLOGY_COUNT].pk)
+                for i, project in enumerate(created)
+            ),
+            batch_size=1000,
+        )
+    ContactInquiry.objects.bulk_create(
+        (
+            ContactInquiry(
+                inquiry_type='project' if i % 4 == 0 else 'general', name=f'Sender {i}',
+                email=f'sender{i}@example.com', message='Synthetic inquiry',
+                is_read=i % 3 == 0, created_at=now - timedelta(minutes=i),
+            )
+            for i in range(inquiries)
+        ),
+        batch_size=1000,
+    )
+    Skill.objects.bulk_create(
+        (
+            Skill(name=f'Skill {i}', icon='fas fa-code', category='backend', display_order=i % 10)
+            for i in range(skills)
+        ),
+        batch_size=1000,
+    )
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import prerender, read_model, related, technologies
+from .cache import invalidate_pages
+from .models import Project, RelatedProject, SiteSettings, Skill
+
+# Models whose rows end up on the public pages
+CONTENT_MODELS = (Project, Skill, SiteSettings)
+
+
+# Index receivers are connected first so the index is current by the time
+# the page cache is dropped.
+
+@receiver(post_save, sender=Project, dispatch_uid='sync_technologies')
+def sync_technologies(sender, instance, raw=False, **kwargs):
+    if not raw:
+        technologies.sync_project(instance)
+
+
+@receiver(post_save, sender=Project, dispatch_uid='update_related_index')
+def update_related_index(sender, instance, raw=False, **kwargs):
+    if not raw:
+        related.update_project(instance.pk)
+
+
+@receiver(pre_delete, sender=Project, dispatch_uid='remember_indexed_rows')
+def remember_indexed_rows(sender, instance, **kwargs):
+    instance._related_owners = list(
+        RelatedProject.objects.filter(related_id=instance.pk).values_list('project_id', flat=True)
+    )
+    instance._technology_pks = list(instance.technologies.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Project, dispatch_uid='refresh_indexes_after_delete')
+def refresh_indexes_after_delete(sender, instance, **kwargs):
+    related.refill_projects(getattr(instance, '_related_owners', []))
+    technologies.recount(getattr(instance, '_technology_pks', []))
+
+
+def publish_content():
+    # Before the page cache goes, so re-rendered pages see the new snapshot
+    read_model.rebuild()
+    invalidate_pages()
+    if settings.PRERENDER_ENABLED:
+        prerender.build()
+
+
+def content_changed(sender, using=None, **kwargs):
+    """Drop cached pages (and rebuild prerendered ones) once the change is committed."""
+    connection = transaction.get_connection(using)
+    # Once per transaction, however many rows it saves (an admin
+    # list_editable save, say). A callback queued in a savepoint that
+    # rolled back is gone from the list, so the next change queues it again.
+    if any(func is publish_content for _, func, _ in connection.run_on_commit):
+        return
+    transaction.on_commit(publish_content, using=using)
+
+
+for model in CONTENT_MODELS:
+    post_save.connect(content_changed, sender=model, dispatch_uid=f'content_changed_save_{model.__name__}')
+    post_delete.connect(content_changed, sender=model, dispatch_uid=f'content_changed_delete_{model.__name__}')
@@ -0,0 +1,257 @@
+"""
+Write-behind spool for contact inquiries.
+
+contact_submit appends validated inquiries to a local append-only file and
+answers right away. A flusher (the flush_inquiries command, or a background
+thread in each worker) drains the spool into ContactInquiry with
+group-committed bulk_create batches, so a burst of submissions costs a few
+SQLite write transactions instead of one per request.
+
+Appenders hold a shared lock while writing; the flusher takes the exclusive
+lock only long enough to rotate the active file aside, then drains it and
+records its progress in an offset file after every committed batch.
+
+A record that can't be read or saved is appended to rejected.ndjson as
+it was spooled, and the drain moves on. If a batch fails to insert, its
+rows are retried one at a time, so a single bad row can't hold back the
+rest of the queue. Errors that may pass, such as a locked database, leave
+the file to the next pass.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.exceptions import ValidationError
+from django.db import DataError, IntegrityError, close_old_connections, transaction
+from django.utils.dateparse import parse_datetime
+
+from .models import ContactInquiry
+from .notifications import queue_notifications
+
+logger = logging.getLogger(__name__)
+
+SPOOLED_FIELDS = [
+    'inquiry_type', 'name', 'email', 'message',
+    'budget', 'timeline', 'project_description', 'created_at',
+]
+
+
+class FlushResult:
+    """Outcome of one drain pass."""
+
+    def __init__(self, rows=0, batches=0, seconds=0.0, depth=0, skipped=0):
+        self.rows = rows
+        self.batches = batches
+        self.seconds = seconds
+        self.depth = depth
+        self.skipped = skipped
+
+    @property
+    def rate(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f'{self.rows} inquiries in {self.batches} batches '
+            f'({self.rate:.0f}/s), {self.depth} still queued'
+        )
+
+
+class InquirySpool:
+    """Append-only NDJSON spool of pending ContactInquiry rows."""
+
+    active_name = 'inquiries.ndjson'
+    draining_suffix = '.draining'
+    rejected_name = 'rejected.ndjson'
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.path = self.directory / self.active_name
+
+    @contextmanager
+    def _lock(self, name, operation):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.directory / name, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, operation)
+            yield
+        finally:
+            os.close(fd)
+
+    def append(self, instance):
+        """Durably queue an unsaved ContactInquiry."""
+        record = {field: getattr(instance, field) for field in SPOOLED_FIELDS}
+        line = (json.dumps(record, cls=DjangoJSONEncoder) + '\n').encode()
+        with self._lock('rotate.lock', fcntl.LOCK_SH):
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, line)
+                if settings.INQUIRY_SPOOL_FSYNC:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _rotate(self):
+        with self._lock('rotate.lock', fcntl.LOCK_EX):
+            if self.path.exists() and self.path.stat().st_size:
+                self.path.rename(self.directory / f'{time.time_ns()}{self.draining_suffix}')
+
+    def _pending_files(self):
+        return sorted(self.directory.glob(f'*{self.draining_suffix}'))
+
+    @staticmethod
+    def _offset_path(path):
+        return path.with_suffix('.offset')
+
+    def _read_offset(self, path):
+        try:
+            return int(self._offset_path(path).read_text())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_offset(self, path, offset):
+        tmp = self._offset_path(path).with_suffix('.tmp')
+        tmp.write_text(str(offset))
+        os.replace(tmp, self._offset_path(path))
+
+    def depth(self):
+        """Number of inquiries waiting to be flushed."""
+        if not self.directory.exists():
+            return 0
+        total = 0
+        for path in [*self._pending_files(), self.path]:
+            try:
+                with open(path, 'rb') as f:
+                    f.seek(self._read_offset(path) if path != self.path else 0)
+                    total += sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(65536), b''))
+            except FileNotFoundError:
+                pass
+        return total
+
+    def drain(self, batch_size=None):
+        """Move every queued inquiry into the database."""
+        batch_size = batch_size or settings.INQUIRY_SPOOL_BATCH_SIZE
+        result = FlushResult()
+        started = time.monotonic()
+        try:
+            with self._lock('flush.lock', fcntl.LOCK_EX | fcntl.LOCK_NB):
+                self._rotate()
+                for path in self._pending_files():
+                    self._drain_file(path, batch_size, result)
+        except BlockingIOError:
+            # Another worker is already flushing
+            pass
+        result.seconds = time.monotonic() - started
+        result.depth = self.depth()
+        return result
+
+    def _drain_file(self, path, batch_size, result):
+        offset = self._read_offset(path)
+        batch = []
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Torn write from a crashed appender
+                    result.skipped += 1
+                    break
+                offset += len(line)
+                try:
+                    batch.append((line, self._to_instance(json.loads(line))))
+                except (ValueError, TypeError, KeyError, ValidationError) as exc:
+                    self._reject(path, line, exc, result)
+                    continue
+                if len(batch) >= batch_size:
+                    self._commit(path, batch, offset, result)
+                    batch = []
+        if batch:
+            self._commit(path, batch, offset, result)
+        path.unlink()
+        self._offset_path(path).unlink(missing_ok=True)
+
+    @staticmethod
+    def _save(instances):
+        with transaction.atomic():
+            # SQLite hands back the new ids, which the outbox rows need
+            queue_notifications(ContactInquiry.objects.bulk_create(instances))
+
+    def _commit(self, path, batch, offset, result):
+        try:
+            self._save([instance for _, instance in batch])
+            result.rows += len(batch)
+        except (IntegrityError, DataError):
+            for line, instance in batch:
+                try:
+                    self._save([instance])
+                    result.rows += 1
+                except (IntegrityError, DataError) as exc:
+                    self._reject(path, line, exc, result)
+        self._write_offset(path, offset)
+        result.batches += 1
+
+    def _reject(self, path, line, exc, result):
+        logger.warning('Rejected spool record from %s: %s', path.name, exc)
+        with open(self.directory / self.rejected_name, 'ab') as f:
+            f.write(line)
+        result.skipped += 1
+
+    @staticmethod
+    def _to_instance(record):
+        record = {field: record[field] for field in SPOOLED_FIELDS}
+        created_at = record['created_at'] = parse_datetime(record['created_at'])
+        if created_at is None:
+            raise ValueError('created_at is not a datetime')
+        instance = ContactInquiry(**record)
+        instance.clean_fields()
+        return instance
+
+
+_spool = None
+_flusher_lock = threading.Lock()
+_flusher_started = False
+
+
+def get_spool():
+    global _spool
+    if _spool is None:
+        _spool = InquirySpool(settings.INQUIRY_SPOOL_DIR)
+    return _spool
+
+
+def enqueue_inquiry(instance):
+    """Queue an unsaved inquiry and make sure this worker flushes the spool."""
+    get_spool().append(instance)
+    if settings.INQUIRY_SPOOL_AUTOFLUSH:
+        start_background_flusher()
+
+
+def start_background_flusher():
+    global _flusher_started
+    with _flusher_lock:
+        if _flusher_started:
+            return
+        _flusher_started = True
+    thread = threading.Thread(target=_flush_forever, name='inquiry-spool-flusher', daemon=True)
+    thread.start()
+
+
+def _flush_forever():
+    spool = get_spool()
+    while True:
+        time.sleep(settings.INQUIRY_SPOOL_FLUSH_INTERVAL)
+        try:
+            result = spool.drain()
+            if result.rows:
+                logger.info('Flushed %s', result)
+        except Exception:
+            logger.exception('Inquiry spool flush failed')
+        finally:
+            close_old_connections()
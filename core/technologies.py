@@ -0,0 +1,95 @@
+"""
+Normalized technology index.
+
+Project.tech_stack is a JSON list, so "all Django projects" would be a
+full-table JSON scan. Each save mirrors the list into Technology rows
+linked through Project.technologies and refreshes the precomputed
+project_count used by the facet sidebar. Bulk imports, which skip
+save(), call link_projects() per batch and recount() once at the end.
+"""
+
+from django.db.models import Count
+
+from .models import Project, Technology
+
+
+def technology_key(name):
+    return ' '.join(str(name).split()).casefold()
+
+
+def _counts(pks):
+    return dict(
+        Technology.objects.filter(pk__in=pks)
+        .annotate(count=Count('projects'))
+        .values_list('pk', 'count')
+    )
+
+
+def recount(pks):
+    """Refresh project_count for the given technologies."""
+    technologies = list(Technology.objects.filter(pk__in=pks))
+    counts = _counts(pks)
+    for technology in technologies:
+        technology.project_count = counts.get(technology.pk, 0)
+    Technology.objects.bulk_update(technologies, ['project_count'])
+
+
+def _names(tech_stack):
+    """{key: display name} for a tech_stack list."""
+    names = {}
+    for name in tech_stack or []:
+        key = technology_key(name)
+        if key:
+            names.setdefault(key, ' '.join(str(name).split()))
+    return names
+
+
+def sync_project(project):
+    """Mirror project.tech_stack into project.technologies."""
+    names = _names(project.tech_stack)
+
+    Technology.objects.bulk_create(
+        [Technology(name=name, key=key) for key, name in names.items()],
+        ignore_conflicts=True,
+    )
+    wanted = set(Technology.objects.filter(key__in=names).values_list('pk', flat=True))
+    current = set(project.technologies.values_list('pk', flat=True))
+    if wanted != current:
+        project.technologies.set(wanted)
+        recount(wanted ^ current)
+
+
+def link_projects(rows):
+    """
+    Mirror tech_stack into the technology links for many (pk, tech_stack)
+    pairs in a fixed number of queries. Returns the technologies whose
+    project_count needs a recount().
+    """
+    wanted_keys = {}
+    names = {}
+    for pk, tech_stack in rows:
+        project_names = _names(tech_stack)
+        wanted_keys[pk] = project_names
+        for key, name in project_names.items():
+            names.setdefault(key, name)
+    if not wanted_keys:
+        return set()
+
+    Technology.objects.bulk_create(
+        [Technology(name=name, key=key) for key, name in names.items()],
+        ignore_conflicts=True,
+    )
+    pks_by_key = dict(Technology.objects.filter(key__in=names).values_list('key', 'pk'))
+    through = Project.technologies.through
+    links = through.objects.filter(project_id__in=wanted_keys)
+    current = set(links.values_list('technology_id', flat=True))
+    links.delete()
+    through.objects.bulk_create(
+        [
+            through(project_id=pk, technology_id=pks_by_key[key])
+            for pk, project_names in wanted_keys.items()
+            for key in project_names
+        ],
+        batch_size=1000,
+    )
+    return current | set(pks_by_key.values())
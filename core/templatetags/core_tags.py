@@ -0,0 +1,77 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from core import assets, icons, images
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(url, alt='', sizes='100vw', css_class='', loading='lazy'):
+    """A <picture> with AVIF/WebP/JPEG width variants of a project image URL."""
+    if not url:
+        return ''
+    class_attr = format_html(' class="{}"', css_class) if css_class else ''
+    if not images.pipeline_enabled():
+        return format_html('<img src="{}" alt="{}" loading="{}"{}>', url, alt, loading, class_attr)
+
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        [
+            (images.FORMATS[fmt][1], images.srcset(url, fmt), sizes)
+            for fmt in images.available_formats() if fmt != 'jpeg'
+        ],
+    )
+    dimensions = images.source_dimensions(url)
+    size_attrs = format_html(' width="{}" height="{}"', *dimensions) if dimensions else ''
+    return format_html(
+        '<picture class="responsive">{}<img src="{}" srcset="{}" sizes="{}" alt="{}" '
+        'loading="{}" decoding="async"{}{}></picture>',
+        sources,
+        images.derivative_url(url, 800, 'jpeg'),
+        images.srcset(url, 'jpeg'),
+        sizes, alt, loading, class_attr, size_attrs,
+    )
+
+
+@register.simple_tag
+def icon_stylesheet():
+    """The subset icon stylesheet from build_icons, or the full CDN one."""
+    if icons.subset_icons() is not None:
+        href = static(f'{settings.ICON_STATIC_PREFIX}/{icons.STYLESHEET_NAME}')
+    else:
+        href = settings.FONT_AWESOME_CDN_URL
+    return format_html('<link rel="stylesheet" href="{}">', href)
+
+
+@register.simple_tag
+def stylesheets(page=None):
+    """
+    Inline the page's critical CSS and load the full stylesheet without
+    blocking render; before build_assets has run, link style.css as usual.
+    """
+    if not assets.built_assets():
+        return format_html('<link rel="stylesheet" href="{}">', static(assets.STYLESHEET))
+    href = static(f'{settings.ASSET_STATIC_PREFIX}/{assets.SITE_CSS_NAME}')
+    critical = assets.critical_css(page) if page else None
+    if critical is None:
+        return format_html('<link rel="stylesheet" href="{}">', href)
+    return format_html(
+        '<style>{}</style>'
+        '<link rel="preload" href="{}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+        '<noscript><link rel="stylesheet" href="{}"></noscript>',
+        mark_safe(critical), href, href,
+    )
+
+
+@register.simple_tag
+def scripts():
+    """The minified bundle from build_assets, or the source files it is built from."""
+    if assets.built_assets():
+        paths = [f'{settings.ASSET_STATIC_PREFIX}/{assets.BUNDLE_NAME}']
+    else:
+        paths = assets.JS_BUNDLE
+    return format_html_join('\n', '<script src="{}"></script>', [(static(path),) for path in paths])
@@ -0,0 +1,165 @@
+import base64
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+
+from . import admission, read_model, spool
+from .cache import get_content_state
+from .models import ContactInquiry, Skill
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
+from .seeding import seed
+
+
+class IsolatedStateTestCase(TestCase):
+    """
+    Points the runtime state that normally lives in VAR_DIR (spool,
+    admission store, cache) at a throwaway directory and forgets the
+    module-level handles to it.
+    """
+
+    def setUp(self):
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        overrides = override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+            INQUIRY_SPOOL_DIR=directory / 'spool',
+            INQUIRY_SPOOL_AUTOFLUSH=False,
+            ADMISSION_DB_PATH=directory / 'admission.sqlite3',
+            NOTIFICATION_AUTODELIVER=False,
+            METRICS_ENABLED=False,
+            PRERENDER_ENABLED=False,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        cache.clear()
+        for module, name in [(spool, '_spool'), (admission, '_store')]:
+            patcher = mock.patch.object(module, name, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        read_model.reset()
+        self.addCleanup(read_model.reset)
+        self.directory = directory
+        self.client = Client(HTTP_HOST='localhost')
+
+
+class PageCacheTests(IsolatedStateTestCase):
+
+    def test_content_change_invalidates_cached_pages(self):
+        # bulk_create sends no signals, so the change below is the only one
+        # queued in the test's transaction (publishing is once per transaction)
+        Skill.objects.bulk_create([Skill(name='Django', category='backend')])
+        self.assertContains(self.client.get('/'), 'Django')
+        version = get_content_state()[0]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(name='Elixir', category='backend')
+
+        self.assertNotEqual(get_content_state()[0], version)
+        self.assertContains(self.client.get('/'), 'Elixir')
+
+    def test_unchanged_content_is_served_from_the_cache(self):
+        self.client.get('/')
+        # Written behind the signals' back, so only a fresh render shows it
+        Skill.objects.bulk_create([Skill(name='Elixir', category='backend')])
+        self.assertNotContains(self.client.get('/'), 'Elixir')
+
+
+class CursorTests(IsolatedStateTestCase):
+
+    def test_round_trip(self):
+        now = timezone.now()
+        self.assertEqual(decode_cursor(encode_cursor(3, now, 42)), (3, now, 42))
+
+    def test_malformed_cursors_are_rejected(self):
+        for token in ['', 'not base64!', 'bm90IGpzb24', encode_cursor(1, timezone.now(), 2)[:-4]]:
+            with self.subTest(token=token), self.assertRaises(InvalidCursor):
+                decode_cursor(token)
+        bad_date = json.dumps([1, 'yesterday', 2]).encode()
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(base64.urlsafe_b64encode(bad_date).decode())
+
+    def test_views_answer_400_for_a_bad_cursor(self):
+        seed(projects=10)
+        self.assertEqual(self.client.get('/projects/cards/?cursor=garbage').status_code, 400)
+        response = self.client.get('/api/projects/?cursor=garbage')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.json()['errors'])
+
+
+class SpoolTests(IsolatedStateTestCase):
+
+    def inquiry(self, name='Sender'):
+        return ContactInquiry(
+            name=name, email='sender@example.com', message='Hello', created_at=timezone.now(),
+        )
+
+    def test_bad_records_are_quarantined_and_the_rest_saved(self):
+        queue = spool.get_spool()
+        queue.append(self.inquiry('First'))
+        with open(queue.path, 'ab') as f:
+            f.write(b'not json\n')
+            f.write(json.dumps({'name': 'No other fields'}).encode() + b'\n')
+        queue.append(self.inquiry('Second'))
+
+        with self.assertLogs('core.spool', 'WARNING') as logs:
+            result = queue.drain()
+
+        self.assertEqual(result.rows, 2)
+        self.assertEqual(result.skipped, 2)
+        self.assertEqual(set(ContactInquiry.objects.values_list('name', flat=True)), {'First', 'Second'})
+        rejected = (queue.directory / queue.rejected_name).read_bytes().splitlines()
+        self.assertEqual(rejected[0], b'not json')
+        self.assertEqual(queue.depth(), 0)
+        self.assertEqual(len(logs.output), 2)
+
+    def test_failed_batch_is_retried_row_by_row(self):
+        queue = spool.get_spool()
+        for name in ['First', 'Broken', 'Third']:
+            queue.append(self.inquiry(name))
+        save = spool.InquirySpool._save
+
+        def failing_save(instances):
+            if any(instance.name == 'Broken' for instance in instances):
+                raise IntegrityError('broken row')
+            save(instances)
+
+        with mock.patch.object(spool.InquirySpool, '_save', staticmethod(failing_save)), \
+                self.assertLogs('core.spool', 'WARNING'):
+            result = queue.drain()
+
+        self.assertEqual(result.rows, 2)
+        self.assertEqual(set(ContactInquiry.objects.values_list('name', flat=True)), {'First', 'Third'})
+        self.assertIn(b'"Broken"', (queue.directory / queue.rejected_name).read_bytes())
+
+
+class AdmissionTests(IsolatedStateTestCase):
+
+    data = {'inquiry_type': 'general', 'name': 'Sender', 'email': 'sender@example.com', 'message': 'Hello'}
+
+    @override_settings(ADMISSION_IP_RATE=(0.001, 1))
+    def test_over_the_limit_is_rejected_without_reading_the_body(self):
+        with mock.patch.object(
+            admission, 'request_fingerprint', wraps=admission.request_fingerprint,
+        ) as fingerprint:
+            self.assertEqual(self.client.post('/contact/', self.data).status_code, 200)
+            with self.assertLogs('django.request', 'WARNING'):
+                response = self.client.post('/contact/', {**self.data, 'message': 'Again'})
+
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertEqual(fingerprint.call_count, 1)
+        counters = admission.get_store().counters()
+        self.assertEqual(counters[admission.ADMITTED], 1)
+        self.assertEqual(counters[admission.REJECTED_IP], 1)
+
+    def test_resubmission_is_answered_as_a_duplicate(self):
+        self.client.post('/contact/', self.data)
+        response = self.client.post('/contact/', self.data)
+        self.assertTrue(response.json()['duplicate'])
@@ -1,11 +1,25 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'core'
 
+# Under ASGI the busiest views run natively async (see SERVING_MODE)
+if settings.ASYNC_VIEWS:
+    home, project_detail, contact_submit = views.async_home, views.async_project_detail, views.async_contact_submit
+else:
+    home, project_detail, contact_submit = views.home, views.project_detail, views.contact_submit
+
 urlpatterns = [
-    path('', views.home, name='home'),
-    path('project/<slug:slug>/', views.project_detail, name='project_detail'),
-    path('contact/', views.contact_submit, name='contact_submit'),
+    path('', home, name='home'),
+    path('projects/', views.project_list, name='project_list'),
+    path('projects/cards/', views.project_cards, name='project_cards'),
+    path('api/projects/', views.project_api, name='project_api'),
+    path('search/', views.project_search, name='project_search'),
+    path('project/<slug:slug>/', project_detail, name='project_detail'),
+    path('contact/', contact_submit, name='contact_submit'),
+    path('csrf/', views.csrf_token, name='csrf_token'),
+    path('metrics', views.metrics_view, name='metrics'),
+    path('img/<str:token>/<int:width>.<str:extension>', views.responsive_image, name='responsive_image'),
     path('seed-data/', views.seed_data, name='seed_data'),
 ]
@@ -1,148 +1,368 @@
-from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+import asyncio
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings as django_settings
+from django.core.paginator import Paginator
+from django.db.models import Exists, OuterRef, Q
+from django.shortcuts import aget_object_or_404, render, get_object_or_404
+from django.urls import reverse
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_GET, require_POST
+from django.middleware.csrf import get_token
+from django.views.decorators.cache import cache_control, never_cache
 from django.views.decorators.csrf import csrf_protect
-from .models import Project, Skill, SiteSettings, ContactInquiry
+from .models import Project, RelatedProject, ContactInquiry, Technology
 from .forms import ContactForm, ProjectInquiryForm
+from . import images, metrics, read_model, search
+from .admission import admission_controlled
+from .cache import cache_anonymous_page
+from .content import SEED_FIXTURE, import_file
+from .hints import arender_page, render_page
+from .notifications import save_inquiry
+from .pagination import InvalidCursor, keyset_page
+from .spool import enqueue_inquiry
+from .technologies import technology_key
 
 
+@cache_anonymous_page
 def home(request):
     """Home page with all portfolio sections."""
-    settings = SiteSettings.get_settings()
-    projects = Project.objects.all()
-    featured_projects = projects.filter(is_featured=True)
-    skills = Skill.objects.all()
+    # Settings, skills and the first page of cards come from the read model
+    # (see read_model.py), so a render costs one version lookup
+    snapshot = read_model.current()
+    featured_projects = Project.objects.filter(is_featured=True)
+    return render_page(request, 'home.html', _home_context(snapshot, featured_projects))
 
-    # Group skills by category
-    skills_by_category = {}
-    for skill in skills:
-        category = skill.get_category_display()
-        if category not in skills_by_category:
-            skills_by_category[category] = []
-        skills_by_category[category].append(skill)
 
-    context = {
-        'settings': settings,
-        'projects': projects,
+@cache_anonymous_page
+async def async_home(request):
+    """Async version of home()."""
+    snapshot = await read_model.acurrent()
+    # Left lazy, as in home(): the template doesn't use it today
+    featured_projects = Project.objects.filter(is_featured=True)
+    return await arender_page(request, 'home.html', _home_context(snapshot, featured_projects))
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+def _home_context(snapshot, featured_projects):
+    return {
+        'settings': snapshot.settings,
+        'projects': snapshot.projects,
+        'next_cursor': snapshot.next_cursor,
         'featured_projects': featured_projects,
-        'skills': skills,
-        'skills_by_category': skills_by_category,
+        'skills': snapshot.skills,
+        'skills_by_category': snapshot.skills_by_category,
         'contact_form': ContactForm(),
         'project_form': ProjectInquiryForm(),
     }
-    return render(request, 'home.html', context)
 
 
+@cache_anonymous_page
 def project_detail(request, slug):
     """Individual project detail page."""
     project = get_object_or_404(Project, slug=slug)
-    settings = SiteSettings.get_settings()
+    settings = read_model.current().settings
 
-    # Get related projects (same category, excluding current)
-    related_projects = Project.objects.filter(
-        category=project.category
-    ).exclude(pk=project.pk)[:3]
+    # Related projects come from the precomputed index (see related.py)
+    related_projects = [
+        entry.related for entry in project.related_entries.select_related('related')[:3]
+    ]
 
     context = {
         'project': project,
         'settings': settings,
         'related_projects': related_projects,
+        'gallery': _gallery(project),
+        'gallery_sources': _gallery_sources(),
     }
-    return render(request, 'project_detail.html', context)
+    return render_page(request, 'project_detail.html', context)
+
+
+@cache_anonymous_page
+async def async_project_detail(request, slug):
+    """Async version of project_detail(); the independent queries run concurrently."""
+    # Related entries are looked up by slug so they needn't wait for the project
+    project, snapshot, related_projects = await asyncio.gather(
+        aget_object_or_404(Project, slug=slug),
+        read_model.acurrent(),
+        _alist(
+            RelatedProject.objects.filter(project__slug=slug)
+            .select_related('related').order_by('rank')[:3]
+        ),
+    )
+    context = {
+        'project': project,
+        'settings': snapshot.settings,
+        'related_projects': [entry.related for entry in related_projects],
+        'gallery': _gallery(project),
+        'gallery_sources': _gallery_sources(),
+    }
+    return await arender_page(request, 'project_detail.html', context)
+
+
+def _gallery_sources():
+    """(format, MIME type) of the <source>s the gallery's <picture>s offer before the JPEG <img>."""
+    if not images.pipeline_enabled():
+        return []
+    return [(fmt, images.FORMATS[fmt][1]) for fmt in images.available_formats() if fmt != 'jpeg']
+
+
+def _gallery(project):
+    """
+    Screenshots for the Alpine gallery. With the image pipeline, `srcset`
+    is the JPEG fallback and `sources` the srcset per _gallery_sources()
+    format, which browsers that can't decode them skip.
+    """
+    gallery = []
+    for url in project.screenshots:
+        slide = {'src': url, 'srcset': '', 'sources': {}}
+        if images.pipeline_enabled():
+            slide['src'] = images.derivative_url(url, 1200, 'jpeg')
+            slide['srcset'] = images.srcset(url, 'jpeg')
+            slide['sources'] = {fmt: images.srcset(url, fmt) for fmt, _ in _gallery_sources()}
+        gallery.append(slide)
+    return gallery
+
+
+@cache_anonymous_page
+def project_list(request):
+    """Projects filtered by technology (?tech=, repeatable) and category."""
+    settings = read_model.current().settings
+    projects = Project.objects.all()
+
+    selected_technologies = [name for name in request.GET.getlist('tech') if name.strip()]
+    selected_keys = [technology_key(name) for name in selected_technologies]
+    for key in selected_keys:
+        # EXISTS rather than a join: SQLite walks the ordering index and
+        # stops at the page, where a join sorts every project using key
+        projects = projects.filter(Exists(
+            Project.technologies.through.objects.filter(project_id=OuterRef('pk'), technology__key=key)
+        ))
+
+    selected_category = request.GET.get('category', '')
+    if selected_category in dict(Project.CATEGORY_CHOICES):
+        projects = projects.filter(category=selected_category)
+    else:
+        selected_category = ''
+
+    query = request.GET.copy()
+    query.pop('page', None)
+    query_string = query.urlencode()
+
+    context = {
+        'settings': settings,
+        'page_obj': Paginator(projects, 24).get_page(request.GET.get('page')),
+        'technologies': Technology.objects.filter(project_count__gt=0),
+        'categories': Project.CATEGORY_CHOICES,
+        'selected_technologies': selected_technologies,
+        'selected_keys': selected_keys,
+        'selected_category': selected_category,
+        'query_string': f'{query_string}&' if query_string else '',
+    }
+    return render_page(request, 'project_list.html', context)
+
+
+@cache_anonymous_page
+def project_cards(request):
+    """Home page project cards for "Load more" and the category buttons (?cursor=, ?category=)."""
+    projects = Project.objects.all()
+    category = request.GET.get('category', '')
+    if category in dict(Project.CATEGORY_CHOICES):
+        projects = projects.filter(category=category)
+    try:
+        projects, next_cursor = keyset_page(
+            projects, request.GET.get('cursor'), django_settings.HOME_PROJECTS_PAGE_SIZE
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    return render(request, 'partials/project_cards.html', {
+        'projects': projects,
+        'next_cursor': next_cursor,
+    })
+
+
+API_PROJECT_FIELDS = [
+    'id', 'slug', 'title', 'tagline', 'category', 'thumbnail', 'screenshots',
+    'live_url', 'github_url', 'tech_stack', 'features', 'is_featured',
+    'display_order', 'created_at', 'updated_at',
+]
+
 
+@require_GET
+def project_api(request):
+    """Keyset-paginated projects as JSON (?cursor=, ?limit=, ?fields=a,b)."""
+    fields = [field for field in request.GET.get('fields', '').split(',') if field] or API_PROJECT_FIELDS
+    unknown = [field for field in fields if field not in API_PROJECT_FIELDS]
+    if unknown:
+        return JsonResponse({
+            'success': False,
+            'errors': {'fields': [f'Unknown field: {field}' for field in unknown]}
+        }, status=400)
+
+    try:
+        limit = min(max(int(request.GET.get('limit', 12)), 1), 100)
+    except ValueError:
+        limit = 12
+
+    # Sparse fieldset, plus the sort key the cursor is built from
+    queryset = Project.objects.values(*dict.fromkeys([*fields, 'id', 'display_order', 'created_at']))
+    try:
+        rows, next_cursor = keyset_page(queryset, request.GET.get('cursor'), limit)
+    except InvalidCursor:
+        return JsonResponse({'success': False, 'errors': {'cursor': ['Invalid cursor']}}, status=400)
 
+    next_url = None
+    if next_cursor:
+        query = request.GET.copy()
+        query['cursor'] = next_cursor
+        next_url = request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+    response = JsonResponse({
+        'results': [{field: row[field] for field in fields} for row in rows],
+        'next': next_url,
+    })
+    etag = quote_etag(hashlib.md5(response.content).hexdigest())
+    response = get_conditional_response(request, etag=etag, response=response)
+    response['ETag'] = etag
+    return response
+
+
+@admission_controlled
 @require_POST
 @csrf_protect
 def contact_submit(request):
     """Handle contact form submission via AJAX."""
-    form_type = request.POST.get('form_type', 'general')
+    form = _contact_form(request.POST)
 
-    if form_type == 'project':
-        form = ProjectInquiryForm(request.POST)
-    else:
-        form = ContactForm(request.POST)
+    if form.is_valid():
+        if django_settings.INQUIRY_SPOOL_ENABLED:
+            enqueue_inquiry(form.save(commit=False))
+        else:
+            save_inquiry(form.save(commit=False))
+    return _contact_response(form)
 
+
+@admission_controlled
+@require_POST
+@csrf_protect
+async def async_contact_submit(request):
+    """Async version of contact_submit()."""
+    form = _contact_form(request.POST)
+
+    # Validation doesn't query: ContactInquiry has no unique fields
+    if form.is_valid():
+        if django_settings.INQUIRY_SPOOL_ENABLED:
+            # An append (and maybe an fsync) to the spool file
+            await sync_to_async(enqueue_inquiry)(form.save(commit=False))
+        else:
+            # The inquiry and its outbox row share a transaction, which needs a thread
+            await sync_to_async(save_inquiry)(form.save(commit=False))
+    return _contact_response(form)
+
+
+def _contact_form(data):
+    if data.get('form_type', 'general') == 'project':
+        return ProjectInquiryForm(data)
+    return ContactForm(data)
+
+
+def _contact_response(form):
     if form.is_valid():
-        form.save()
         return JsonResponse({
             'success': True,
             'message': 'Thank you for your message! I\'ll get back to you soon.'
         })
-    else:
-        return JsonResponse({
-            'success': False,
-            'errors': form.errors
-        }, status=400)
+    return JsonResponse({
+        'success': False,
+        'errors': form.errors
+    }, status=400)
 
 
-def seed_data(request):
-    """Seed initial data for the portfolio."""
-    # Create site settings if not exists
-    settings = SiteSettings.get_settings()
-    settings.name = "Mohamed Ali Hussien"
-    settings.title = "Full Stack Developer"
-    settings.bio = """Passionate Full Stack Developer with expertise in Django, Python, and modern web technologies.
-    I build scalable web applications that solve real-world problems. Currently focused on creating
-    exceptional digital experiences that combine clean code with beautiful design."""
-    settings.email = "mohammadhussienzo90@gmail.com"
-    settings.github_url = "https://github.com/mohammadhussienzo90-collab"
-    settings.save()
-
-    # Create skills
-    skills_data = [
-        {'name': 'Python', 'icon': 'fab fa-python', 'category': 'backend', 'proficiency': 95},
-        {'name': 'Django', 'icon': 'fas fa-cube', 'category': 'backend', 'proficiency': 90},
-        {'name': 'JavaScript', 'icon': 'fab fa-js', 'category': 'frontend', 'proficiency': 85},
-        {'name': 'HTML/CSS', 'icon': 'fab fa-html5', 'category': 'frontend', 'proficiency': 90},
-        {'name': 'PostgreSQL', 'icon': 'fas fa-database', 'category': 'database', 'proficiency': 85},
-        {'name': 'SQLite', 'icon': 'fas fa-database', 'category': 'database', 'proficiency': 90},
-        {'name': 'Git', 'icon': 'fab fa-git-alt', 'category': 'tools', 'proficiency': 90},
-        {'name': 'Docker', 'icon': 'fab fa-docker', 'category': 'tools', 'proficiency': 75},
-        {'name': 'REST APIs', 'icon': 'fas fa-plug', 'category': 'backend', 'proficiency': 90},
-        {'name': 'Tailwind CSS', 'icon': 'fas fa-wind', 'category': 'frontend', 'proficiency': 85},
-    ]
+@cache_control(public=True, max_age=60 * 60 * 24 * 365, immutable=True)
+def responsive_image(request, token, width, extension):
+    """A resized/re-encoded derivative of a signed project image URL."""
+    formats = {ext: fmt for fmt, (ext, _, _) in images.FORMATS.items()}
+    fmt = formats.get(extension)
+    url = images.unsign(token)
+    if (
+        not images.pipeline_enabled()
+        or url is None
+        or width not in django_settings.IMAGE_WIDTHS
+        or fmt not in images.available_formats()
+    ):
+        raise Http404('No such image')
+    try:
+        path = images.derivative(url, width, fmt)
+    except (images.ImageFetchError, OSError) as exc:
+        raise Http404(str(exc))
+    return FileResponse(open(path, 'rb'), content_type=images.FORMATS[fmt][1])
+
+
+SEARCH_RESULT_FIELDS = ['slug', 'title', 'tagline', 'category', 'thumbnail', 'tech_stack']
+
+
+@require_GET
+@cache_anonymous_page
+def project_search(request):
+    """Projects matching ?q= (every word as a prefix), best match first, as JSON."""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
 
-    for i, skill_data in enumerate(skills_data):
-        Skill.objects.update_or_create(
-            name=skill_data['name'],
-            defaults={**skill_data, 'display_order': i}
+    if not search.match_expression(query):
+        rows = []
+    elif search.is_indexed(Project._meta.db_table):
+        ids = search.ranked_ids(Project._meta.db_table, query, limit)
+        by_id = {row['id']: row for row in Project.objects.filter(pk__in=ids).values('id', *SEARCH_RESULT_FIELDS)}
+        rows = [by_id[pk] for pk in ids if pk in by_id]
+    else:
+        rows = list(
+            Project.objects.filter(Q(title__icontains=query) | Q(tagline__icontains=query))
+            .values('id', *SEARCH_RESULT_FIELDS)[:limit]
         )
 
-    # Create Egy360 project
-    Project.objects.update_or_create(
-        slug='egy360',
-        defaults={
-            'title': 'Egy360',
-            'tagline': 'Discover Egypt - A comprehensive tourism and travel platform',
-            'description': """Egy360 is a full-featured tourism platform showcasing Egypt's rich heritage,
-            from ancient pyramids to modern attractions. Built with Django, it features an elegant UI,
-            comprehensive destination guides, tour booking capabilities, and a dynamic content management system.
-
-            The platform includes interactive maps, curated travel itineraries, hotel recommendations,
-            and detailed articles about Egyptian history and culture. Designed with both tourists and
-            travel agencies in mind, Egy360 provides a seamless experience for planning the perfect Egyptian adventure.""",
-            'thumbnail': 'https://images.unsplash.com/photo-1539768942893-daf53e448371?w=800',
-            'screenshots': [
-                'https://images.unsplash.com/photo-1539768942893-daf53e448371?w=1200',
-                'https://images.unsplash.com/photo-1553913861-c0fddf2619ee?w=1200',
-                'https://images.unsplash.com/photo-1568322445389-f64ac2515020?w=1200',
-            ],
-            'live_url': 'https://egy360.up.railway.app',
-            'github_url': 'https://github.com/mohammadhussienzo90-collab/Egy360',
-            'tech_stack': ['Django', 'Python', 'SQLite', 'Tailwind CSS', 'Alpine.js', 'Railway'],
-            'features': [
-                'Dynamic destination guides with rich media',
-                'Interactive tour booking system',
-                'Curated hotel recommendations',
-                'Comprehensive article management',
-                'Responsive, mobile-first design',
-                'SEO optimized content',
-                'Admin dashboard for content management',
-            ],
-            'category': 'website',
-            'is_featured': True,
-            'display_order': 1,
-        }
-    )
+    return JsonResponse({
+        'query': query,
+        'results': [
+            {
+                **{field: row[field] for field in SEARCH_RESULT_FIELDS},
+                'url': reverse('core:project_detail', args=[row['slug']]),
+            }
+            for row in rows
+        ],
+    })
+
+
+@never_cache
+@require_GET
+def metrics_view(request):
+    """Request metrics from every worker, in the Prometheus text format."""
+    token = django_settings.METRICS_TOKEN
+    if not token:
+        # Nobody was meant to scrape this deployment; don't admit it exists
+        if not django_settings.DEBUG:
+            raise Http404('No metrics token configured')
+    elif request.META.get('HTTP_AUTHORIZATION') != f'Bearer {token}':
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    return HttpResponse(metrics.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 
+@never_cache
+def csrf_token(request):
+    """Hand out a CSRF token (and cookie) to the cookie-free public pages' forms."""
+    return JsonResponse({'token': get_token(request)})
+
+
+def seed_data(request):
+    """Seed initial data for the portfolio."""
+    # Upserts by natural key, so seeding twice changes nothing
+    import_file(SEED_FIXTURE)
     return JsonResponse({'success': True, 'message': 'Data seeded successfully!'})
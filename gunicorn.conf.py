@@ -0,0 +1,48 @@
+"""
+Gunicorn configuration.
+
+SERVING_MODE (see portfolio/settings.py) picks the application and worker
+class: 'wsgi' serves portfolio.wsgi with sync workers, one request per
+worker at a time; 'asgi' serves portfolio.asgi with uvicorn workers, which
+keep many slow connections open on one event loop.
+
+With preload_app (the default), Django is loaded once in the master and
+when_ready warms it up before any worker is forked; see core/boot.py.
+"""
+
+import os
+import time
+
+serving_mode = os.environ.get('SERVING_MODE', 'wsgi').lower()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+if serving_mode == 'asgi':
+    wsgi_app = 'portfolio.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'portfolio.wsgi:application'
+    worker_class = 'sync'
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True').lower() in ('true', '1', 'yes')
+
+
+def when_ready(server):
+    if not preload_app:
+        # Django isn't loaded in the master
+        return
+    from core import boot
+
+    phases = {f'warmup_{name}': seconds for name, seconds in boot.warm_up().items()}
+    started_at = os.environ.get(boot.STARTED_AT_ENV)
+    if started_at:
+        phases['ready'] = time.time() - float(started_at)
+    boot.record(phases)
+    server.log.info('Warmed up: %s', ', '.join(f'{name} {seconds:.3f}s' for name, seconds in phases.items()))
+
+
+def post_worker_init(worker):
+    # Threads don't survive the fork, so each worker starts its own
+    from core import boot
+
+    boot.start_background_work()
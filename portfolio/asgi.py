@@ -8,4 +8,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up
+from core.hints import EarlyHintsASGIMiddleware  # noqa: E402
+
+application = EarlyHintsASGIMiddleware(django_application)
@@ -5,9 +5,14 @@ Django settings for Portfolio project.
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Writable runtime state (caches, spools, ...) shared by all workers
+VAR_DIR = Path(os.environ.get('VAR_DIR', BASE_DIR / 'var'))
+
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.environ.get('SECRET_KEY', 'django-insecure-change-this-in-production-portfolio-key-2024')
 
@@ -42,10 +47,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.EarlyHintsMiddleware',
+    'core.middleware.PrerenderedPageMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'core.middleware.AdmissionControlMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -72,14 +81,158 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'portfolio.wsgi.application'
 
+# Serving mode, read by gunicorn.conf.py: 'wsgi' runs sync workers on
+# portfolio.wsgi, 'asgi' runs uvicorn workers on portfolio.asgi, where the
+# async versions of home, project_detail and contact_submit are routed.
+SERVING_MODE = os.environ.get('SERVING_MODE', 'wsgi').lower()
+if SERVING_MODE not in ('wsgi', 'asgi'):
+    raise ImproperlyConfigured(f"SERVING_MODE must be 'wsgi' or 'asgi', not {SERVING_MODE!r}")
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', str(SERVING_MODE == 'asgi')).lower() in ('true', '1', 'yes')
+
 # Database
+# SQLite connection profiles, applied by core/db.py. 'tuned' runs in WAL mode
+# so readers don't block on the writer, takes the write lock up front with
+# BEGIN IMMEDIATE and keeps connections open across requests; 'default' is
+# SQLite's stock behaviour.
+SQLITE_PROFILES = {
+    'default': {
+        'PRAGMAS': {},
+        'CONN_MAX_AGE': 0,
+        'TRANSACTION_MODE': None,
+    },
+    'tuned': {
+        'PRAGMAS': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,  # in KiB
+            'busy_timeout': 5000,  # in ms
+            'temp_store': 'MEMORY',
+        },
+        'CONN_MAX_AGE': 600,
+        'TRANSACTION_MODE': 'IMMEDIATE',
+    },
+}
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'tuned')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Async views query from a fresh thread per request, so connections
+        # kept open past the request would only pile up
+        'CONN_MAX_AGE': 0 if SERVING_MODE == 'asgi' else SQLITE_PROFILES[SQLITE_PROFILE]['CONN_MAX_AGE'],
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': SQLITE_PROFILES[SQLITE_PROFILE]['TRANSACTION_MODE'],
+        },
+    }
+}
+
+# Cache
+# One SQLite file every gunicorn worker shares, so they see the same entries
+# and invalidations; bounded, with LRU eviction (see core/cache_backends.py)
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': VAR_DIR / 'cache.sqlite3',
+        'OPTIONS': {
+            'MAX_BYTES': int(os.environ.get('CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 100_000)),
+        },
     }
 }
 
+# Seconds a rendered anonymous page is kept (content changes drop it earlier)
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# Cache-Control for anonymous pages (see core/cache.py). They set no cookies,
+# so shared caches and CDNs may keep them. Browsers revalidate every time
+# (a cheap 304); shared caches keep a page for s-maxage seconds, so a
+# content change can take that long to reach visitors behind one.
+ANONYMOUS_CACHE_CONTROL = {
+    'public': True,
+    'max_age': int(os.environ.get('ANONYMOUS_MAX_AGE', 0)),
+    's_maxage': int(os.environ.get('ANONYMOUS_S_MAXAGE', 300)),
+    'stale_while_revalidate': int(os.environ.get('ANONYMOUS_STALE_WHILE_REVALIDATE', 24 * 60 * 60)),
+}
+
+# Contact inquiry spool: submissions are queued on disk and written to the
+# database in batches (see core/spool.py)
+INQUIRY_SPOOL_ENABLED = os.environ.get('INQUIRY_SPOOL_ENABLED', 'True').lower() in ('true', '1', 'yes')
+INQUIRY_SPOOL_DIR = VAR_DIR / 'spool'
+INQUIRY_SPOOL_BATCH_SIZE = 500
+INQUIRY_SPOOL_FLUSH_INTERVAL = float(os.environ.get('INQUIRY_SPOOL_FLUSH_INTERVAL', 2.0))
+INQUIRY_SPOOL_FSYNC = True
+# Flush from a background thread in each web worker; turn off when running
+# `manage.py flush_inquiries --loop` as a separate process
+INQUIRY_SPOOL_AUTOFLUSH = os.environ.get('INQUIRY_SPOOL_AUTOFLUSH', 'True').lower() in ('true', '1', 'yes')
+
+# Inquiry retention: `manage.py archive_inquiries` moves read inquiries
+# older than INQUIRY_RETENTION_DAYS into gzipped monthly files, indexed by
+# ArchivedInquiry so single records can be looked up and restored (see
+# core/archive.py)
+INQUIRY_RETENTION_DAYS = int(os.environ.get('INQUIRY_RETENTION_DAYS', 180))
+INQUIRY_ARCHIVE_DIR = VAR_DIR / 'archive' / 'inquiries'
+# Records compressed together; a lookup decompresses one such member
+INQUIRY_ARCHIVE_MEMBER_SIZE = 64
+
+# Admission control for @admission_controlled views such as contact_submit
+# (see core/admission.py). Rates are (tokens per second, burst size).
+ADMISSION_CONTROL_ENABLED = os.environ.get('ADMISSION_CONTROL_ENABLED', 'True').lower() in ('true', '1', 'yes')
+ADMISSION_DB_PATH = VAR_DIR / 'admission.sqlite3'
+ADMISSION_DB_TIMEOUT = 0.5
+ADMISSION_IP_RATE = (1 / 60, 5)
+ADMISSION_GLOBAL_RATE = (float(os.environ.get('ADMISSION_GLOBAL_RATE', 5)), 50)
+# Seconds an identical payload is answered from the dedupe record
+ADMISSION_DEDUPE_WINDOW = 10 * 60
+# Proxies in front of the app that append the address they saw to
+# X-Forwarded-For; the client is that many entries from the right (the
+# entries left of it are whatever the client sent). 0 uses REMOTE_ADDR.
+# Railway's edge proxy is one hop, so it defaults to 1 there.
+ADMISSION_TRUSTED_PROXIES = int(os.environ.get(
+    'ADMISSION_TRUSTED_PROXIES', 1 if os.environ.get('RAILWAY_ENVIRONMENT') else 0,
+))
+
+# Request metrics, served at /metrics (see core/metrics.py). Workers merge
+# their counts into METRICS_DB_PATH every METRICS_FLUSH_INTERVAL seconds.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() in ('true', '1', 'yes')
+METRICS_DB_PATH = VAR_DIR / 'metrics.sqlite3'
+METRICS_FLUSH_INTERVAL = 5.0
+METRICS_LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+# Phase timings of the last `manage.py boot`, reported at /metrics
+BOOT_METRICS_PATH = VAR_DIR / 'boot.json'
+# Scrapers must send "Authorization: Bearer <token>"; unset, /metrics is a
+# 404 unless DEBUG is on
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Static prerendering (see core/prerender.py). When enabled, anonymous
+# visitors get the prerendered files and content changes rebuild them.
+PRERENDER_ENABLED = os.environ.get('PRERENDER_ENABLED', 'False').lower() in ('true', '1', 'yes')
+PRERENDER_ROOT = VAR_DIR / 'prerendered'
+
+# Resource hints for base.html's critical assets (see core/hints.py): a
+# 103 Early Hints response where the server supports it and a Link header.
+EARLY_HINTS_ENABLED = os.environ.get('EARLY_HINTS_ENABLED', 'True').lower() in ('true', '1', 'yes')
+EARLY_HINTS_EXCLUDED_PATHS = ['/admin/']
+# Stream the <head> before the page body renders
+EARLY_FLUSH_ENABLED = os.environ.get('EARLY_FLUSH_ENABLED', 'False').lower() in ('true', '1', 'yes')
+
+# Project cards rendered with the home page; the rest load on demand
+HOME_PROJECTS_PAGE_SIZE = 6
+
+# Responsive image derivatives (see core/images.py)
+IMAGE_PIPELINE_ENABLED = os.environ.get('IMAGE_PIPELINE_ENABLED', 'True').lower() in ('true', '1', 'yes')
+IMAGE_WIDTHS = [400, 800, 1200, 1600]
+IMAGE_CACHE_DIR = VAR_DIR / 'images'
+IMAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Swap for core.images.LocalFileFetcher with {'root': ...} to read local files
+IMAGE_FETCHER = 'core.images.HttpFetcher'
+IMAGE_FETCHER_OPTIONS = {}
+
+# Neighbours kept per project in the related-projects index
+RELATED_PROJECTS_INDEX_SIZE = 6
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -107,11 +260,59 @@ STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
-# WhiteNoise configuration
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# WhiteNoise configuration (STATICFILES_STORAGE is ignored from Django 5.1 on)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+
+# Asset pipeline (see core/assets.py). build_assets writes critical CSS, the
+# minified stylesheet and the JS bundle into static/build/ before
+# collectstatic hashes them; until then the source files are served.
+ASSET_BUILD_DIR = BASE_DIR / 'static' / 'build'
+ASSET_STATIC_PREFIX = 'build'
+
+# Font Awesome subsetting (see core/icons.py). boot runs build_icons, which
+# reads Font Awesome Free from the fontawesomefree package (or from
+# FONT_AWESOME_SOURCE_DIR, an extracted fontawesome-free-*-web download) and
+# writes into static/icons/; until then the full stylesheet is loaded from
+# the CDN. Keep the CDN version in step with the fontawesomefree pin.
+FONT_AWESOME_SOURCE_DIR = os.environ.get('FONT_AWESOME_SOURCE_DIR', '')
+FONT_AWESOME_CDN_URL = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/css/all.min.css'
+ICON_STATIC_PREFIX = 'icons'
+ICON_OUTPUT_DIR = BASE_DIR / 'static' / ICON_STATIC_PREFIX
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-# Email configuration (for contact form - can be configured later)
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+# Email configuration. Set EMAIL_BACKEND to
+# django.core.mail.backends.smtp.EmailBackend to send for real; for a local
+# stand-in run `manage.py smtp_sink` and point EMAIL_PORT at it.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'False').lower() in ('true', '1', 'yes')
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'portfolio@localhost')
+
+# Inquiry notifications (see core/notifications.py): an outbox row is written
+# with every inquiry and a background thread in each web worker delivers them
+NOTIFICATIONS_ENABLED = os.environ.get('NOTIFICATIONS_ENABLED', 'True').lower() in ('true', '1', 'yes')
+# Turn off when running `manage.py send_notifications --loop` as a separate
+# process instead (it must share the SQLite file, so the same machine)
+NOTIFICATION_AUTODELIVER = os.environ.get('NOTIFICATION_AUTODELIVER', 'True').lower() in ('true', '1', 'yes')
+# Defaults to the email in SiteSettings
+NOTIFICATION_RECIPIENT = os.environ.get('NOTIFICATION_RECIPIENT', '')
+NOTIFICATION_BATCH_SIZE = 200
+NOTIFICATION_POLL_INTERVAL = 10.0
+# More than this many due at once are sent as digests of up to DIGEST_SIZE
+NOTIFICATION_DIGEST_THRESHOLD = 3
+NOTIFICATION_DIGEST_SIZE = 50
+# Seconds; the delay doubles after each failure up to RETRY_MAX
+NOTIFICATION_RETRY_BASE = 30
+NOTIFICATION_RETRY_MAX = 60 * 60
+NOTIFICATION_MAX_ATTEMPTS = 8
+# Seconds a claimed notification is hidden from other workers
+NOTIFICATION_LEASE = 5 * 60
@@ -0,0 +1,171 @@
+/**
+ * Portfolio - Alpine.js components
+ *
+ * Loaded before Alpine initialises (Alpine is deferred), so the x-data
+ * factories below exist when it walks the page. URLs come in as arguments
+ * from the templates.
+ */
+
+/**
+ * Home page project grid: category filter and "Load More" pagination.
+ * Both fetch cards from the server, so a category also finds the projects
+ * past the pages loaded so far.
+ */
+function projectGrid(cursor, cardsUrl) {
+    return {
+        activeFilter: 'all',
+        nextCursor: cursor,
+        loadingMore: false,
+        loadingFilter: false,
+        request: 0,
+
+        async filter(category) {
+            if (category === this.activeFilter) return;
+            this.activeFilter = category;
+            this.loadingFilter = true;
+            await this.fetchCards('', true);
+            this.loadingFilter = false;
+        },
+
+        async loadMore() {
+            this.loadingMore = true;
+            await this.fetchCards(this.nextCursor, false);
+            this.loadingMore = false;
+        },
+
+        async fetchCards(cursor, replace) {
+            // A later click wins over a response still on its way
+            const request = ++this.request;
+            const params = new URLSearchParams();
+            if (cursor) params.set('cursor', cursor);
+            if (this.activeFilter !== 'all') params.set('category', this.activeFilter);
+            try {
+                const response = await fetch(cardsUrl + '?' + params);
+                if (!response.ok) return;
+                const html = await response.text();
+                if (request !== this.request) return;
+                if (replace) {
+                    this.$refs.grid.innerHTML = html;
+                } else {
+                    this.$refs.grid.insertAdjacentHTML('beforeend', html);
+                }
+                const marker = this.$refs.grid.querySelector('[data-next-cursor]');
+                this.nextCursor = marker ? marker.dataset.nextCursor : '';
+                if (marker) marker.remove();
+            } catch (error) {
+                // Leave the buttons in place so the visitor can retry
+            }
+        }
+    }
+}
+
+/**
+ * Home page contact forms, submitted over fetch
+ */
+function contactForm(submitUrl, tokenUrl) {
+    return {
+        formType: 'general',
+        loading: false,
+        message: '',
+        success: false,
+        tokenRequest: null,
+
+        // The pages are cached without cookies, so the token (and its
+        // cookie) is fetched once, when a visitor starts on the form
+        csrfToken() {
+            if (!this.tokenRequest) {
+                this.tokenRequest = fetch(tokenUrl)
+                    .then(response => response.json())
+                    .then(data => data.token)
+                    .catch(error => {
+                        this.tokenRequest = null;
+                        throw error;
+                    });
+            }
+            return this.tokenRequest;
+        },
+
+        async submitForm(event) {
+            this.loading = true;
+            this.message = '';
+
+            const form = event.target;
+            const formData = new FormData(form);
+            const headers = {
+                'X-Requested-With': 'XMLHttpRequest',
+            };
+
+            try {
+                headers['X-CSRFToken'] = await this.csrfToken();
+
+                const response = await fetch(submitUrl, {
+                    method: 'POST',
+                    body: formData,
+                    headers: headers
+                });
+
+                const data = await response.json();
+
+                if (data.success) {
+                    this.success = true;
+                    this.message = data.message;
+                    form.reset();
+                } else {
+                    this.success = false;
+                    this.message = 'Please fix the errors and try again.';
+                }
+            } catch (error) {
+                this.success = false;
+                this.message = 'An error occurred. Please try again.';
+            }
+
+            this.loading = false;
+
+            // Clear message after 5 seconds
+            setTimeout(() => {
+                this.message = '';
+            }, 5000);
+        }
+    }
+}
+
+/**
+ * Project page screenshot gallery
+ */
+function projectGallery() {
+    return {
+        currentSlide: 0,
+        screenshots: JSON.parse(document.getElementById('gallery-data').textContent),
+
+        get slide() {
+            return this.screenshots[this.currentSlide];
+        },
+
+        init() {
+            // Fetch the next slide in the background so switching is instant
+            this.$watch('currentSlide', () => this.prefetch());
+            this.prefetch();
+        },
+
+        prefetch() {
+            if (this.screenshots.length < 2) return;
+            const next = this.screenshots[(this.currentSlide + 1) % this.screenshots.length];
+            const sizes = '(max-width: 1200px) 100vw, 1200px';
+            // A detached <picture> like the gallery's, so the browser picks
+            // the same format it will display
+            const picture = document.createElement('picture');
+            for (const source of document.querySelectorAll('.gallery-main source')) {
+                const candidate = document.createElement('source');
+                candidate.type = source.type;
+                candidate.sizes = sizes;
+                candidate.srcset = next.sources[source.type.split('/')[1]] || '';
+                picture.appendChild(candidate);
+            }
+            const image = new Image();
+            image.sizes = sizes;
+            image.srcset = next.srcset;
+            image.src = next.src;
+            picture.appendChild(image);
+        }
+    }
+}